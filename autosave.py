@@ -0,0 +1,544 @@
+"""
+Atomic saves, debounced autosave and an incremental change journal.
+
+- `atomic_write_text` writes to a temp file in the same folder, fsyncs it and
+  renames it over the target, so a crash leaves either the old file or the new
+  one, never a truncated mix.
+- `ChangeJournal` is an append-only file of small JSON-lines deltas
+  ({"op": "set", "path": [...], "value": ...}, a text splice, or a list
+  append / delete). Each edit costs one short line instead of rewriting the
+  whole character.
+- `Autosaver` records edits in the journal as they happen, fsyncs it once the
+  user pauses (debounced with Tk's `after`), and every `compact_every` entries
+  folds the journal into an atomic snapshot. The fsync and the snapshot write
+  run on a worker thread; the Tk thread only appends journal lines and copies
+  the character, and hears back through a queue it polls with `after`.
+
+While a snapshot is being written, the journal it covers waits in
+"<journal>.pending" and new edits go to a fresh journal. After a crash,
+`recover(character, journal_file)` replays both over the last snapshot.
+Every journal entry carries a sequence number. Before a snapshot is written,
+"<journal>.seq" records a hash of its contents with the last sequence number
+it contains; replay skips the entries a snapshot on disk already folded in
+(e.g. the process died after the snapshot was written but before its pending
+journal was removed). The character document itself never carries journal
+bookkeeping.
+"""
+
+import copy
+import hashlib
+import json
+import os
+import queue
+import stat
+import tempfile
+import threading
+
+from inventory import Item
+
+SNAPSHOTS_KEPT = 3  # (hash, sequence number) records kept in the .seq file
+
+# Mode for new files, as open() would give them. The umask can only be read by
+# setting it, so this happens once, at import, before any worker thread exists.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+NEW_FILE_MODE = 0o666 & ~_UMASK
+
+
+def atomic_write_text(filename, text, encoding="utf-8"):
+    """Replace `filename` with `text` atomically (temp file + fsync + rename), keeping its mode."""
+    folder = os.path.dirname(os.path.abspath(filename))
+    try:
+        mode = stat.S_IMODE(os.stat(filename).st_mode)
+    except FileNotFoundError:
+        mode = NEW_FILE_MODE
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=folder)  # created 0600
+    try:
+        with os.fdopen(fd, "w", encoding=encoding) as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, mode)
+        os.replace(tmp, filename)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    # Make the rename itself durable (not possible / needed on Windows).
+    if hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(folder, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+# ---------- Deltas ----------
+def get_path(doc, path):
+    for key in path:
+        doc = doc[key]
+    return doc
+
+
+def set_path(doc, path, value):
+    for key in path[:-1]:
+        doc = doc.setdefault(key, {})
+    doc[path[-1]] = value
+
+
+def _matching_run(old, new, limit, from_end):
+    """Length of the common prefix (or suffix) of old/new, at most `limit`."""
+    n_old, n_new = len(old), len(new)
+    length, step = 0, 1
+    while True:
+        step = min(step, limit - length)
+        if step == 0:
+            return length
+        if from_end:
+            same = old[n_old - length - step:n_old - length] == new[n_new - length - step:n_new - length]
+        else:
+            same = old[length:length + step] == new[length:length + step]
+        if same:
+            length += step
+            step *= 2  # gallop while it keeps matching
+        elif step == 1:
+            return length
+        else:
+            step //= 2  # narrow down to the first difference
+
+
+def common_affixes(old, new):
+    """
+    (start, end_old, end_new): old[:start] == new[:start] and the tails
+    old[end_old:] == new[end_new:] are as long as possible without overlapping.
+    Works on str and list. Runs are compared in galloping slices (C-level
+    compares), so the cost is proportional to the matched length, not a Python
+    loop per item.
+    """
+    limit = min(len(old), len(new))
+    start = _matching_run(old, new, limit, from_end=False)
+    tail = _matching_run(old, new, limit - start, from_end=True)
+    return start, len(old) - tail, len(new) - tail
+
+
+def text_splice(old, new):
+    """(start, end, inserted) such that old[:start] + inserted + old[end:] == new."""
+    start, end_old, end_new = common_affixes(old, new)
+    return start, end_old, new[start:end_new]
+
+
+def apply_delta(doc, delta):
+    path = delta["path"]
+    if delta["op"] == "set":
+        set_path(doc, path, delta["value"])
+    elif delta["op"] == "splice":
+        old = get_path(doc, path)
+        start, end = delta["at"]
+        set_path(doc, path, old[:start] + delta["text"] + old[end:])
+    elif delta["op"] == "append":
+        get_path(doc, path).append(delta["value"])
+    elif delta["op"] == "del":
+        del get_path(doc, path[:-1])[path[-1]]
+    elif delta["op"] in ("inv_add", "inv_remove"):
+        _apply_inventory_delta(get_path(doc, path), delta)
+    else:
+        raise ValueError(f"Unknown journal op {delta['op']!r}")
+
+
+def _apply_inventory_delta(entries, delta):
+    """Replay an inventory stack change on the raw list (same rules as Inventory)."""
+    key = delta["name"].strip().casefold()
+    for i, value in enumerate(entries):
+        item = Item.from_json(value)
+        if item.name.strip().casefold() == key:
+            break
+    else:
+        i, item = len(entries), None
+    qty = delta.get("qty")
+    if delta["op"] == "inv_add":
+        if item is None:
+            item = Item(delta["name"].strip(), 0, delta.get("weight") or 0.0)
+            entries.append(None)
+        elif delta.get("weight") is not None:
+            item.weight = delta["weight"]
+        item.qty += qty
+        entries[i] = item.to_json()
+    elif item is not None:
+        if qty is not None and qty < item.qty:
+            item.qty -= qty
+            entries[i] = item.to_json()
+        else:
+            del entries[i]
+
+
+# ---------- Journal ----------
+class ChangeJournal:
+    """
+    Append-only JSON-lines file of deltas against the last saved snapshot.
+
+    append() only adds the line to an in-memory buffer; sync() (on the autosave
+    worker) swaps the buffer out and writes and fsyncs it, so a keystroke never
+    waits for the disk.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.entries = 0
+        self._file = None
+        self._buffer = []  # lines not written to the file yet
+        self._lock = threading.Lock()  # guards _buffer only; held for a list swap at most
+        self._io_lock = threading.Lock()  # guards the file; held across write + fsync
+
+    def append(self, delta):
+        line = json.dumps(delta, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._buffer.append(line)
+            self.entries += 1
+
+    def sync(self):
+        """Write the buffered entries and fsync them."""
+        with self._io_lock:
+            self._write_buffered()
+            if self._file is not None:
+                os.fsync(self._file.fileno())
+
+    def _write_buffered(self):
+        # Caller holds _io_lock; appends keep going into a fresh buffer meanwhile.
+        with self._lock:
+            lines, self._buffer = self._buffer, []
+        if lines:
+            if self._file is None:
+                self._file = open(self.filename, "a", encoding="utf-8")
+            self._file.write("".join(lines))
+            self._file.flush()
+
+    def rotate(self, pending):
+        """Move the entries to `pending` (appending if it already exists) and start empty."""
+        with self._io_lock:
+            self._write_buffered()
+            self._close()
+            if os.path.exists(self.filename):
+                if os.path.exists(pending):
+                    with open(self.filename, "rb") as src, open(pending, "ab") as dst:
+                        dst.write(src.read())
+                    os.remove(self.filename)
+                else:
+                    os.replace(self.filename, pending)
+            self.entries = 0
+
+    def truncate(self):
+        """Drop every entry (call right after a snapshot is safely written)."""
+        with self._io_lock:
+            with self._lock:
+                self._buffer = []
+            self._close()
+            try:
+                os.remove(self.filename)
+            except FileNotFoundError:
+                pass
+            self.entries = 0
+
+    def close(self):
+        with self._io_lock:
+            self._write_buffered()
+            self._close()
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def pending_file(journal_file):
+    """Where the journal covered by an in-flight snapshot waits (see Autosaver.compact)."""
+    return journal_file + ".pending"
+
+
+def seq_file(journal_file):
+    """Where the sequence numbers of recent snapshots are recorded (see Autosaver._write_snapshot)."""
+    return journal_file + ".seq"
+
+
+def snapshot_hash(doc):
+    """Hash of a character's contents, independent of how the file was formatted."""
+    text = json.dumps(doc, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _read_snapshots(journal_file):
+    """[[hash, last sequence number], ...] for the most recent snapshots, oldest first."""
+    try:
+        with open(seq_file(journal_file), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return []
+
+
+def _record_snapshot(journal_file, digest, seq):
+    snapshots = _read_snapshots(journal_file)[1 - SNAPSHOTS_KEPT:] + [[digest, seq]]
+    atomic_write_text(seq_file(journal_file), json.dumps(snapshots))
+
+
+def _journal_seqs(filename):
+    """Sequence numbers in a journal file (none if it is missing)."""
+    try:
+        f = open(filename, "r", encoding="utf-8")
+    except FileNotFoundError:
+        return []
+    seqs = []
+    with f:
+        for line in f:
+            try:
+                seqs.append(json.loads(line).get("seq") or 0)
+            except ValueError:
+                break
+    return seqs
+
+
+def last_seq(journal_file):
+    """Highest sequence number in the journals or the .seq record (new entries go above it)."""
+    seqs = [seq for _, seq in _read_snapshots(journal_file)]
+    seqs += _journal_seqs(pending_file(journal_file)) + _journal_seqs(journal_file)
+    return max(seqs, default=0)
+
+
+def recover(character, journal_file):
+    """
+    Replay the pending journal and `journal_file` over `character` in place;
+    returns how many deltas applied. If `character` is a snapshot recorded in
+    the .seq file, the entries it already contains are skipped.
+    """
+    digest = snapshot_hash(character)
+    covered = next((seq for h, seq in reversed(_read_snapshots(journal_file)) if h == digest), 0)
+    return _replay(character, pending_file(journal_file), covered) + _replay(character, journal_file, covered)
+
+
+def _replay(character, journal_file, covered=0):
+    try:
+        f = open(journal_file, "r", encoding="utf-8")
+    except FileNotFoundError:
+        return 0
+    applied = 0
+    with f:
+        for line in f:
+            try:
+                delta = json.loads(line)
+            except ValueError:
+                break  # torn last line from a crash mid-append
+            if delta.get("seq", covered + 1) <= covered:
+                continue  # folded into the snapshot already
+            apply_delta(character, delta)
+            applied += 1
+    return applied
+
+
+# ---------- Autosave ----------
+class Autosaver:
+    """
+    Journal edits to `character` and periodically compact them into a snapshot.
+
+    `save(snapshot)` must write the full snapshot atomically (e.g. main2's
+    save_character_to_file); it runs on the worker thread with a private copy
+    of the character. `prepare()`, if given, runs on the Tk thread just before
+    that copy is taken (to fold in state kept outside `character`). `root` is
+    any Tk widget; its `after` runs the debounce timer and the completion poll.
+    """
+
+    def __init__(self, root, character, save, journal_file, delay_ms=1000, compact_every=200,
+                 prepare=None, poll_ms=50):
+        self.root = root
+        self.character = character
+        self.save = save
+        self.prepare = prepare
+        self.journal = ChangeJournal(journal_file)
+        self.pending_file = pending_file(journal_file)
+        self.journal_file = journal_file
+        self.delay_ms = delay_ms
+        self.compact_every = compact_every
+        self.poll_ms = poll_ms
+        self._after_id = None
+        self._jobs = queue.Queue()  # (fn, on_done) for the worker; None stops it
+        self._done = queue.Queue()  # (on_done, exception or None) back to the Tk thread
+        self._in_flight = 0
+        self._polling = False
+        self._compacting = False
+        self._compact_again = False
+        self._thread = None
+        self._seq = last_seq(journal_file)  # last journal sequence number handed out
+
+    def _journal(self, delta):
+        self._seq += 1
+        self.journal.append({**delta, "seq": self._seq})
+        self._schedule()
+
+    def set(self, path, value):
+        """Record a field change (no-op if the value did not change)."""
+        try:
+            if get_path(self.character, path) == value:
+                return
+        except (KeyError, IndexError, TypeError):
+            pass
+        set_path(self.character, path, value)
+        self._journal({"op": "set", "path": list(path), "value": value})
+
+    def edit_text(self, path, new_text):
+        """Record a text change as a splice, so typing one letter journals one letter."""
+        try:
+            old = get_path(self.character, path)
+        except KeyError:
+            old = ""
+            set_path(self.character, path, old)
+        if old == new_text:
+            return
+        start, end, inserted = text_splice(old, new_text)
+        set_path(self.character, path, new_text)
+        self._journal({"op": "splice", "path": list(path), "at": [start, end], "text": inserted})
+
+    def append(self, path, value):
+        """Append `value` to the list at `path` (created if missing)."""
+        try:
+            get_path(self.character, path).append(value)
+        except KeyError:
+            set_path(self.character, path, [value])
+            self._journal({"op": "set", "path": list(path), "value": [value]})
+        else:
+            self._journal({"op": "append", "path": list(path), "value": value})
+
+    def delete(self, path, index):
+        """Delete item `index` from the list at `path`."""
+        del get_path(self.character, path)[index]
+        self._journal({"op": "del", "path": [*path, index]})
+
+    def log(self, delta):
+        """Journal a delta for data kept outside `character` (e.g. the Inventory index)."""
+        self._journal(delta)
+
+    def _schedule(self):
+        # Restart the timer on every edit; flush only once the user pauses.
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+        self._after_id = self.root.after(self.delay_ms, self.flush)
+
+    def _cancel_timer(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def flush(self):
+        """Make journaled edits durable; compact if the journal has grown large."""
+        self._after_id = None
+        if self.journal.entries >= self.compact_every:
+            self.compact()
+        else:
+            self._submit(self.journal.sync)
+
+    def compact(self):
+        """Write a full snapshot (on the worker) and start a fresh journal."""
+        self._cancel_timer()
+        if self._compacting:
+            self._compact_again = True  # after the one in flight, which predates the latest edits
+            return
+        if self.prepare is not None:
+            self.prepare()
+        snapshot, seq = copy.deepcopy(self.character), self._seq
+        self.journal.rotate(self.pending_file)
+        self._compacting = True
+        self._submit(lambda: self._write_snapshot(snapshot, seq), self._compacted)
+
+    def _write_snapshot(self, snapshot, seq):
+        # Recorded first: a snapshot that never lands has a hash nothing on disk matches.
+        _record_snapshot(self.journal_file, snapshot_hash(snapshot), seq)
+        self.save(snapshot)
+        try:
+            os.remove(self.pending_file)  # folded into the snapshot
+        except FileNotFoundError:
+            pass  # nothing was journaled
+
+    def _compacted(self, error):
+        self._compacting = False
+        if error is not None:
+            print(f"Autosave failed (edits stay in the journal): {error}")
+        if self._compact_again:
+            self._compact_again = False
+            self.compact()
+
+    @property
+    def unsaved(self):
+        """True if some edits are only in the journal (not yet in a snapshot)."""
+        return bool(self.journal.entries) or self._compacting or os.path.exists(self.pending_file)
+
+    def discard(self):
+        """Drop all journaled edits (e.g. the file was reloaded). Waits for work in flight."""
+        self.wait()
+        self._cancel_timer()
+        self.journal.truncate()
+        try:
+            os.remove(self.pending_file)
+        except FileNotFoundError:
+            pass
+
+    def wait(self):
+        """Block until the worker is idle and run the completion callbacks."""
+        if self._thread is not None:
+            self._jobs.join()
+        self._poll()
+
+    def close(self):
+        """Save anything unsaved (blocking; for shutdown) and stop the worker."""
+        self._cancel_timer()
+        self._compact_again = False
+        self.wait()
+        if self._thread is not None:
+            self._jobs.put(None)
+            self._thread.join()
+            self._thread = None
+        if self.unsaved:
+            if self.prepare is not None:
+                self.prepare()
+            self.journal.rotate(self.pending_file)
+            self._write_snapshot(self.character, self._seq)
+        self.journal.close()
+
+    # ---------- Worker ----------
+    def _submit(self, fn, on_done=None):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="autosave", daemon=True)
+            self._thread.start()
+        self._in_flight += 1
+        self._jobs.put((fn, on_done))
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                self._jobs.task_done()
+                return
+            fn, on_done = job
+            try:
+                fn()
+                error = None
+            except Exception as e:  # reported on the Tk thread
+                error = e
+            self._done.put((on_done, error))
+            self._jobs.task_done()
+
+    def _poll(self):
+        self._polling = False
+        while True:
+            try:
+                on_done, error = self._done.get_nowait()
+            except queue.Empty:
+                break
+            self._in_flight -= 1
+            if on_done is not None:
+                on_done(error)
+            elif error is not None:
+                print(f"Autosave failed: {error}")
+        if self._in_flight and not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
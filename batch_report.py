@@ -0,0 +1,184 @@
+"""
+Headless batch report of derived stats for a folder of character files.
+
+Walks a directory of character/NPC JSON files (character.json shape), computes
+ability modifiers, skill totals, initiative and per-weapon attack odds with the
+same rules the Tk app uses (rules.py / odds.py, no tkinter), and writes one
+report row per file as JSON lines or CSV.
+
+Files are streamed: paths come from a lazy directory scan, chunks of them are
+handed to a process pool with only a few chunks in flight at a time, and each
+row is written as soon as its chunk finishes (in input order). Memory stays
+flat whether the folder holds ten files or ten thousand.
+
+Usage:
+    python batch_report.py characters/ --format csv --out report.csv --ac 15
+    python batch_report.py npcs/ --recursive --workers 8 > report.jsonl
+"""
+
+import argparse
+import csv
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from odds import attack_odds, weapon_odds
+from rules import calc_mods, skill_modifier, roll_to_hit, roll_damage
+from serialization import dumps, load_file, validate_character
+
+ABILITIES = ("STR", "DEX", "CON", "INT", "WIS", "CHA")
+CSV_FIELDS = ("file", "name", "class", "level", "hp_current", "hp_max", "ac", *ABILITIES,
+              "initiative", "skills", "weapons", "error")
+
+# How many chunks may be queued per worker before we wait for results.
+CHUNKS_IN_FLIGHT = 4
+
+
+def iter_character_files(folder, recursive=False):
+    """Yield paths of *.json files in `folder` (sorted per directory, lazily)."""
+    with os.scandir(folder) as it:
+        entries = sorted(it, key=lambda e: e.name)
+    for entry in entries:
+        if entry.is_dir():
+            if recursive:
+                yield from iter_character_files(entry.path, recursive)
+        elif entry.name.lower().endswith(".json"):
+            yield entry.path
+
+
+# ---------- One file (runs inside a worker process) ----------
+def character_report(character, ac=15, sample_rolls=False):
+    """Derived stats for one character dict (plain, JSON-ready values)."""
+    mods = calc_mods(character["stats"])
+    row = {
+        "name": character["name"],
+        "class": character.get("class"),
+        "level": character.get("level"),
+        "hp_current": character["hp"]["current"],
+        "hp_max": character["hp"]["max"],
+        "ac": character["ac"],
+        "mods": mods,
+        "initiative": mods.get("DEX", 0),
+        "skills": {name: skill_modifier(character, name) for name in character.get("skills", {})},
+        "weapons": {},
+    }
+    for name, weapon in character.get("weapons", {}).items():
+        report = {"hit_mod": weapon.get("hit_mod", 0), "vs_ac": ac}
+        try:
+            odds = weapon_odds(weapon, ac)
+        except ValueError as e:  # e.g. 1d12! has no exact damage distribution; keep the hit odds
+            hit, crit = attack_odds(weapon.get("hit_mod", 0), ac)
+            odds = {"hit": hit, "crit": crit, "expected_damage": None}
+            report["error"] = str(e)
+        report["hit"] = round(odds["hit"], 4)
+        report["crit"] = round(odds["crit"], 4)
+        if odds["expected_damage"] is not None:
+            report["expected_damage"] = round(odds["expected_damage"], 3)
+        if sample_rolls:
+            report["sample_to_hit"] = roll_to_hit(weapon)
+            report["sample_damage"] = roll_damage(weapon)
+        row["weapons"][name] = report
+    return row
+
+
+def _process_chunk(paths, ac, sample_rolls):
+    rows = []
+    for path in paths:
+        try:
+            row = character_report(load_file(path, validate=validate_character), ac, sample_rolls)
+        except (OSError, ValueError) as e:  # unreadable, bad JSON or wrong shape
+            row = {"error": str(e)}
+        rows.append({"file": path, **row})
+    return rows
+
+
+# ---------- Streaming over many files ----------
+def _chunks(iterable, size):
+    it = iter(iterable)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def process_paths(paths, ac=15, workers=None, chunksize=64, sample_rolls=False):
+    """
+    Yield one report row per path, in input order.
+
+    workers=1 runs in-process; otherwise a process pool works on at most
+    `workers * CHUNKS_IN_FLIGHT` chunks at a time, so `paths` may be a lazy
+    generator of any length.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for chunk in _chunks(paths, chunksize):
+            yield from _process_chunk(chunk, ac, sample_rolls)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in _chunks(paths, chunksize):
+            pending.append(pool.submit(_process_chunk, chunk, ac, sample_rolls))
+            if len(pending) >= workers * CHUNKS_IN_FLIGHT:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+# ---------- Output ----------
+def _csv_row(row):
+    if "error" in row:
+        return {"file": row["file"], "error": row["error"]}
+    out = {key: row[key] for key in ("file", "name", "class", "level", "hp_current", "hp_max", "ac", "initiative")}
+    out.update({ab: row["mods"].get(ab) for ab in ABILITIES})
+    out["skills"] = "; ".join(f"{name} {mod:+d}" for name, mod in row["skills"].items())
+    out["weapons"] = "; ".join(
+        f"{name} {w['hit_mod']:+d} hit {w['hit']:.0%} "
+        + (f"avg {w['expected_damage']:.2f}" if "expected_damage" in w else f"avg ? ({w['error']})")
+        for name, w in row["weapons"].items()
+    )
+    return out
+
+
+def write_report(rows, out, fmt="jsonl"):
+    """Write rows to the text stream `out` as they arrive; returns (rows, errors)."""
+    count = errors = 0
+    if fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(_csv_row(row))
+            count += 1
+            errors += "error" in row
+    else:
+        for row in rows:
+            out.write(dumps(row, compact=True) + "\n")
+            count += 1
+            errors += "error" in row
+    return count, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report derived stats for a folder of character files")
+    parser.add_argument("folder", help="directory of character JSON files")
+    parser.add_argument("--format", choices=("jsonl", "csv"), default="jsonl")
+    parser.add_argument("--out", help="output file (default: stdout)")
+    parser.add_argument("--ac", type=int, default=15, help="target AC for weapon odds")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--chunksize", type=int, default=64, help="files per task")
+    parser.add_argument("--recursive", action="store_true", help="include subfolders")
+    parser.add_argument("--sample-rolls", action="store_true", help="add one sample to-hit / damage roll per weapon")
+    args = parser.parse_args(argv)
+
+    rows = process_paths(iter_character_files(args.folder, args.recursive), args.ac,
+                         args.workers, args.chunksize, args.sample_rolls)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8", newline="") as f:
+            count, errors = write_report(rows, f, args.format)
+    else:
+        count, errors = write_report(rows, sys.stdout, args.format)
+    print(f"{count} file(s) processed, {errors} error(s)", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Catalog search benchmark (catalog_store.CatalogStore).
+
+Builds a synthetic catalog of --entries lore entries in a temporary database,
+then times full-text searches (as typed in the worldbuilder's search bar,
+with and without a category filter) and single-entry saves, which re-index
+only the entry they write. Saves are timed on a .db store and on a store
+opened from a JSON catalog the way the apps open world_catalog.json, along
+with the debounced JSON export those saves defer. The old search (parse the
+JSON file, substring match on names) is timed on the same data for
+comparison.
+
+Usage:
+    python benchmarks/bench_catalog_search.py [--entries 5000] [--repeat 50]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from catalog_store import CatalogStore, open_catalog  # noqa: E402
+from serialization import load_file, save_file, validate_catalog  # noqa: E402
+
+CATEGORIES = ["Geography", "Nations", "History", "Magic", "Creatures", "Religion", "Politics"]
+WORDS = ("storm giant river crown ember shrine frost wyrm oath harbor rune ash verdant "
+         "citadel moon tide forge exile covenant hollow spire relic drowned sun iron").split()
+QUERIES = ["storm", "frost wyrm", "cov", "drowned shrine", "ember crown oath", "zzz"]
+
+
+def synthetic_catalog(n, rng):
+    """Entries of filler words with a few lore WORDS mixed in (a query matches a few % of them)."""
+    syllables = ["ka", "lor", "en", "thi", "mar", "du", "vel", "os", "ri", "an", "gul", "ye"]
+    filler = ["".join(rng.choices(syllables, k=3)) for _ in range(5000)]
+    catalog = {}
+    for i in range(n):
+        name = " ".join(rng.sample(WORDS, 2)).title() + f" {i}"
+        text = " ".join(rng.choice(WORDS) if rng.random() < 0.002 else rng.choice(filler)
+                        for _ in range(rng.randint(40, 200)))
+        catalog[name] = {"entry": text, "category": rng.choice(CATEGORIES)}
+    return catalog
+
+
+def median_ms(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args(argv)
+    rng = random.Random(1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "world.json")
+        save_file(json_path, synthetic_catalog(args.entries, rng))
+        store = CatalogStore(os.path.join(tmp, "world.db"))
+        start = time.perf_counter()
+        store.import_json(json_path)
+        print(f"{args.entries} entries imported and indexed in {(time.perf_counter() - start) * 1000:.0f} ms"
+              f" (FTS5: {'yes' if store.fts else 'no, LIKE fallback'})")
+
+        print(f"{'query':<22}{'hits':>6}{'search':>12}{'+ category':>12}{'old (names)':>14}")
+        for query in QUERIES:
+            hits = len(store.search(query, limit=args.entries))
+            ranked = median_ms(lambda: store.search(query), args.repeat)
+            filtered = median_ms(lambda: store.search(query, "Magic"), args.repeat)
+
+            def old_search():
+                catalog = load_file(json_path, validate=validate_catalog)
+                return [name for name in catalog if query.lower() in name.lower()]
+            old = median_ms(old_search, max(1, args.repeat // 10))
+            print(f"{query:<22}{hits:>6}{ranked:>10.2f}ms{filtered:>10.2f}ms{old:>12.2f}ms")
+
+        names = store.names()
+        save = median_ms(lambda: store.append(rng.choice(names), "a new storm rune"), args.repeat)
+        print(f"single-entry save + re-index (.db store):  {save:.2f} ms median")
+        store.close()
+
+        # What the apps pay: a store opened from the JSON catalog (world.json -> world.db).
+        catalog_path = os.path.join(tmp, "world_catalog.json")
+        save_file(catalog_path, load_file(json_path))
+        store = open_catalog(catalog_path)
+        save = median_ms(lambda: store.append(rng.choice(names), "a new storm rune"), args.repeat)
+        print(f"single-entry save + re-index (.json store): {save:.2f} ms median")
+
+        def save_and_export():
+            store.append(rng.choice(names), "a new storm rune")
+            store.flush()
+        export = median_ms(save_and_export, max(1, args.repeat // 5))
+        print(f"save + JSON export (once per burst, after EXPORT_DELAY): {export:.2f} ms median")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Benchmark suite for the dice and character-math hot paths.
+
+Times single calls (roll, calc_mods, skill_modifier, ability_check,
+skill_check, roll_to_hit, roll_damage, and the d20 + cached modifier that
+main2's check buttons roll), large die counts and batch workloads. Results can be saved as a JSON baseline and later runs
+compared against it; any benchmark slower than the baseline by more than the
+threshold makes the run exit with status 1.
+
+Usage:
+    python benchmarks/bench_hot_paths.py --save benchmarks/baseline.json
+    python benchmarks/bench_hot_paths.py --compare benchmarks/baseline.json --threshold 0.25
+    python benchmarks/bench_hot_paths.py --filter roll_damage
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import dice  # noqa: E402
+from character_model import Character  # noqa: E402
+from dice_expr import compile_expr  # noqa: E402
+from rules import (  # noqa: E402
+    calc_mods, ability_check, skill_modifier, skill_check, d20, roll_to_hit, roll_damage,
+)
+
+
+def load_sample_character():
+    with open(os.path.join(ROOT, "character.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build_benchmarks():
+    """Return [(name, zero-arg callable)]; each callable is one timed operation."""
+    character = load_sample_character()
+    stats = character["stats"]
+    model = Character(character)
+    weapon = character["weapons"]["Longsword"]
+    expr_weapon = {"hit_mod": 5, "damage": "2d6+3"}
+    fireball = compile_expr("8d6")
+    return [
+        # Single calls (what every UI click costs)
+        ("roll_d20", lambda: dice.roll(20)),
+        ("roll_3d6", lambda: dice.roll(6, 3)),
+        ("calc_mods", lambda: calc_mods(stats)),
+        ("skill_modifier", lambda: skill_modifier(character, "Stealth")),
+        ("ability_check", lambda: ability_check(character, "DEX")),
+        ("skill_check", lambda: skill_check(character, "Stealth")),
+        # What main2's check buttons roll (roll_d20_check without the Tk label)
+        ("ui_ability_check", lambda: d20() + model.mod("DEX")),
+        ("ui_skill_check", lambda: d20() + model.skill_modifier("Stealth")),
+        ("roll_to_hit", lambda: roll_to_hit(weapon)),
+        ("roll_damage", lambda: roll_damage(weapon)),
+        ("roll_damage_expr", lambda: roll_damage(expr_weapon)),
+        # Large die counts
+        ("roll_1000d6", lambda: dice.roll(6, 1000)),
+        ("roll_1e6d6", lambda: dice.roll(6, 1_000_000)),
+        # Batch workloads
+        ("batch_10k_x_8d6", lambda: dice.roll_batch(6, 8, 10_000)),
+        ("batch_expr_10k_x_8d6", lambda: fireball.roll_batch(10_000)),
+        ("batch_100k_d20", lambda: dice.roll_batch(20, 1, 100_000)),
+    ]
+
+
+def time_call(fn, repeat=5, min_time=0.2):
+    """Best-of-`repeat` nanoseconds per call (loop count picked like timeit's autorange)."""
+    timer = timeit.Timer(fn)
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e9
+
+
+def run(filter_text=None, repeat=5):
+    # Warm up caches, the RollStream buffers and the CPU clock before measuring.
+    warmup = timeit.default_timer() + 0.5
+    while timeit.default_timer() < warmup:
+        dice.roll(20)
+    results = {}
+    for name, fn in build_benchmarks():
+        if filter_text and filter_text not in name:
+            continue
+        results[name] = time_call(fn, repeat)
+    return results
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "numpy": getattr(dice.np, "__version__", None),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Print a comparison table; return the names that regressed past `threshold`."""
+    regressions = []
+    print(f"{'Benchmark':<24}{'baseline':>14}{'current':>14}{'change':>10}")
+    for name, ns in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<24}{'-':>14}{_fmt(ns):>14}{'new':>10}")
+            continue
+        change = ns / base - 1.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<24}{_fmt(base):>14}{_fmt(ns):>14}{change:>+9.1%}{flag}")
+    return regressions
+
+
+def _fmt(ns):
+    if ns >= 1e6:
+        return f"{ns / 1e6:.2f} ms"
+    if ns >= 1e3:
+        return f"{ns / 1e3:.2f} us"
+    return f"{ns:.0f} ns"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dice and character-math hot paths")
+    parser.add_argument("--save", metavar="FILE", help="write results as a JSON baseline")
+    parser.add_argument("--compare", metavar="FILE", help="compare against a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown before failing (0.25 = 25%%)")
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    dice.set_seed(0)  # same dice every run, so timings are comparable
+    results = run(args.filter, args.repeat)
+
+    status = 0
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"], args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed more than {args.threshold:.0%}: "
+                  f"{', '.join(regressions)}")
+            status = 1
+    else:
+        for name, ns in results.items():
+            print(f"{name:<24}{_fmt(ns):>14}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=4)
+        print(f"\nSaved baseline to {args.save}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
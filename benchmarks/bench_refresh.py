@@ -0,0 +1,133 @@
+"""
+Cost of refreshing the inventory list and notes: full redraw vs the view-model diff.
+
+For each inventory size it times three refreshes:
+- full: delete every row and re-insert them all (the old refresh_ui)
+- diff, unchanged: RenderCache.rows with nothing changed
+- diff, +1 item: RenderCache.rows after one item was added
+and the same for notes text (full rewrite vs one-word edit).
+
+Real Tk widgets are used when a display is available; otherwise a stand-in
+list/str widget is used, which measures the Python-side work and the number
+of widget operations but not Tk's own redraw cost (which only makes the full
+redraw look better than it is).
+
+Usage:
+    python benchmarks/bench_refresh.py [--sizes 10,100,1000,10000]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from view_model import RenderCache  # noqa: E402
+
+
+class FakeListbox:
+    """List-backed stand-in with the Listbox insert/delete calls we use."""
+
+    def __init__(self):
+        self.rows = []
+
+    def insert(self, index, value):
+        self.rows.insert(len(self.rows) if index == "end" else index, value)
+
+    def delete(self, first, last=None):
+        if last == "end":
+            del self.rows[first:]
+        else:
+            del self.rows[first]
+
+
+class FakeText:
+    def __init__(self):
+        self.text = ""
+
+    def replace(self, start, end, inserted):
+        self.text = inserted if end is None else self.text[:start] + inserted + self.text[end:]
+
+
+def make_widgets():
+    """(listbox, insert, delete, text replace fn, kind) using Tk if possible."""
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+        root.withdraw()
+    except Exception:
+        box, text = FakeListbox(), FakeText()
+        return box, box.insert, box.delete, text.replace, "stand-in widgets (no display)"
+    box = tk.Listbox(root)
+    notes = tk.Text(root)
+
+    def replace(start, end, inserted):
+        if end is None:
+            notes.delete("1.0", tk.END)
+        else:
+            notes.delete(f"1.0+{start}c", f"1.0+{end}c")
+        if inserted:
+            notes.insert(f"1.0+{start}c", inserted)
+    return box, box.insert, box.delete, replace, "Tk widgets"
+
+
+def best_us(fn, number, repeat=5):
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="10,100,1000,10000")
+    args = parser.parse_args(argv)
+    sizes = [int(s) for s in args.sizes.split(",")]
+
+    box, insert, delete, replace_text, kind = make_widgets()
+    print(f"Using {kind}\n")
+    print(f"{'rows':>7}{'full redraw':>14}{'diff, same':>14}{'diff, +1':>14}{'ops +1':>8}")
+    for n in sizes:
+        items = [f"item {i}" for i in range(n)]
+        number = max(1, 20_000 // n)
+
+        def full():
+            delete(0, "end")
+            for it in items:
+                insert("end", it)
+
+        view = RenderCache()
+        view.rows("inv", items, insert, delete)
+        same = lambda: view.rows("inv", items, insert, delete)  # noqa: E731
+
+        grown = items + ["new item"]
+        state = [items, grown]
+
+        def plus_one():
+            # alternate between n and n+1 rows: one insert or one delete each call
+            state.reverse()
+            view.rows("inv", state[0], insert, delete)
+
+        full_us = best_us(full, number)
+        same_us = best_us(same, number)
+        plus_us = best_us(plus_one, number)
+        before = view.ops
+        plus_one()
+        print(f"{n:>7}{full_us:>12.1f}us{same_us:>12.1f}us{plus_us:>12.1f}us{view.ops - before:>8}")
+
+    print(f"\n{'notes chars':>11}{'full rewrite':>15}{'diff, 1 word':>15}")
+    for n in sizes:
+        notes = ("lorem ipsum " * (n // 12 + 1))[:n]
+        edited = notes[: n // 2] + "WORD" + notes[n // 2:]
+        number = max(1, 20_000 // n)
+        full_us = best_us(lambda: replace_text(0, None, notes), number)
+        view = RenderCache()
+        view.text("notes", notes, replace_text)
+        state = [notes, edited]
+
+        def one_word():
+            state.reverse()
+            view.text("notes", state[0], replace_text)
+        print(f"{n:>11}{full_us:>13.1f}us{best_us(one_word, number):>13.1f}us")
+
+
+if __name__ == "__main__":
+    main()
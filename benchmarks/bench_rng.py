@@ -0,0 +1,47 @@
+"""
+Per-die cost of the RollStream against random.randint.
+
+Usage:
+    python benchmarks/bench_rng.py [--dice 1000000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dice  # noqa: E402
+
+
+def per_die_ns(stmt, n_dice, repeat=5):
+    """Best-of-`repeat` nanoseconds per die for `stmt` rolling `n_dice` dice."""
+    return min(timeit.repeat(stmt, number=1, repeat=repeat)) / n_dice * 1e9
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dice", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+    n = args.dice
+
+    stream = dice.RollStream(seed=1)
+    face, randint = stream.face, random.randint
+    rows = [
+        ("random.randint(1, 6)", lambda: [randint(1, 6) for _ in range(n)]),
+        ("RollStream.randint(1, 6)", lambda: [stream.randint(1, 6) for _ in range(n)]),
+        ("RollStream.face(6)", lambda: [face(6) for _ in range(n)]),
+        ("dice.roll(6, 4) x n/4", lambda: [dice.roll(6, 4) for _ in range(n // 4)]),
+        ("dice.roll_batch(6, 8, n/8)", lambda: dice.roll_batch(6, 8, n // 8, rng=stream)),
+    ]
+    results = [(name, per_die_ns(fn, n)) for name, fn in rows]
+    base = results[0][1]
+    print(f"{'Source':<30}{'ns/die':>10}{'speedup':>10}")
+    for name, ns in results:
+        print(f"{name:<30}{ns:>10.1f}{base / ns:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Cold start to first frame of the Tk character sheet (main2.py).
+
+Each run starts a fresh interpreter that runs the app through PROBE: it
+hooks tkinter.Tk so that, once the app's window is mapped and drawn, it
+prints FIRST_FRAME and closes the app the way its close button would. The
+app itself knows nothing about the benchmark. The time from launching the
+process to that line is one sample, so it includes interpreter start-up and
+imports.
+
+The median is compared with the recorded baseline in startup_baseline.json
+(next to this file). The run fails (exit status 1) if it is more than
+--tolerance slower. Use --record to store a new baseline after an intended
+change or on a new machine. Baselines are per machine, so record one before
+comparing.
+
+Needs a display (on a headless box, run it under xvfb-run).
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 7] [--tolerance 0.25] [--record]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+BASELINE_FILE = os.path.join(HERE, "startup_baseline.json")
+TIMEOUT_S = 30
+
+# Runs `app` (argv[1]) as __main__ with every Tk root reporting its first frame.
+PROBE = """
+import runpy, sys, tkinter
+sys.path.insert(0, ".")
+from lazy_ui import after_first_paint
+
+def first_frame(root):
+    print("FIRST_FRAME", flush=True)
+    close = root.protocol("WM_DELETE_WINDOW")  # the app's own close handler, if any
+    root.after_idle(lambda: root.tk.call(close) if close else root.destroy())
+
+tk_init = tkinter.Tk.__init__
+
+def probed_init(self, *args, **kwargs):
+    tk_init(self, *args, **kwargs)
+    after_first_paint(self, lambda: first_frame(self))  # bound before the app's own hooks
+
+tkinter.Tk.__init__ = probed_init
+sys.argv = sys.argv[1:]
+runpy.run_path(sys.argv[0], run_name="__main__")
+"""
+
+
+def time_first_frame(app):
+    """Seconds from process launch to the app's FIRST_FRAME line."""
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", PROBE, app], cwd=ROOT,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    try:
+        for line in proc.stdout:
+            if line.strip() == "FIRST_FRAME":
+                elapsed = time.perf_counter() - start
+                proc.wait(timeout=TIMEOUT_S)
+                return elapsed
+        proc.wait(timeout=TIMEOUT_S)
+        raise RuntimeError(f"{app} exited without drawing a frame:\n{proc.stderr.read().strip()}")
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+
+
+def load_baselines():
+    try:
+        with open(BASELINE_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def record_baseline(key, median, runs):
+    baselines = load_baselines()
+    baselines[key] = {
+        "median_ms": round(median * 1000, 1),
+        "runs": runs,
+        "python": platform.python_version(),
+        "machine": platform.node(),
+        "recorded": time.strftime("%Y-%m-%d"),
+    }
+    with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+        json.dump(baselines, f, indent=4)
+        f.write("\n")
+    print(f"Baseline recorded in {BASELINE_FILE}")
+
+
+def check_baseline(key, median, tolerance):
+    """Compare with the recorded baseline; returns the exit status (1 = regression)."""
+    base = load_baselines().get(key)
+    if base is None:
+        print("No baseline yet; run with --record to store one.")
+        return 0
+    limit = base["median_ms"] * (1 + tolerance)
+    print(f"Baseline {base['median_ms']:.0f} ms (recorded {base['recorded']}), limit {limit:.0f} ms")
+    if median * 1000 > limit:
+        print("REGRESSION: startup is slower than the baseline allows.")
+        return 1
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--app", default="main2.py")
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline (0.25 = 25%%)")
+    parser.add_argument("--record", action="store_true", help="save this run as the new baseline")
+    args = parser.parse_args(argv)
+
+    try:
+        time_first_frame(args.app)  # warm the disk cache / bytecode; not counted
+        samples = [time_first_frame(args.app) for _ in range(args.runs)]
+    except RuntimeError as e:
+        print(e)
+        return 2
+    median = statistics.median(samples)
+    print(f"{args.app}: first frame in {median * 1000:.0f} ms median "
+          f"(min {min(samples) * 1000:.0f}, max {max(samples) * 1000:.0f}, {args.runs} runs)")
+
+    if args.record:
+        record_baseline(args.app, median, args.runs)
+        return 0
+    return check_baseline(args.app, median, args.tolerance)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+Transcript.add latency over a long session (capped widget vs an uncapped one).
+
+Adds --messages chat messages to a Transcript and prints the mean and p99 time
+per add for each block of --block messages, once with the default cap
+(max_messages=500) and once uncapped (every message stays in the widget, as
+the old display_message did). With the cap the numbers should stay flat
+after 10k+ messages.
+
+Real Tk widgets are used when a display is available; otherwise a line-list
+stand-in for the Text widget is used, which measures the Python-side work
+(tag pool, log append, trimming) but not Tk's own cost of a growing widget
+(so the uncapped column only shows its real slowdown with a display).
+
+Usage:
+    python benchmarks/bench_transcript.py [--messages 20000] [--block 1000]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transcript import Transcript  # noqa: E402
+
+
+class FakeText:
+    """List-of-lines stand-in with the Text calls Transcript makes."""
+
+    def __init__(self):
+        self.lines = [""]
+        self.options = {}
+
+    def tag_configure(self, tag, **options):
+        pass
+
+    def cget(self, option):
+        return self.options.get(option, "")
+
+    def configure(self, **options):
+        self.options.update(options)
+
+    def insert(self, index, *chars_and_tags):
+        assert index == "end"  # load_older (insert at "1.0") is not benchmarked
+        text = "".join(chars_and_tags[::2])
+        first, *rest = text.split("\n")
+        self.lines[-1] += first
+        self.lines.extend(rest)
+
+    def delete(self, first, last):
+        assert first == "1.0"
+        del self.lines[:int(last.split(".")[0]) - 1]
+
+    def see(self, index):
+        pass
+
+    def after_idle(self, fn):
+        pass
+
+
+def make_text():
+    """(factory for a fresh Text widget, kind) using Tk if possible."""
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+        root.withdraw()
+    except Exception:
+        return FakeText, "stand-in Text widget (no display)"
+
+    def factory():
+        text = tk.Text(root)
+        text.pack()
+        return text
+    return factory, "Tk Text widget"
+
+
+def run(text, messages, block, max_messages):
+    """Per-block (mean us, p99 us) of Transcript.add."""
+    transcript = Transcript(text, max_messages=max_messages)
+    body = "The innkeeper leans in and lowers their voice. " * 3
+    blocks, times = [], []
+    try:
+        for i in range(messages):
+            sender, msg_type = ("You", "user") if i % 2 == 0 else ("AI", "ai")
+            start = time.perf_counter()
+            transcript.add(sender, f"{i}: {body}", msg_type)
+            times.append(time.perf_counter() - start)
+            if len(times) == block:
+                times.sort()
+                blocks.append((statistics.fmean(times) * 1e6, times[int(len(times) * 0.99)] * 1e6))
+                times = []
+    finally:
+        transcript.close()
+    return blocks
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=20_000)
+    parser.add_argument("--block", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    factory, kind = make_text()
+    print(f"Using {kind}\n")
+    capped = run(factory(), args.messages, args.block, max_messages=500)
+    uncapped = run(factory(), args.messages, args.block, max_messages=args.messages)
+    print(f"{'messages':>10}{'capped mean':>14}{'p99':>10}{'uncapped mean':>16}{'p99':>10}")
+    for n, ((c_mean, c_p99), (u_mean, u_p99)) in enumerate(zip(capped, uncapped), start=1):
+        print(f"{n * args.block:>10}{c_mean:>12.1f}us{c_p99:>8.1f}us{u_mean:>14.1f}us{u_p99:>8.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Startup profile and budget for the Gradio worldbuilder (story_helper_gradio.py).
+
+Two numbers are checked:
+- import time of the module, from `python -X importtime`. It must stay under
+  --import-budget-ms (an absolute budget). Importing it should not pull in
+  gradio or google-genai; that now happens in build_app() / on the first
+  message.
+- time to first response: from launching `python story_helper_gradio.py` to
+  its web server answering GET /. This is compared with a per-machine
+  baseline in startup_baseline.json (see bench_startup.py; use --record),
+  and skipped if gradio is not installed.
+The exit status is 1 if either one regresses.
+
+--profile prints the -X importtime breakdown of the whole startup path
+(import + build_app) instead, heaviest top-level imports first, plus the time
+to first response.
+
+Usage:
+    python benchmarks/bench_worldbuilder_startup.py [--runs 3] [--record]
+    python benchmarks/bench_worldbuilder_startup.py --profile [--top 20]
+"""
+
+import argparse
+import importlib.util
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from bench_startup import ROOT, TIMEOUT_S, check_baseline, record_baseline
+
+MODULE = "story_helper_gradio"
+APP = MODULE + ".py"
+IMPORT_BUDGET_MS = 200
+
+
+def importtime(code):
+    """Run `code` under -X importtime; returns [(depth, self_us, cumulative_us, module)]."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                          capture_output=True, text=True, timeout=TIMEOUT_S)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2  # nested imports are indented by 2
+        rows.append((depth, int(self_us), int(cumulative_us), name.strip()))
+    return rows
+
+
+def module_import_ms(module):
+    """Cumulative import time of `module` itself, in ms."""
+    for depth, _, cumulative_us, name in importtime(f"import {module}"):
+        if depth == 0 and name == module:
+            return cumulative_us / 1000
+    raise RuntimeError(f"{module} not found in -X importtime output")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_to_first_response():
+    """Seconds from launching the app to its server answering GET /."""
+    port = free_port()
+    env = dict(os.environ, GRADIO_SERVER_PORT=str(port), GRADIO_ANALYTICS_ENABLED="False")
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, APP], cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    try:
+        while time.perf_counter() - start < TIMEOUT_S:
+            if proc.poll() is not None:
+                raise RuntimeError(f"{APP} exited early:\n{proc.stderr.read().strip()}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except (urllib.error.URLError, ConnectionError, socket.timeout):
+                time.sleep(0.05)
+        raise RuntimeError(f"{APP} did not answer within {TIMEOUT_S} s")
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def print_profile(top):
+    rows = importtime(f"import {MODULE}; {MODULE}.build_app()")
+    roots = sorted((r for r in rows if r[0] == 0), key=lambda r: r[2], reverse=True)
+    total = sum(r[2] for r in roots)
+    print(f"Imports during startup (import + build_app): {total / 1000:.0f} ms in {len(rows)} modules")
+    print(f"{'cumulative':>12}{'self':>10}  module")
+    for _, self_us, cumulative_us, name in roots[:top]:
+        print(f"{cumulative_us / 1000:>10.1f}ms{self_us / 1000:>8.1f}ms  {name}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline (0.25 = 25%%)")
+    parser.add_argument("--import-budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--record", action="store_true", help="save the first-response time as the new baseline")
+    parser.add_argument("--profile", action="store_true", help="print the -X importtime breakdown")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args(argv)
+    has_gradio = importlib.util.find_spec("gradio") is not None
+
+    if args.profile:
+        if not has_gradio:
+            print("gradio is not installed; nothing to profile beyond the import.")
+            print(f"import {MODULE}: {module_import_ms(MODULE):.1f} ms")
+            return 0
+        print_profile(args.top)
+        print(f"Time to first response: {time_to_first_response() * 1000:.0f} ms")
+        return 0
+
+    status = 0
+    import_ms = statistics.median(module_import_ms(MODULE) for _ in range(args.runs))
+    print(f"import {MODULE}: {import_ms:.1f} ms (budget {args.import_budget_ms:.0f} ms)")
+    if import_ms > args.import_budget_ms:
+        print("REGRESSION: the import is over budget (is something heavy imported at module level?)")
+        status = 1
+
+    if not has_gradio:
+        print("gradio is not installed; skipping time to first response.")
+        return status
+    time_to_first_response()  # warm-up, not counted
+    samples = [time_to_first_response() for _ in range(args.runs)]
+    median = statistics.median(samples)
+    print(f"Time to first response: {median * 1000:.0f} ms median (min {min(samples) * 1000:.0f}, {args.runs} runs)")
+    key = APP + " first response"
+    if args.record:
+        record_baseline(key, median, args.runs)
+        return status
+    return max(status, check_baseline(key, median, args.tolerance))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""
+Load generator for dice_server.py.
+
+Opens --clients connections. Each one keeps up to --window requests in
+flight (pipelined JSON lines) until --requests have been answered in total.
+The requests are a mix of checks, attacks, damage and free-form rolls against
+one character. Prints the throughput and latency percentiles.
+
+By default it starts its own server (python dice_server.py, one process, so
+one core) on a free port with character.json preloaded. Use --connect
+HOST:PORT or --unix PATH to load an already running server instead.
+
+Usage:
+    python benchmarks/dice_load.py [--clients 32] [--window 64] [--requests 200000]
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+from serialization import dumps, load_file, loads  # noqa: E402
+
+
+def request_mix(character):
+    """A repeating list of encoded requests (without ids) for `character`."""
+    name = character["name"]
+    ability = next(iter(character["stats"]))
+    skill = next(iter(character.get("skills", {})), None)
+    weapon = next(iter(character.get("weapons", {})), None)
+    mix = [
+        {"op": "ability_check", "character": name, "ability": ability},
+        {"op": "ability_check", "character": name, "ability": ability, "mode": "advantage"},
+        {"op": "roll", "expr": "4d6kh3"},
+        {"op": "roll", "expr": "1d20+5"},
+    ]
+    if skill:
+        mix.append({"op": "skill_check", "character": name, "skill": skill})
+    if weapon:
+        mix.append({"op": "roll_to_hit", "character": name, "weapon": weapon, "ac": 15})
+        mix.append({"op": "roll_damage", "character": name, "weapon": weapon})
+    return mix
+
+
+async def client(reader, writer, mix, quota, window, latencies, errors):
+    """Pipeline `quota` requests, at most `window` unanswered at a time."""
+    sent_at = {}
+    sent = received = 0
+
+    async def send_some():
+        nonlocal sent
+        lines = []
+        while sent < quota and sent - received < window:
+            req = dict(mix[sent % len(mix)], id=sent)
+            lines.append(dumps(req, compact=True))
+            sent_at[sent] = time.perf_counter()
+            sent += 1
+        if lines:
+            writer.write(("\n".join(lines) + "\n").encode("utf-8"))
+            await writer.drain()
+
+    await send_some()
+    while received < quota:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("server closed the connection")
+        reply = loads(line)
+        latencies.append(time.perf_counter() - sent_at.pop(reply["id"]))
+        if not reply["ok"]:
+            errors.append(reply["error"])
+        received += 1
+        if sent - received <= window // 2:  # refill in batches, not one line at a time
+            await send_some()
+    writer.close()
+
+
+async def run_load(open_connection, mix, clients, window, total):
+    latencies, errors = [], []
+    quotas = [total // clients + (i < total % clients) for i in range(clients)]
+    streams = [await open_connection() for _ in range(clients)]
+    start = time.perf_counter()
+    await asyncio.gather(*(client(r, w, mix, q, window, latencies, errors)
+                           for (r, w), q in zip(streams, quotas)))
+    return time.perf_counter() - start, latencies, errors
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, character_file):
+    proc = subprocess.Popen([sys.executable, "dice_server.py", "--port", str(port), "--roster", "",
+                             "--character", character_file],
+                            cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    proc.stdout.readline()  # "Dice service listening on ..."
+    return proc
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--window", type=int, default=64, help="requests in flight per client")
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--character", default=os.path.join(ROOT, "character.json"))
+    parser.add_argument("--connect", help="HOST:PORT of a running server")
+    parser.add_argument("--unix", help="Unix socket of a running server")
+    args = parser.parse_args(argv)
+
+    mix = request_mix(load_file(args.character))
+    proc = None
+    if args.unix:
+        open_connection = lambda: asyncio.open_unix_connection(args.unix)  # noqa: E731
+    else:
+        if args.connect:
+            host, port = args.connect.rsplit(":", 1)
+        else:
+            host, port = "127.0.0.1", free_port()
+            proc = start_server(port, args.character)
+        open_connection = lambda: asyncio.open_connection(host, int(port))  # noqa: E731
+
+    try:
+        elapsed, latencies, errors = asyncio.run(
+            run_load(open_connection, mix, args.clients, args.window, args.requests))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000  # noqa: E731
+    print(f"{len(latencies)} requests from {args.clients} clients (window {args.window}) in {elapsed:.2f} s")
+    print(f"throughput: {len(latencies) / elapsed:,.0f} requests/s")
+    print(f"latency: p50 {pct(0.50):.2f} ms, p99 {pct(0.99):.2f} ms, "
+          f"mean {statistics.fmean(latencies) * 1000:.2f} ms")
+    if errors:
+        print(f"{len(errors)} error replies, e.g. {errors[0]}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,531 @@
+"""
+SQLite-backed world catalog shared by the worldbuilder apps.
+
+A catalog maps entry names to {"entry": text, "category": name}, the shape of
+world_catalog.json. `CatalogStore` keeps one row per entry: the name is
+unique (indexed) and a second index covers (category, name). So get / upsert
+/ append touch one row however big the catalog is, and category listings are
+served from the index.
+
+JSON stays the interchange format. `open_catalog("world.json")` works on a
+SQLite copy next to it ("world.db"), which is the source of truth while it is
+open: the copy is (re)imported whenever the JSON file changed since the last
+import, and writes commit to SQLite only. The JSON file is brought up to date
+(a dump of the table, no parsing) EXPORT_DELAY seconds after the last write, on
+flush() and on close(), so a burst of saves costs one export and a single save
+stays a one-row update however big the catalog is. Rows written but not yet
+exported are marked `pending`: if the JSON changed underneath them (edited
+outside the app, or the process died before exporting), the re-import merges
+them back in instead of dropping them. A .db path is opened as is.
+
+Search: entries_fts is an FTS5 index over names and entry text, kept up to
+date by triggers on every insert/update/delete (so each save re-indexes only
+the entry it wrote). search() ranks matches with BM25, names weighted above
+text, and returns a highlighted snippet. Without FTS5 in the SQLite build,
+search() falls back to an unranked LIKE scan.
+
+One store may be used from several threads (UI + model worker, gradio
+handlers); calls are serialized with a lock.
+
+The apps get stores from get_catalog(), a process-wide cache keyed by real
+path: one open store per catalog, so switching between worlds doesn't reopen
+or re-import anything. Each hit checks the JSON file's (mtime, size, inode)
+with one stat() and re-imports it if it was replaced or edited. Writes go
+through the cached store (and reach the JSON file shortly after), so readers
+in this process and outside it see them. The least recently used stores are closed beyond
+CACHE_MAX_CATALOGS; each holds at most SQLITE_CACHE_BYTES of page cache, so
+that count also bounds the cache's memory. close_catalogs() closes them all on
+exit.
+
+Usage:
+    python catalog_store.py list world_catalog.json [--category Magic]
+    python catalog_store.py search world_catalog.json "storm gian"
+    python catalog_store.py import world_catalog.json world.db
+    python catalog_store.py export world.db world_catalog.json
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from serialization import load_file, save_file, validate_catalog
+
+DEFAULT_CATEGORY = "Uncategorized"
+EXPORT_DELAY = 2.0  # seconds after the last write before the JSON file is rewritten
+
+CACHE_MAX_CATALOGS = 8  # open stores kept by get_catalog()
+SQLITE_CACHE_BYTES = 2 << 20  # page cache limit per connection (SQLite's default size)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id       INTEGER PRIMARY KEY,  -- insertion order, like the keys of the JSON object
+    name     TEXT NOT NULL UNIQUE,
+    category TEXT NOT NULL,
+    entry    TEXT NOT NULL,
+    pending  INTEGER NOT NULL DEFAULT 0  -- written here, not yet exported to the JSON file
+);
+CREATE INDEX IF NOT EXISTS idx_entries_category ON entries (category, name);
+-- source_mtime / source_size / source_ino of the imported JSON file, dirty flag (unexported edits)
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value
+);
+"""
+
+# External-content index: the text lives in `entries` only; rowid = entries.id.
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE entries_fts USING fts5 (
+    name, entry, content='entries', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER entries_fts_insert AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_fts (rowid, name, entry) VALUES (new.id, new.name, new.entry);
+END;
+CREATE TRIGGER entries_fts_delete AFTER DELETE ON entries BEGIN
+    INSERT INTO entries_fts (entries_fts, rowid, name, entry) VALUES ('delete', old.id, old.name, old.entry);
+END;
+CREATE TRIGGER entries_fts_update AFTER UPDATE OF name, entry ON entries BEGIN
+    INSERT INTO entries_fts (entries_fts, rowid, name, entry) VALUES ('delete', old.id, old.name, old.entry);
+    INSERT INTO entries_fts (rowid, name, entry) VALUES (new.id, new.name, new.entry);
+END;
+"""
+
+NAME_WEIGHT = 10.0  # BM25 weight of a name match relative to an entry-text match
+SNIPPET_TOKENS = 12  # words around the match in search() snippets
+
+
+def _fts_query(text):
+    """User search text -> FTS5 query: every word must match, as a prefix (search as you type)."""
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", text))
+
+
+def _entry_dict(entry, category):
+    return {"entry": entry, "category": category}
+
+
+class CatalogStore:
+    """A world catalog in SQLite. Entries are returned as {"entry", "category"} dicts."""
+
+    def __init__(self, path, source_json=None):
+        self.path = path
+        self.source_json = source_json  # exported to, debounced (see open_catalog)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        if "pending" not in {row[1] for row in self.conn.execute("PRAGMA table_info(entries)")}:
+            self.conn.execute("ALTER TABLE entries ADD COLUMN pending INTEGER NOT NULL DEFAULT 0")
+            self.conn.commit()
+        self._lock = threading.RLock()
+        self._depth = 0  # nesting level of transaction()
+        self._export_due = False  # the open transaction wrote something to export
+        self._export_timer = None  # pending debounced export (threading.Timer)
+        self._closed = False
+        self.version = 0  # bumped by every write here; keys the memoized summaries()
+        self._summaries = (None, None)
+        self.conn.execute(f"PRAGMA cache_size = -{SQLITE_CACHE_BYTES >> 10}")
+        self.fts = self._create_index()
+
+    def _create_index(self):
+        """Create entries_fts (indexing existing rows) unless it exists. False without FTS5."""
+        if self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'entries_fts'").fetchone():
+            return True
+        try:
+            with self._lock:
+                self.conn.executescript(
+                    "BEGIN;" + FTS_SCHEMA + "INSERT INTO entries_fts (entries_fts) VALUES ('rebuild'); COMMIT;")
+        except sqlite3.OperationalError:  # "no such module: fts5"
+            if self.conn.in_transaction:
+                self.conn.rollback()
+            return False
+        return True
+
+    def close(self):
+        """Export edits not in the JSON file yet (if any), then close the database."""
+        with self._lock:
+            if self._closed:
+                return
+            try:
+                self.flush()
+            finally:
+                self._closed = True
+                self.conn.close()
+
+    def flush(self):
+        """Export edits to the source JSON file now instead of after EXPORT_DELAY (errors propagate)."""
+        with self._lock:
+            self._cancel_export()
+            if self.source_json and self._meta("dirty"):
+                self._export()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Group several writes into one commit (rolled back if anything fails). Nests.
+        The outermost commit schedules an export to the source JSON file.
+        """
+        with self._lock:
+            self._depth += 1
+            try:
+                yield self
+            except BaseException:
+                if self._depth == 1:
+                    self.conn.rollback()
+                    self._export_due = False
+                raise
+            finally:
+                self._depth -= 1
+            if self._depth == 0:
+                self.conn.commit()
+                if self._export_due:
+                    self._export_due = False
+                    self._schedule_export()
+
+    def _schedule_export(self):
+        # Restart the timer on every write; export once writes pause.
+        self._cancel_export()
+        self._export_timer = threading.Timer(EXPORT_DELAY, self._export_later)
+        self._export_timer.daemon = True
+        self._export_timer.start()
+
+    def _cancel_export(self):
+        if self._export_timer is not None:
+            self._export_timer.cancel()
+            self._export_timer = None
+
+    def _export_later(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._export_timer = None
+            try:
+                self.flush()
+            except Exception as e:  # rows stay pending; the next write or close() retries
+                print(f"Could not export the catalog to {self.source_json}: {e}")
+
+    def _export(self):
+        """Export to the source JSON file and clear the pending marks."""
+        self.export_json(self.source_json)
+        self._mark_imported(self.source_json)
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def _meta(self, key):
+        rows = self._query("SELECT value FROM meta WHERE key = ?", (key,))
+        return rows[0][0] if rows else None
+
+    def _set_meta(self, key, value):
+        self.conn.execute("INSERT INTO meta (key, value) VALUES (?, ?)"
+                          " ON CONFLICT(key) DO UPDATE SET value = excluded.value", (key, value))
+
+    def _changed(self, export=True):
+        self.version += 1
+        if export:
+            self._set_meta("dirty", 1)
+            self._export_due = self.source_json is not None
+
+    # ---------- Single entries ----------
+    def get(self, name):
+        """{"entry", "category"} for `name`; raises KeyError if missing."""
+        rows = self._query("SELECT entry, category FROM entries WHERE name = ?", (name,))
+        if not rows:
+            raise KeyError(name)
+        return _entry_dict(*rows[0])
+
+    def upsert(self, name, entry, category=None):
+        """Create or replace an entry (an existing one keeps its category if none is given)."""
+        with self.transaction():
+            self.conn.execute(
+                "INSERT INTO entries (name, category, entry, pending) VALUES (?, ?, ?, 1)"
+                " ON CONFLICT(name) DO UPDATE SET entry = excluded.entry,"
+                " category = COALESCE(?, category), pending = 1",
+                (name, category or DEFAULT_CATEGORY, entry, category),
+            )
+            self._changed()
+
+    def append(self, name, text, category=None):
+        """Add `text` to an entry on a new line (creating it if needed); `category` replaces the old one."""
+        with self.transaction():
+            self.conn.execute(
+                "INSERT INTO entries (name, category, entry, pending) VALUES (?, ?, ?, 1)"
+                " ON CONFLICT(name) DO UPDATE SET entry = entry || char(10) || excluded.entry,"
+                " category = COALESCE(?, category), pending = 1",
+                (name, category or DEFAULT_CATEGORY, text, category),
+            )
+            self._changed()
+
+    def delete(self, name):
+        with self.transaction():
+            cur = self.conn.execute("DELETE FROM entries WHERE name = ?", (name,))
+            if cur.rowcount == 0:
+                raise KeyError(name)
+            self._changed()
+
+    def __contains__(self, name):
+        return bool(self._query("SELECT 1 FROM entries WHERE name = ?", (name,)))
+
+    def __len__(self):
+        return self._query("SELECT COUNT(*) FROM entries")[0][0]
+
+    # ---------- Listings ----------
+    def names(self):
+        """Entry names in insertion order."""
+        return [row[0] for row in self._query("SELECT name FROM entries ORDER BY id")]
+
+    def summaries(self):
+        """[(name, category), ...] in insertion order (no entry text is read). Memoized until the next write."""
+        with self._lock:
+            # data_version changes when another connection (e.g. the other app) commits
+            version = (self.version, self._query("PRAGMA data_version")[0][0])
+            if self._summaries[0] != version:
+                self._summaries = (version, self._query("SELECT name, category FROM entries ORDER BY id"))
+            return list(self._summaries[1])
+
+    def list_by_category(self, category):
+        """Names in `category`, sorted (served from the category index)."""
+        return [row[0] for row in self._query(
+            "SELECT name FROM entries WHERE category = ? ORDER BY name", (category,))]
+
+    def items(self):
+        """(name, {"entry", "category"}) pairs in insertion order."""
+        for name, entry, category in self._query("SELECT name, entry, category FROM entries ORDER BY id"):
+            yield name, _entry_dict(entry, category)
+
+    def __iter__(self):
+        return iter(self.names())
+
+    def to_dict(self):
+        """The whole catalog in the world_catalog.json shape."""
+        return dict(self.items())
+
+    # ---------- Search ----------
+    def search(self, text, category=None, limit=100, mark=("**", "**")):
+        """
+        Entries matching every word of `text` (as prefixes) in their name or text,
+        best first: [(name, category, snippet), ...]. The snippet is a piece of the
+        entry text with the matched words wrapped in `mark`.
+        """
+        query = _fts_query(text)
+        if not query:
+            return []
+        if not self.fts:
+            return self._search_like(text, category, limit)
+        where = "entries_fts MATCH ?" + (" AND e.category = ?" if category else "")
+        params = [*mark, query] + ([category] if category else []) + [limit]
+        return self._query(
+            f"SELECT e.name, e.category, snippet(entries_fts, 1, ?, ?, '…', {SNIPPET_TOKENS})"
+            " FROM entries_fts JOIN entries AS e ON e.id = entries_fts.rowid"
+            f" WHERE {where} ORDER BY bm25(entries_fts, {NAME_WEIGHT}, 1.0) LIMIT ?",
+            params,
+        )
+
+    def _search_like(self, text, category, limit):
+        """search() without FTS5: every word somewhere in the name or text, in catalog order."""
+        words = re.findall(r"\w+", text)
+        where = " AND ".join("(name LIKE ? OR entry LIKE ?)" for _ in words)
+        params = [f"%{w}%" for w in words for _ in range(2)]
+        if category:
+            where += " AND category = ?"
+            params.append(category)
+        rows = self._query(f"SELECT name, category, substr(entry, 1, 80) FROM entries WHERE {where}"
+                           " ORDER BY id LIMIT ?", params + [limit])
+        return [(name, cat, snippet + "…") for name, cat, snippet in rows]
+
+    # ---------- Function-call results ----------
+    def save_entries(self, entries):
+        """
+        Save model-generated entries ([{"name", "entry", "category"}, ...]) in one
+        transaction: new names are created, existing ones get the text appended.
+        Returns the saved names.
+        """
+        if not isinstance(entries, list) or not entries:
+            raise ValueError("entries must be a non-empty list")
+        saved = []
+        with self.transaction():
+            for e in entries:
+                name, text = e.get("name"), e.get("entry")
+                if not name or not text:
+                    raise ValueError(f"Each entry must include 'name' and 'entry'. Problematic entry: {e}")
+                self.append(name, text, e.get("category", DEFAULT_CATEGORY))
+                saved.append(name)
+        return saved
+
+    # ---------- JSON import / export ----------
+    def import_json(self, filename):
+        """Replace the contents with a world_catalog.json file (written through unless it is the source)."""
+        catalog = load_file(filename, validate=validate_catalog)
+        with self.transaction():
+            self.conn.execute("DELETE FROM entries")
+            self.conn.executemany(
+                "INSERT INTO entries (name, category, entry) VALUES (?, ?, ?)",
+                ((name, data.get("category", DEFAULT_CATEGORY), data["entry"]) for name, data in catalog.items()),
+            )
+            self._changed(export=filename != self.source_json)
+        return len(catalog)
+
+    def export_json(self, filename):
+        save_file(filename, self.to_dict())  # atomic
+
+    def _mark_imported(self, filename):
+        """Remember which version of `filename` this database matches (nothing is pending any more)."""
+        st = os.stat(filename)
+        with self.transaction():
+            self.conn.execute("UPDATE entries SET pending = 0 WHERE pending")
+            self._set_meta("source_mtime", st.st_mtime_ns)
+            self._set_meta("source_size", st.st_size)
+            self._set_meta("source_ino", st.st_ino)
+            self._set_meta("dirty", 0)
+
+    def sync_from(self, filename):
+        """
+        Import `filename` if it changed since it was last imported / exported. True if it did.
+        Entries edited here but not exported yet are kept over the file's version (and
+        the merged catalog is written back), so an outside edit never drops them.
+        """
+        try:
+            st = os.stat(filename)
+        except FileNotFoundError:
+            return False
+        with self._lock:
+            ino = self._meta("source_ino")
+            if (self._meta("source_mtime"), self._meta("source_size")) == (st.st_mtime_ns, st.st_size) \
+                    and ino in (None, st.st_ino):  # None: recorded before inodes were
+                return False
+            kept = self._query("SELECT name, entry, category FROM entries WHERE pending") \
+                if self._meta("dirty") else []
+            with self.transaction():
+                self.import_json(filename)
+                for name, entry, category in kept:
+                    self.upsert(name, entry, category)  # pending again: exported after the commit
+                if not kept:
+                    self._mark_imported(filename)
+        return True
+
+
+def database_path(path):
+    """The SQLite file used for catalog `path` ("world.json" -> "world.db")."""
+    root, ext = os.path.splitext(path)
+    return path if ext.lower() == ".db" else root + ".db"
+
+
+def open_catalog(path):
+    """A CatalogStore for a .db file, or for a .json catalog (through its SQLite copy, see above)."""
+    db = database_path(path)
+    if db == path:
+        return CatalogStore(db)
+    store = CatalogStore(db, source_json=path)
+    store.sync_from(path)
+    return store
+
+
+def _signature(path):
+    """(mtime, size, inode) of `path`, or None if it doesn't exist."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+class CatalogCache:
+    """Open stores by real path, least recently used first (see get_catalog)."""
+
+    def __init__(self, max_catalogs=CACHE_MAX_CATALOGS):
+        self.max_catalogs = max_catalogs
+        self._stores = OrderedDict()  # real path -> [store, signature of the JSON file]
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        key = os.path.realpath(path)
+        with self._lock:
+            cached = self._stores.get(key)
+            if cached is None:
+                os.makedirs(os.path.dirname(key), exist_ok=True)
+                cached = self._stores[key] = [open_catalog(key), _signature(key)]
+                self._evict()
+            else:
+                self._stores.move_to_end(key)
+        store = cached[0]
+        if store.source_json:
+            signature = _signature(key)
+            if signature != cached[1]:  # replaced or edited outside the app
+                store.sync_from(key)
+                cached[1] = signature
+        return store
+
+    def _evict(self):
+        """Close least recently used stores beyond max_catalogs (the newest one stays)."""
+        while len(self._stores) > max(1, self.max_catalogs):
+            store, _ = self._stores.popitem(last=False)[1]
+            store.close()
+
+    def close_all(self):
+        with self._lock:
+            while self._stores:
+                self._stores.popitem()[1][0].close()
+
+
+_cache = CatalogCache()
+
+
+def get_catalog(path):
+    """The process-wide store for catalog `path`: opened on first use, re-synced if the JSON file changed."""
+    return _cache.get(path)
+
+
+def close_catalogs():
+    """Close every store from get_catalog() (exporting edits back to JSON)."""
+    _cache.close_all()
+
+
+# ---------- Command line ----------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect and convert world catalogs")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("list", help="list entries (name and category)")
+    p.add_argument("catalog", help=".json or .db catalog")
+    p.add_argument("--category")
+    p = sub.add_parser("search", help="full-text search, best matches first")
+    p.add_argument("catalog", help=".json or .db catalog")
+    p.add_argument("text")
+    p.add_argument("--category")
+    p.add_argument("--limit", type=int, default=20)
+    p = sub.add_parser("import", help="load a JSON catalog into a database (replacing its contents)")
+    p.add_argument("json")
+    p.add_argument("db")
+    p = sub.add_parser("export", help="write a database out as a JSON catalog")
+    p.add_argument("db")
+    p.add_argument("json")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        with open_catalog(args.catalog) as store:
+            if args.category:
+                for name in store.list_by_category(args.category):
+                    print(name)
+            else:
+                for name, category in store.summaries():
+                    print(f"{name:<40} {category}")
+    elif args.command == "search":
+        with open_catalog(args.catalog) as store:
+            for name, category, snippet in store.search(args.text, args.category, args.limit):
+                print(f"{name} ({category})\n    {snippet}")
+    elif args.command == "import":
+        with CatalogStore(args.db) as store:
+            print(f"Imported {store.import_json(args.json)} entries")
+    elif args.command == "export":
+        with CatalogStore(args.db) as store:
+            store.export_json(args.json)
+
+
+if __name__ == "__main__":
+    main()
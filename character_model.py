@@ -0,0 +1,136 @@
+"""
+Character model with cached derived stats.
+
+`Character` wraps the plain character dict (the character.json shape) and
+memoizes what the UI asks for on every click: ability modifiers, skill totals,
+initiative and weapon attack bonuses. The setters change the underlying dict
+and drop only the cached values that depend on what changed, e.g. raising DEX
+recomputes the DEX modifier, initiative and DEX skills but nothing else.
+
+The wrapped dict is never copied or reshaped, so `to_dict()` gives back exactly
+what was loaded (unknown keys included) and saving stays lossless.
+"""
+
+from dice import roll
+
+
+class Character:
+    """Cached view over a character dict. Use the setters to keep caches honest."""
+
+    __slots__ = ("data", "_mods", "_skills", "_initiative", "_attacks")
+
+    def __init__(self, data):
+        self.data = data
+        self.invalidate()
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data)
+
+    def to_dict(self):
+        """The wrapped dict itself (same object, unchanged shape)."""
+        return self.data
+
+    def invalidate(self):
+        """Forget every cached value (call after editing `data` directly)."""
+        self._mods = {}
+        self._skills = {}
+        self._initiative = None
+        self._attacks = {}
+
+    # ---------- Derived values (memoized) ----------
+    def mod(self, ability):
+        """Ability modifier, e.g. STR 15 -> +2."""
+        try:
+            return self._mods[ability]
+        except KeyError:
+            value = (self.data["stats"][ability] - 10) // 2
+            self._mods[ability] = value
+            return value
+
+    @property
+    def mods(self):
+        """All ability modifiers (same result as rules.calc_mods)."""
+        return {ab: self.mod(ab) for ab in self.data["stats"]}
+
+    def skill_modifier(self, skill_name):
+        """Total skill modifier (ability mod + proficiency)."""
+        try:
+            return self._skills[skill_name]
+        except KeyError:
+            skill = self.data["skills"][skill_name]
+            value = self.mod(skill["ability"]) + skill.get("prof", 0)
+            self._skills[skill_name] = value
+            return value
+
+    @property
+    def initiative(self):
+        """Initiative bonus (the DEX modifier)."""
+        if self._initiative is None:
+            self._initiative = self.mod("DEX")
+        return self._initiative
+
+    def attack_bonus(self, weapon_name):
+        """To-hit bonus for one of the character's weapons."""
+        try:
+            return self._attacks[weapon_name]
+        except KeyError:
+            value = self.data["weapons"][weapon_name].get("hit_mod", 0)
+            self._attacks[weapon_name] = value
+            return value
+
+    # ---------- Rolls using the cached values ----------
+    def ability_check(self, ability):
+        return roll(20) + self.mod(ability)
+
+    def skill_check(self, skill_name):
+        return roll(20) + self.skill_modifier(skill_name)
+
+    def roll_initiative(self):
+        return roll(20) + self.initiative
+
+    # ---------- Setters (invalidate only what depends on the change) ----------
+    def set_stat(self, ability, value):
+        self.data["stats"][ability] = value
+        self._mods.pop(ability, None)
+        for name, skill in self.data.get("skills", {}).items():
+            if skill["ability"] == ability:
+                self._skills.pop(name, None)
+        if ability == "DEX":
+            self._initiative = None
+
+    def set_skill(self, skill_name, ability=None, prof=None):
+        """Add or change a skill; only that skill's total is recomputed."""
+        skills = self.data.setdefault("skills", {})
+        if skill_name not in skills:
+            if ability is None:
+                raise ValueError(f"New skill {skill_name!r} needs an ability")
+            skills[skill_name] = {"ability": ability, "prof": 0}
+        skill = skills[skill_name]
+        if ability is not None:
+            skill["ability"] = ability
+        if prof is not None:
+            skill["prof"] = prof
+        self._skills.pop(skill_name, None)
+
+    def set_proficiency(self, value):
+        # Skill totals use each skill's own "prof" value, so nothing cached
+        # depends on the character-wide proficiency bonus.
+        self.data["proficiency"] = value
+
+    def set_weapon(self, weapon_name, weapon):
+        self.data.setdefault("weapons", {})[weapon_name] = weapon
+        self._attacks.pop(weapon_name, None)
+
+    def remove_weapon(self, weapon_name):
+        del self.data["weapons"][weapon_name]
+        self._attacks.pop(weapon_name, None)
+
+    def replace(self, data):
+        """Swap in freshly loaded data in place (keeps references to `self.data` valid)."""
+        self.data.clear()
+        self.data.update(data)
+        self.invalidate()
+
+    def __repr__(self):
+        return f"Character({self.data.get('name', '?')!r})"
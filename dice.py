@@ -0,0 +1,220 @@
+"""
+Dice engine shared by the D&D helper apps.
+
+- `roll` / `roll_with_mod`: the everyday one-off rolls used by the UI buttons.
+- `roll_batch`: roll many trials of NdS at once (fireball tables, stat sweeps).
+- `RollStream`: the random source behind every roll. It hands out die faces
+  from pre-generated blocks, can be seeded to replay a session, and spawns
+  independent child streams for threads or worker processes.
+
+NumPy is optional. When it is installed, big rolls run as array operations
+instead of one `random.randint` call per die; otherwise we fall back to plain
+Python so the apps keep working.
+"""
+
+import random
+
+# Optional NumPy; if not installed we gracefully fall back to the random module.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Dice counts at or above this go through the vectorized path in `roll()`.
+BATCH_THRESHOLD = 64
+
+# Largest number of dice materialized at once when only totals are needed.
+# Keeps memory flat for huge workloads (e.g. 1e8 dice) without slowing small ones.
+BATCH_CHUNK_DICE = 1 << 22
+
+# Faces generated per refill of a RollStream buffer (one buffer per die size).
+BLOCK_SIZE = 4096
+
+# Die sizes with a live buffer per RollStream; the least recently refilled is dropped.
+MAX_BUFFERS = 16
+
+
+class RollStream:
+    """
+    Seedable, block-buffered source of die faces.
+
+    Faces for each die size are generated BLOCK_SIZE at a time and handed out
+    one by one, so a single die costs a list pop instead of a `random.randint`
+    call. Only the MAX_BUFFERS most recently refilled sizes keep a buffer. A
+    stream is not meant to be shared between threads: give each thread or
+    process its own child from `spawn()`.
+    """
+
+    __slots__ = ("seed", "generator", "_seq", "_spawned", "_buffers")
+
+    def __init__(self, seed=None, _seq=None):
+        if seed is None and _seq is None:
+            # Pick a seed we can report, so any session can be replayed later.
+            seed = random.SystemRandom().getrandbits(64)
+        self.seed = seed
+        self._spawned = 0
+        self._buffers = {}
+        if np is not None:
+            self._seq = _seq if _seq is not None else np.random.SeedSequence(seed)
+            self.generator = np.random.default_rng(self._seq)
+        else:
+            self._seq = None
+            self.generator = random.Random(seed)
+
+    def _refill(self, sides):
+        # Re-inserting keeps the dict ordered by refill, so the first key is the stalest
+        self._buffers.pop(sides, None)
+        if len(self._buffers) >= MAX_BUFFERS:
+            del self._buffers[next(iter(self._buffers))]
+        if np is not None:
+            block = self.generator.integers(1, sides + 1, size=BLOCK_SIZE).tolist()
+        else:
+            block = self.generator.choices(range(1, sides + 1), k=BLOCK_SIZE)
+        self._buffers[sides] = block
+        return block
+
+    def face(self, sides):
+        """One roll of a d`sides`."""
+        try:
+            return self._buffers[sides].pop()
+        except (KeyError, IndexError):
+            if sides < 1:
+                raise ValueError(f"A die needs at least 1 side (got d{sides})")
+            return self._refill(sides).pop()
+
+    def faces(self, sides, n):
+        """`n` rolls of a d`sides` at once, sliced off the buffer (for batched requests)."""
+        if sides < 1:
+            raise ValueError(f"A die needs at least 1 side (got d{sides})")
+        out = []
+        while len(out) < n:
+            block = self._buffers.get(sides) or self._refill(sides)
+            take = min(n - len(out), len(block))
+            out += block[-take:]
+            del block[-take:]
+        return out
+
+    def randint(self, a, b):
+        """Drop-in for random.randint(a, b) drawing from this stream."""
+        return a + self.face(b - a + 1) - 1
+
+    def spawn(self, n=1):
+        """Return `n` independent child streams (e.g. one per thread or worker)."""
+        if self._seq is not None:
+            return [RollStream(self.seed, _seq=child) for child in self._seq.spawn(n)]
+        children = []
+        for _ in range(n):
+            self._spawned += 1
+            children.append(RollStream(f"{self.seed}/{self._spawned}"))
+        return children
+
+    def __repr__(self):
+        return f"RollStream(seed={self.seed!r})"
+
+
+_stream = RollStream()
+
+
+def get_stream():
+    """The stream used by `roll()` and friends."""
+    return _stream
+
+
+def set_stream(stream):
+    """Make `stream` the default source for every roll."""
+    global _stream
+    _stream = stream
+    return stream
+
+
+def set_seed(seed):
+    """Start a fresh default stream from `seed` (replays a session exactly)."""
+    return set_stream(RollStream(seed))
+
+
+def randint(a, b):
+    """random.randint(a, b) from the default stream."""
+    return _stream.randint(a, b)
+
+
+def _check_dice(d_sides, count, trials=1):
+    """Raise ValueError for impossible dice (keeps error handling in one place)."""
+    if d_sides < 1:
+        raise ValueError(f"A die needs at least 1 side (got d{d_sides})")
+    if count < 0 or trials < 0:
+        raise ValueError("Dice count and trials must not be negative")
+
+
+def _face_dtype(d_sides):
+    """Smallest unsigned dtype that holds a face; narrower ints generate faster."""
+    if d_sides <= 0xFF:
+        return np.uint8
+    if d_sides <= 0xFFFF:
+        return np.uint16
+    return np.int64
+
+
+def roll_batch(d_sides, count=1, trials=1, faces=False, rng=None):
+    """
+    Roll `trials` independent sets of `count`d`d_sides`.
+
+    Returns the per-trial totals; with faces=True returns (totals, faces) where
+    faces holds every die, one row per trial. With NumPy these are arrays
+    (shape (trials,) and (trials, count)); without it they are plain lists.
+
+    `rng` is an optional source to draw from (a RollStream, a numpy Generator,
+    or a random.Random without NumPy); the default stream is used otherwise.
+    """
+    _check_dice(d_sides, count, trials)
+    if rng is None:
+        rng = _stream
+    if isinstance(rng, RollStream):
+        rng = rng.generator
+
+    if np is None:
+        rows = [[rng.randint(1, d_sides) for _ in range(count)] for _ in range(trials)]
+        totals = [sum(r) for r in rows]
+        return (totals, rows) if faces else totals
+
+    if faces:
+        dice = rng.integers(1, d_sides + 1, size=(trials, count), dtype=np.int64)
+        return dice.sum(axis=1), dice
+
+    # Totals only: generate compact faces in row chunks so memory stays bounded.
+    dtype = _face_dtype(d_sides)
+    totals = np.empty(trials, dtype=np.int64)
+    rows_per_chunk = max(1, BATCH_CHUNK_DICE // max(count, 1))
+    for start in range(0, trials, rows_per_chunk):
+        stop = min(start + rows_per_chunk, trials)
+        if count > BATCH_CHUNK_DICE:
+            # A single trial bigger than a chunk: sum it piece by piece.
+            for t in range(start, stop):
+                total = 0
+                for done in range(0, count, BATCH_CHUNK_DICE):
+                    n = min(BATCH_CHUNK_DICE, count - done)
+                    chunk = rng.integers(1, d_sides + 1, size=n, dtype=dtype)
+                    total += int(chunk.sum(dtype=np.int64))
+                totals[t] = total
+        else:
+            chunk = rng.integers(1, d_sides + 1, size=(stop - start, count), dtype=dtype)
+            totals[start:stop] = chunk.sum(axis=1, dtype=np.int64)
+    return totals
+
+
+def roll(d_sides, count=1):
+    """Roll `count` dice of `d_sides` and return the sum."""
+    if np is not None and count >= BATCH_THRESHOLD:
+        return int(roll_batch(d_sides, count)[0])
+    face = _stream.face
+    if count == 1:
+        return face(d_sides)
+    total = 0
+    for _ in range(count):
+        total += face(d_sides)
+    return total
+
+
+def roll_with_mod(d_sides, count, mod):
+    """Roll dice and add a flat modifier."""
+    return roll(d_sides, count) + mod
@@ -0,0 +1,261 @@
+"""
+Dice expressions in standard notation, e.g. "4d6kh3 + 2d8! + 1d4r1 - 2".
+
+Supported per dice term (NdS, N defaults to 1, d% is a d100):
+- khX / klX / kX: keep the highest / lowest X dice (kX == khX)
+- dhX / dlX:      drop the highest / lowest X dice
+- !:              exploding dice (a max face rolls another die, chains allowed)
+- rX / roX:       reroll faces <= X (until they stop / once)
+Terms are joined with + and -, and plain integers are flat modifiers.
+
+`compile_expr` parses an expression once and keeps the result in an LRU, so
+rolling the same macro again skips parsing entirely. Expressions typed by
+users (the Custom Roller, the dice service) go through `check_limits` first.
+"""
+
+import re
+from functools import lru_cache
+
+import dice
+from odds import Dist, dice_pmf
+
+
+# Safety cap for exploding dice so a run of max faces cannot loop forever.
+MAX_EXPLOSIONS = 100
+
+# Limits for user-entered expressions (see DiceExpr.check_limits).
+MAX_DICE = 1000
+MAX_SIDES = 1000
+
+_TERM_RE = re.compile(
+    r"(?P<count>\d*)d(?P<sides>\d+|%)(?P<mods>(?:kh\d+|kl\d+|k\d+|dh\d+|dl\d+|ro\d+|r\d+|!)*)"
+    r"|(?P<const>\d+)"
+)
+_MOD_RE = re.compile(r"(kh|kl|k|dh|dl|ro|r|!)(\d*)")
+_OP_SPACE_RE = re.compile(r"\s*([+-])\s*")
+
+
+class DiceTerm:
+    """One signed NdS term with its keep / explode / reroll options."""
+
+    __slots__ = ("sign", "count", "sides", "keep", "keep_high", "explode", "reroll", "reroll_once")
+
+    def __init__(self, sign, count, sides):
+        self.sign = sign
+        self.count = count
+        self.sides = sides
+        self.keep = count      # how many dice count toward the total
+        self.keep_high = True  # keep the highest (True) or lowest (False)
+        self.explode = False
+        self.reroll = 0        # reroll faces <= this value (0 = never)
+        self.reroll_once = False
+
+    @property
+    def plain(self):
+        """True when the term is just NdS (no keep, explode or reroll)."""
+        return self.keep == self.count and not self.explode and not self.reroll
+
+    def roll_faces(self, randint=dice.randint):
+        """Roll this term; return (kept faces, dropped faces)."""
+        faces = []
+        for _ in range(self.count):
+            face = randint(1, self.sides)
+            if self.reroll:
+                if self.reroll_once:
+                    if face <= self.reroll:
+                        face = randint(1, self.sides)
+                else:
+                    while face <= self.reroll:
+                        face = randint(1, self.sides)
+            if self.explode:
+                last, chain = face, 0
+                while last == self.sides and chain < MAX_EXPLOSIONS:
+                    last = randint(1, self.sides)
+                    face += last
+                    chain += 1
+            faces.append(face)
+        if self.keep == self.count:
+            return faces, []
+        ordered = sorted(faces, reverse=self.keep_high)
+        return ordered[:self.keep], ordered[self.keep:]
+
+    def __str__(self):
+        text = f"{self.count}d{self.sides}"
+        if self.reroll:
+            text += f"{'ro' if self.reroll_once else 'r'}{self.reroll}"
+        if self.explode:
+            text += "!"
+        if self.keep != self.count:
+            text += f"{'kh' if self.keep_high else 'kl'}{self.keep}"
+        return text
+
+
+class DiceExpr:
+    """A parsed dice expression: dice terms plus a flat constant."""
+
+    __slots__ = ("text", "terms", "constant", "_pmfs")
+
+    def __init__(self, text, terms, constant):
+        self.text = text
+        self.terms = tuple(terms)
+        self.constant = constant
+        self._pmfs = {}  # crit flag -> Dist, filled on first pmf() call
+
+    def check_limits(self, max_dice=MAX_DICE, max_sides=MAX_SIDES):
+        """Raise ValueError if the expression rolls too many dice or too big a die; returns self."""
+        if sum(term.count for term in self.terms) > max_dice:
+            raise ValueError(f"At most {max_dice} dice per roll")
+        if any(term.sides > max_sides for term in self.terms):
+            raise ValueError(f"Dice can have at most {max_sides} sides")
+        return self
+
+    def roll(self, randint=dice.randint):
+        """Roll once and return the total (`randint` lets callers pick a RollStream)."""
+        total = self.constant
+        for term in self.terms:
+            kept, _ = term.roll_faces(randint)
+            total += term.sign * sum(kept)
+        return total
+
+    def roll_detail(self):
+        """Roll once; return (total, [(term text, kept faces, dropped faces), ...])."""
+        total, parts = self.constant, []
+        for term in self.terms:
+            kept, dropped = term.roll_faces()
+            total += term.sign * sum(kept)
+            parts.append((("-" if term.sign < 0 else "") + str(term), kept, dropped))
+        return total, parts
+
+    def roll_batch(self, trials, rng=None):
+        """
+        Roll `trials` times; returns per-trial totals (a NumPy array when available).
+
+        `rng` is an optional RollStream or generator (see dice.roll_batch).
+        """
+        if dice.np is None:
+            randint = (rng or dice.get_stream()).randint
+            return [self.constant + sum(t.sign * sum(t.roll_faces(randint)[0]) for t in self.terms)
+                    for _ in range(trials)]
+        np = dice.np
+        totals = np.full(trials, self.constant, dtype=np.int64)
+        for term in self.terms:
+            if term.plain:
+                totals += term.sign * dice.roll_batch(term.sides, term.count, trials, rng=rng)
+                continue
+            # Reroll, explode and keep all vectorize over the (trials, count) face grid.
+            _, faces = dice.roll_batch(term.sides, term.count, trials, faces=True, rng=rng)
+            if term.reroll:
+                low = faces <= term.reroll
+                while low.any():
+                    faces[low] = dice.roll_batch(term.sides, 1, int(low.sum()), rng=rng)
+                    if term.reroll_once:
+                        break
+                    low = faces <= term.reroll
+            if term.explode:
+                live, chain = faces == term.sides, 0
+                while live.any() and chain < MAX_EXPLOSIONS:
+                    extra = dice.roll_batch(term.sides, 1, int(live.sum()), rng=rng)
+                    faces[live] += extra
+                    live[live] = extra == term.sides
+                    chain += 1
+            if term.keep != term.count:
+                faces.sort(axis=1)
+                faces = faces[:, faces.shape[1] - term.keep:] if term.keep_high else faces[:, :term.keep]
+            totals += term.sign * faces.sum(axis=1)
+        return totals
+
+    def pmf(self, crit=False):
+        """
+        Exact distribution of the total (crit=True doubles every dice term).
+
+        Only plain NdS terms have an exact PMF here; keep, explode and reroll
+        terms raise ValueError.
+        """
+        if crit in self._pmfs:
+            return self._pmfs[crit]
+        result = Dist(self.constant, [1.0])
+        for term in self.terms:
+            if not term.plain:
+                raise ValueError(f"No exact distribution for '{term}' in {self.text!r}")
+            count = term.count * (2 if crit else 1)
+            part = dice_pmf(term.sides, count)
+            if term.sign < 0:
+                part = Dist(-part.hi, reversed(part.probs))
+            result = result.convolve(part)
+        self._pmfs[crit] = result
+        return result
+
+    def __repr__(self):
+        return f"DiceExpr({self.text!r})"
+
+
+def _parse(text):
+    """Parse normalized expression text into a DiceExpr (raises ValueError)."""
+    if not text:
+        raise ValueError("Empty dice expression")
+    terms, constant, pos, sign = [], 0, 0, 1
+    if text[0] in "+-":
+        sign = -1 if text[0] == "-" else 1
+        pos = 1
+    while True:
+        match = _TERM_RE.match(text, pos)
+        if not match:
+            raise ValueError(f"Bad dice expression {text!r} at position {pos}")
+        if match.group("const") is not None:
+            constant += sign * int(match.group("const"))
+        else:
+            count = int(match.group("count") or 1)
+            sides = 100 if match.group("sides") == "%" else int(match.group("sides"))
+            if sides < 1:
+                raise ValueError(f"A die needs at least 1 side (got d{sides})")
+            term = DiceTerm(sign, count, sides)
+            for mod, num in _MOD_RE.findall(match.group("mods")):
+                n = int(num) if num else 0
+                if mod in ("kh", "k"):
+                    term.keep, term.keep_high = n, True
+                elif mod == "kl":
+                    term.keep, term.keep_high = n, False
+                elif mod == "dh":
+                    term.keep, term.keep_high = count - n, False
+                elif mod == "dl":
+                    term.keep, term.keep_high = count - n, True
+                elif mod == "!":
+                    if sides == 1:
+                        raise ValueError("A d1 cannot explode")
+                    term.explode = True
+                else:
+                    if n >= sides:
+                        raise ValueError(f"Rerolling <= {n} on a d{sides} never stops")
+                    term.reroll, term.reroll_once = n, mod == "ro"
+            if not 0 <= term.keep <= count:
+                raise ValueError(f"Cannot keep {term.keep} of {count} dice")
+            terms.append(term)
+        pos = match.end()
+        if pos == len(text):
+            return DiceExpr(text, terms, constant)
+        if text[pos] not in "+-":
+            raise ValueError(f"Bad dice expression {text!r} at position {pos}")
+        sign = -1 if text[pos] == "-" else 1
+        pos += 1
+
+
+@lru_cache(maxsize=512)
+def _compile_normalized(text):
+    return _parse(text)
+
+
+def compile_expr(text):
+    """
+    Return the cached DiceExpr for `text`. Case and whitespace around + and -
+    are ignored; whitespace anywhere else ("1d6 2") is a ValueError rather than
+    being squeezed out into a different expression ("1d62").
+    """
+    normalized = _OP_SPACE_RE.sub(r"\1", str(text).strip()).lower()
+    if any(ch.isspace() for ch in normalized):
+        raise ValueError(f"Bad dice expression {str(text).strip()!r}: missing + or - between terms")
+    return _compile_normalized(normalized)
+
+
+def roll_expr(text):
+    """Roll a dice expression once and return the total."""
+    return compile_expr(text).roll()
@@ -0,0 +1,304 @@
+"""
+Headless dice service: JSON lines over TCP or a Unix socket (asyncio).
+
+Table bots and overlays send one JSON object per line and get one back per
+line, tagged with the request's "id":
+
+    {"id": 1, "op": "roll", "expr": "4d6kh3+2"}
+    {"id": 2, "op": "ability_check", "character": "George", "ability": "STR", "mode": "advantage"}
+    {"id": 3, "op": "skill_check", "character": "George", "skill": "Athletics"}
+    {"id": 4, "op": "roll_to_hit", "character": "George", "weapon": "Longsword", "ac": 15}
+    {"id": 5, "op": "roll_damage", "character": "George", "weapon": "Longsword", "crit": true}
+    {"id": 6, "op": "reload", "character": "George"}
+
+    {"id": 2, "ok": true, "result": {"total": 17, "face": 12, "mod": 5}}
+    {"id": 7, "ok": false, "error": "Unknown character 'Bob'"}
+
+Characters come from the roster database (roster.py) and/or character files
+given on the command line, and stay cached in memory (Character, with its
+modifiers memoized) until "reload" drops them.
+
+Throughput: requests are not handled one by one. Every line that arrives
+during one event-loop pass, on any connection, is queued and the whole burst
+is handled in one go. The d20s for all checks and attacks come from a single
+bulk draw, and each connection gets a single write with all its replies.
+Pipelining clients therefore cost one parse + one dump per request and very
+few system calls. See benchmarks/dice_load.py.
+
+Usage:
+    python dice_server.py --port 8765 [--roster roster.db] [--character character.json]
+    python dice_server.py --unix /tmp/dice.sock --seed 42
+"""
+
+import argparse
+import asyncio
+import os
+from collections import OrderedDict
+
+import dice
+from character_model import Character
+from dice_expr import MAX_DICE, MAX_SIDES, compile_expr
+from odds import ROLL_MODES
+from roster import Roster, ROSTER_FILE
+from rules import roll_damage_detail
+from serialization import dumps, loads, load_file, validate_character
+
+DEFAULT_PORT = 8765
+MAX_CACHED = 1024  # characters kept in memory (least recently used are dropped)
+MAX_LINE = 64 * 1024  # longest accepted request line, in bytes
+
+D20S = {"normal": 1, "advantage": 2, "disadvantage": 2}
+
+
+class UnknownCharacter(LookupError):
+    pass
+
+
+class CharacterCache:
+    """Named characters from files (checked first) or the roster, LRU-cached as Character models."""
+
+    def __init__(self, roster=None, files=()):
+        self.roster = roster
+        self.paths = {}  # character name -> file
+        for path in files:
+            self.paths[load_file(path, validate=validate_character)["name"]] = path
+        self._cache = OrderedDict()
+
+    def _load(self, name):
+        if name in self.paths:
+            return load_file(self.paths[name], validate=validate_character)
+        if self.roster is not None:
+            try:
+                return self.roster.load(name)  # one indexed row; fast enough to do inline
+            except KeyError:
+                pass
+        raise UnknownCharacter(f"Unknown character {name!r}")
+
+    def get(self, name):
+        try:
+            self._cache.move_to_end(name)
+            return self._cache[name]
+        except KeyError:
+            pass
+        model = self._cache[name] = Character(self._load(name))
+        if len(self._cache) > MAX_CACHED:
+            self._cache.popitem(last=False)
+        return model
+
+    def drop(self, name):
+        """Forget a cached character; it is read again (file or roster) on next use."""
+        self._cache.pop(name, None)
+
+
+# ---------- Request handlers: (request, character cache, d20 faces) -> result ----------
+def _d20(faces, mode):
+    first = next(faces)
+    if mode == "normal":
+        return first
+    second = next(faces)
+    return max(first, second) if mode == "advantage" else min(first, second)
+
+
+def _check(faces, mode, mod):
+    face = _d20(faces, mode)
+    return {"total": face + mod, "face": face, "mod": mod}
+
+
+def op_roll(req, characters, faces):
+    # Dice count and size are capped: every die size gets a buffer in the RollStream
+    total, parts = compile_expr(req["expr"]).check_limits(MAX_DICE, MAX_SIDES).roll_detail()
+    return {"total": total, "faces": [f for _, kept, _ in parts for f in kept]}
+
+
+def op_ability_check(req, characters, faces):
+    model = characters.get(req["character"])
+    return _check(faces, req.get("mode", "normal"), model.mod(req["ability"]))
+
+
+def op_skill_check(req, characters, faces):
+    model = characters.get(req["character"])
+    return _check(faces, req.get("mode", "normal"), model.skill_modifier(req["skill"]))
+
+
+def op_roll_to_hit(req, characters, faces):
+    model = characters.get(req["character"])
+    face = _d20(faces, req.get("mode", "normal"))
+    total = face + model.attack_bonus(req["weapon"])
+    crit, fumble = face == 20, face == 1
+    ac = req.get("ac")
+    hit = None if ac is None else crit or (not fumble and total >= ac)
+    return {"total": total, "face": face, "crit": crit, "fumble": fumble, "hit": hit}
+
+
+def op_roll_damage(req, characters, faces):
+    model = characters.get(req["character"])
+    total, dice_faces = roll_damage_detail(model.data["weapons"][req["weapon"]], crit=bool(req.get("crit")))
+    return {"total": total, "faces": dice_faces}
+
+
+def op_reload(req, characters, faces):
+    characters.drop(req["character"])
+    return {"reloaded": req["character"]}
+
+
+OPS = {
+    "roll": op_roll,
+    "ability_check": op_ability_check,
+    "skill_check": op_skill_check,
+    "roll_to_hit": op_roll_to_hit,
+    "roll_damage": op_roll_damage,
+    "reload": op_reload,
+}
+D20_OPS = {"ability_check", "skill_check", "roll_to_hit"}
+
+
+def _d20s_needed(req):
+    """d20s a request will draw; 0 for anything malformed (it gets an error reply instead)."""
+    if not isinstance(req, dict):
+        return 0
+    op, mode = req.get("op"), req.get("mode", "normal")
+    if not isinstance(op, str) or not isinstance(mode, str) or op not in D20_OPS:
+        return 0
+    return D20S.get(mode, 0)
+
+
+def handle_batch(requests, characters, stream=None):
+    """Answer a list of request dicts (or exceptions from parsing) in order; returns reply dicts."""
+    stream = stream or dice.get_stream()
+    needed = sum(_d20s_needed(req) for req in requests)
+    faces = iter(stream.faces(20, needed))  # every d20 of the burst in one draw
+
+    replies = []
+    for req in requests:
+        if not isinstance(req, dict):
+            replies.append({"id": None, "ok": False, "error": f"Bad request: {req}"})
+            continue
+        try:
+            if not isinstance(req.get("op"), str) or not isinstance(req.get("mode", "normal"), str):
+                raise ValueError("'op' and 'mode' must be strings")
+            op = OPS[req["op"]]
+            if req.get("mode", "normal") not in D20S:
+                raise ValueError(f"Unknown roll mode {req['mode']!r}; expected one of {ROLL_MODES}")
+            reply = {"id": req.get("id"), "ok": True, "result": op(req, characters, faces)}
+        except UnknownCharacter as e:
+            reply = {"id": req.get("id"), "ok": False, "error": str(e)}
+        except KeyError as e:  # missing field, unknown op / ability / skill / weapon
+            reply = {"id": req.get("id"), "ok": False, "error": f"Missing or unknown {e.args[0]!r}"}
+        except (ValueError, TypeError) as e:
+            reply = {"id": req.get("id"), "ok": False, "error": str(e)}
+        replies.append(reply)
+    return replies
+
+
+# ---------- Networking ----------
+class DiceService:
+    """Shared state: the character cache and the queue of requests waiting for the next batch."""
+
+    def __init__(self, characters, stream=None):
+        self.characters = characters
+        self.stream = stream
+        self.pending = []  # (connection, request) in arrival order
+        self.requests_served = 0
+        self._scheduled = False
+
+    def submit(self, conn, request):
+        self.pending.append((conn, request))
+        if not self._scheduled:
+            self._scheduled = True
+            asyncio.get_running_loop().call_soon(self.flush)
+
+    def flush(self):
+        """Handle everything that arrived since the last pass; one write per connection."""
+        self._scheduled = False
+        pending, self.pending = self.pending, []
+        replies = handle_batch([req for _, req in pending], self.characters, self.stream)
+        out = {}
+        for (conn, _), reply in zip(pending, replies):
+            out.setdefault(conn, []).append(dumps(reply, compact=True))
+        for conn, lines in out.items():
+            conn.send_lines(lines)
+        self.requests_served += len(pending)
+
+
+class DiceProtocol(asyncio.Protocol):
+    """One client connection: split the byte stream into lines and queue them."""
+
+    def __init__(self, service):
+        self.service = service
+        self.transport = None
+        self._buffer = b""
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data):
+        data = self._buffer + data
+        lines = data.split(b"\n")
+        self._buffer = lines.pop()  # incomplete last line (b"" if data ended with \n)
+        if len(self._buffer) > MAX_LINE:
+            self.transport.close()
+            return
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                request = loads(line)
+            except ValueError as e:
+                request = e  # answered in order with the rest
+            self.service.submit(self, request)
+
+    def send_lines(self, lines):
+        if self.transport is not None and not self.transport.is_closing():
+            self.transport.write(("\n".join(lines) + "\n").encode("utf-8"))
+
+    # A client that stops reading its replies stops being read from.
+    def pause_writing(self):
+        self.transport.pause_reading()
+
+    def resume_writing(self):
+        self.transport.resume_reading()
+
+    def connection_lost(self, exc):
+        self.transport = None
+
+
+async def serve(service, host="127.0.0.1", port=DEFAULT_PORT, unix_path=None):
+    loop = asyncio.get_running_loop()
+    if unix_path:
+        if os.path.exists(unix_path):
+            os.remove(unix_path)  # stale socket from a previous run
+        server = await loop.create_unix_server(lambda: DiceProtocol(service), unix_path)
+        where = unix_path
+    else:
+        server = await loop.create_server(lambda: DiceProtocol(service), host, port)
+        where = "{}:{}".format(*server.sockets[0].getsockname()[:2])
+    print(f"Dice service listening on {where}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="JSON-lines dice service for bots and overlays")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--roster", default=ROSTER_FILE, help="roster database (use '' for none)")
+    parser.add_argument("--character", action="append", default=[], help="character JSON file (repeatable)")
+    parser.add_argument("--seed", type=int, help="seed the dice (replayable sessions)")
+    args = parser.parse_args(argv)
+
+    if args.seed is not None:
+        dice.set_seed(args.seed)
+    roster = Roster(args.roster) if args.roster else None
+    service = DiceService(CharacterCache(roster, args.character))
+    try:
+        asyncio.run(serve(service, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if roster is not None:
+            roster.close()
+
+
+if __name__ == "__main__":
+    main()
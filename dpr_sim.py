@@ -0,0 +1,187 @@
+"""
+Headless Monte Carlo damage-per-round (DPR) simulator.
+
+Each simulated round is one attack per weapon: a d20 to hit (natural 1 misses,
+natural 20 hits and crits, crits roll the damage dice twice) followed by a
+damage roll. The same rounds are scored against every target AC in the sweep,
+so ACs are compared on identical dice.
+
+Trials are sharded across a ProcessPoolExecutor. Every shard gets its own
+child RollStream spawned from the run's seed, and the per-shard damage
+histograms are merged at the end, so a given seed reproduces the same report
+for the same worker count.
+
+Usage:
+    python dpr_sim.py character.json --ac 10-20 --trials 200000 --workers 4 --seed 7
+"""
+
+import argparse
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import dice
+from dice_expr import compile_expr
+from odds import ROLL_MODES
+from serialization import load_file, validate_character
+
+np = dice.np
+
+# z-score for a two-sided 95% confidence interval.
+Z_95 = 1.959963984540054
+
+
+# ---------- One shard of trials (runs inside a worker process) ----------
+def _d20_faces(n, mode, rng):
+    if mode == "normal":
+        return dice.roll_batch(20, 1, n, rng=rng)
+    first = dice.roll_batch(20, 1, n, rng=rng)
+    second = dice.roll_batch(20, 1, n, rng=rng)
+    if np is None:
+        pick = max if mode == "advantage" else min
+        return [pick(a, b) for a, b in zip(first, second)]
+    return np.maximum(first, second) if mode == "advantage" else np.minimum(first, second)
+
+
+def _damage_rolls(weapon, n, rng):
+    """Return (normal damage, extra crit dice) samples for `n` rounds."""
+    if "damage" in weapon:
+        expr = compile_expr(weapon["damage"])
+        normal = expr.roll_batch(n, rng=rng)
+        extra = expr.roll_batch(n, rng=rng)
+        if np is None:
+            return normal, [e - expr.constant for e in extra]
+        return normal, extra - expr.constant
+    sides, count = weapon["damage_die"], weapon["damage_die_count"]
+    normal = dice.roll_batch(sides, count, n, rng=rng)
+    extra = dice.roll_batch(sides, count, n, rng=rng)
+    mod = weapon.get("damage_mod", 0)
+    if np is None:
+        return [d + mod for d in normal], extra
+    return normal + mod, extra
+
+
+def _simulate_shard(weapons, acs, trials, mode, crit_range, rng):
+    """
+    Simulate `trials` rounds drawing from the RollStream `rng`; return
+    {(weapon, ac): {"hits": int, "hist": {damage: count}}}.
+    """
+    results = {}
+    for name, weapon in weapons.items():
+        faces = _d20_faces(trials, mode, rng)
+        normal, extra = _damage_rolls(weapon, trials, rng)
+        hit_mod = weapon.get("hit_mod", 0)
+        for ac in acs:
+            if np is None:
+                hist, hits = {}, 0
+                for f, dmg, more in zip(faces, normal, extra):
+                    if f >= crit_range:
+                        dmg += more
+                        hits += 1
+                    elif f != 1 and f + hit_mod >= ac:
+                        hits += 1
+                    else:
+                        dmg = 0
+                    hist[dmg] = hist.get(dmg, 0) + 1
+            else:
+                crit = faces >= crit_range
+                hit = crit | ((faces != 1) & (faces + hit_mod >= ac))
+                dmg = np.where(crit, normal + extra, np.where(hit, normal, 0))
+                lo = int(dmg.min())
+                counts = np.bincount(dmg - lo)
+                hist = {lo + int(i): int(counts[i]) for i in np.flatnonzero(counts)}
+                hits = int(hit.sum())
+            results[(name, ac)] = {"hits": hits, "hist": hist}
+    return results
+
+
+# ---------- Sharding, merging and statistics ----------
+def _merge(total, part):
+    for key, res in part.items():
+        merged = total.setdefault(key, {"hits": 0, "hist": {}})
+        merged["hits"] += res["hits"]
+        hist = merged["hist"]
+        for dmg, count in res["hist"].items():
+            hist[dmg] = hist.get(dmg, 0) + count
+
+
+def _summarize(res):
+    hist = res["hist"]
+    n = sum(hist.values())
+    mean = sum(d * c for d, c in hist.items()) / n
+    variance = sum(c * (d - mean) ** 2 for d, c in hist.items()) / (n - 1) if n > 1 else 0.0
+    half_width = Z_95 * math.sqrt(variance / n)
+    return {
+        "trials": n,
+        "dpr": mean,
+        "variance": variance,
+        "ci_low": mean - half_width,
+        "ci_high": mean + half_width,
+        "hit_rate": res["hits"] / n,
+        "histogram": dict(sorted(hist.items())),
+    }
+
+
+def simulate_dpr(weapons, acs, trials=100_000, workers=None, seed=None, mode="normal", crit_range=20):
+    """
+    Simulate `trials` rounds per weapon against each AC in `acs`.
+
+    `weapons` is the character["weapons"] dict. Returns
+    {(weapon_name, ac): {"trials", "dpr", "variance", "ci_low", "ci_high",
+    "hit_rate", "histogram"}} with a 95% confidence interval on the DPR.
+    workers=1 runs in-process; the default uses every CPU core.
+    """
+    if mode not in ROLL_MODES:
+        raise ValueError(f"Unknown roll mode {mode!r}; expected one of {ROLL_MODES}")
+    if trials < 1:
+        raise ValueError("trials must be at least 1")
+    workers = max(1, min(workers or os.cpu_count() or 1, trials))
+    acs = list(acs)
+
+    sizes = [trials // workers + (1 if i < trials % workers else 0) for i in range(workers)]
+    streams = dice.RollStream(seed).spawn(workers)  # one independent stream per shard
+
+    totals = {}
+    if workers == 1:
+        _merge(totals, _simulate_shard(weapons, acs, sizes[0], mode, crit_range, streams[0]))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_simulate_shard, weapons, acs, size, mode, crit_range, s)
+                       for size, s in zip(sizes, streams)]
+            for fut in futures:
+                _merge(totals, fut.result())
+    return {key: _summarize(res) for key, res in totals.items()}
+
+
+# ---------- Command line ----------
+def _parse_acs(text):
+    """'10-20' -> 10..20, '12,15,18' -> [12, 15, 18]."""
+    if "-" in text:
+        lo, hi = text.split("-", 1)
+        return list(range(int(lo), int(hi) + 1))
+    return [int(part) for part in text.split(",")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo damage-per-round simulator")
+    parser.add_argument("character", nargs="?", default="character.json", help="character JSON file")
+    parser.add_argument("--ac", default="10-20", help="AC range '10-20' or list '12,15,18'")
+    parser.add_argument("--trials", type=int, default=100_000, help="rounds per weapon")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=None, help="seed for a reproducible run")
+    parser.add_argument("--mode", choices=ROLL_MODES, default="normal")
+    args = parser.parse_args(argv)
+
+    character = load_file(args.character, validate=validate_character)
+
+    report = simulate_dpr(character.get("weapons", {}), _parse_acs(args.ac), args.trials,
+                          args.workers, args.seed, args.mode)
+    print(f"{'Weapon':<16}{'AC':>4}{'DPR':>9}{'95% CI':>18}{'Var':>9}{'Hit%':>7}")
+    for (name, ac), stats in report.items():
+        ci = f"{stats['ci_low']:.3f}-{stats['ci_high']:.3f}"
+        print(f"{name:<16}{ac:>4}{stats['dpr']:>9.3f}{ci:>18}{stats['variance']:>9.2f}"
+              f"{stats['hit_rate'] * 100:>6.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+Batch encounter simulator: a party against a monster group, fought to the end.
+
+Combatants use the character.json schema (name, stats, hp, ac, weapons), so
+any saved character or a monster written in the same shape can join a fight.
+
+Rules kept deliberately simple:
+- Initiative is d20 + DEX modifier; turns come off a heap ordered by
+  (round, initiative, DEX), so combatants who drop are just skipped.
+- On its turn a combatant attacks the living enemy with the lowest HP, using
+  its best weapon (highest expected damage against that enemy's AC; sampled
+  for damage expressions without an exact distribution, like 1d12!).
+- Natural 1 misses, natural 20 hits and crits (damage dice rolled twice).
+- A combatant at 0 HP is out of the fight (no death saves or healing).
+
+Usage:
+    python encounter.py --party character.json --monsters goblin.json:4 --fights 100000
+"""
+
+import argparse
+import heapq
+
+from dice import RollStream, get_stream
+from dice_expr import compile_expr
+from odds import attack_odds, weapon_odds
+from rules import calc_mods
+from serialization import load_file, validate_character
+
+# Fights still running after this many rounds are scored as a draw.
+MAX_ROUNDS = 100
+
+# Rolls used to estimate the mean damage of expressions with no exact PMF.
+DAMAGE_SAMPLES = 4000
+
+
+class Attack:
+    """Flattened weapon: to-hit bonus and damage dice (or a compiled expression)."""
+
+    __slots__ = ("name", "hit_mod", "count", "sides", "mod", "expr", "weapon")
+
+    def __init__(self, name, weapon):
+        self.name = name
+        self.weapon = weapon
+        self.hit_mod = weapon.get("hit_mod", 0)
+        if "damage" in weapon:
+            self.expr = compile_expr(weapon["damage"])
+            self.count = self.sides = self.mod = 0
+        else:
+            self.expr = None
+            self.count = weapon["damage_die_count"]
+            self.sides = weapon["damage_die"]
+            self.mod = weapon.get("damage_mod", 0)
+
+
+class Combatant:
+    """Static fight data for one creature; per-fight HP lives in a plain list."""
+
+    __slots__ = ("name", "side", "max_hp", "start_hp", "ac", "dex_mod", "attacks")
+
+    def __init__(self, character, side, name=None):
+        self.name = name or character.get("name", "?")
+        self.side = side
+        self.max_hp = character["hp"]["max"]
+        self.start_hp = character["hp"].get("current", self.max_hp)
+        self.ac = character["ac"]
+        self.dex_mod = calc_mods(character["stats"]).get("DEX", 0)
+        self.attacks = tuple(Attack(n, w) for n, w in character.get("weapons", {}).items())
+
+
+def _expected_damage(attack, ac):
+    """Expected damage per swing against `ac` (exact when possible, else from a sample)."""
+    try:
+        return weapon_odds(attack.weapon, ac)["expected_damage"]
+    except ValueError:  # explode / keep / reroll terms
+        pass
+    p_hit, p_crit = attack_odds(attack.hit_mod, ac)
+    rolls = attack.expr.roll_batch(DAMAGE_SAMPLES, rng=RollStream(0))  # fixed seed: same choice every time
+    normal = sum(rolls) / DAMAGE_SAMPLES
+    critical = 2 * normal - attack.expr.constant  # crits roll the dice twice, as in Encounter.run
+    return (p_hit - p_crit) * normal + p_crit * critical
+
+
+def _expand(group, side):
+    """[(character, count), ...] -> Combatants, numbering duplicates ("Goblin 2")."""
+    out = []
+    for member in group:
+        character, count = member if isinstance(member, tuple) else (member, 1)
+        for i in range(count):
+            name = character.get("name", "?") + (f" {i + 1}" if count > 1 else "")
+            out.append(Combatant(character, side, name))
+    return out
+
+
+class Encounter:
+    """
+    A reusable fight setup. Build it once, then call `run()` as many times as
+    needed; best-weapon choices are precomputed per (attacker, target AC).
+    """
+
+    __slots__ = ("combatants", "best_attack", "party_size")
+
+    def __init__(self, party, monsters):
+        """`party` / `monsters`: lists of character dicts or (character, count) pairs."""
+        party_list = _expand(party, 0)
+        monster_list = _expand(monsters, 1)
+        if not party_list or not monster_list:
+            raise ValueError("Both sides need at least one combatant")
+        self.combatants = tuple(party_list + monster_list)
+        self.party_size = len(party_list)
+
+        # best_attack[attacker][target] -> Attack with the highest expected damage.
+        self.best_attack = []
+        for c in self.combatants:
+            row = []
+            for t in self.combatants:
+                if not c.attacks or t.side == c.side:
+                    row.append(None)
+                    continue
+                row.append(max(c.attacks, key=lambda a: _expected_damage(a, t.ac)))
+            self.best_attack.append(row)
+
+    def run(self, stream=None):
+        """Fight once; return (winner side or None for a draw, rounds, hp list)."""
+        stream = stream or get_stream()
+        face = stream.face
+        combatants = self.combatants
+        hp = [c.start_hp for c in combatants]
+        alive = [sum(1 for c, h in zip(combatants, hp) if c.side == s and h > 0) for s in (0, 1)]
+        if not alive[0] or not alive[1]:  # a side that starts out downed loses at once
+            return (1 if alive[1] else 0 if alive[0] else None), 0, hp
+
+        # Heap of (round, -initiative, -dex, index): pops in turn order.
+        turns = []
+        for i, c in enumerate(combatants):
+            init = face(20) + c.dex_mod
+            turns.append((1, -init, -c.dex_mod, i))
+        heapq.heapify(turns)
+
+        while turns:
+            rnd, neg_init, neg_dex, i = heapq.heappop(turns)
+            if rnd > MAX_ROUNDS:
+                return None, MAX_ROUNDS, hp
+            if hp[i] <= 0:
+                continue  # dropped earlier; leave it out of the queue
+            me = combatants[i]
+
+            # Target: living enemy with the lowest HP.
+            target = -1
+            for j, other in enumerate(combatants):
+                if other.side != me.side and hp[j] > 0 and (target < 0 or hp[j] < hp[target]):
+                    target = j
+
+            attack = self.best_attack[i][target] if target >= 0 else None
+            if attack is not None:
+                d20 = face(20)
+                if d20 == 20 or (d20 != 1 and d20 + attack.hit_mod >= combatants[target].ac):
+                    dice_sets = 2 if d20 == 20 else 1
+                    if attack.expr is not None:
+                        dmg = attack.expr.roll(stream.randint)
+                        if dice_sets == 2:
+                            dmg += attack.expr.roll(stream.randint) - attack.expr.constant
+                    else:
+                        sides, dmg = attack.sides, attack.mod
+                        for _ in range(attack.count * dice_sets):
+                            dmg += face(sides)
+                    if dmg > 0:
+                        hp[target] -= dmg
+                        if hp[target] <= 0:
+                            alive[combatants[target].side] -= 1
+                            if alive[combatants[target].side] == 0:
+                                return me.side, rnd, hp
+
+            heapq.heappush(turns, (rnd + 1, neg_init, neg_dex, i))
+        return None, MAX_ROUNDS, hp
+
+
+def simulate_encounters(party, monsters, fights=10_000, seed=None):
+    """
+    Run `fights` independent fights and return win-rate / TPK-risk statistics.
+
+    Returns {"fights", "party_win_rate", "tpk_rate", "draw_rate", "avg_rounds",
+    "avg_party_survivors", "death_rate": {party member name: rate}}.
+    """
+    enc = Encounter(party, monsters)
+    stream = RollStream(seed)
+    n_party = enc.party_size
+    wins = tpks = draws = rounds_total = survivors_total = 0
+    deaths = [0] * n_party
+    for _ in range(fights):
+        winner, rounds, hp = enc.run(stream)
+        rounds_total += rounds
+        if winner == 0:
+            wins += 1
+        elif winner == 1:
+            tpks += 1
+        else:
+            draws += 1
+        for k in range(n_party):
+            if hp[k] > 0:
+                survivors_total += 1
+            else:
+                deaths[k] += 1
+    return {
+        "fights": fights,
+        "party_win_rate": wins / fights,
+        "tpk_rate": tpks / fights,
+        "draw_rate": draws / fights,
+        "avg_rounds": rounds_total / fights,
+        "avg_party_survivors": survivors_total / fights,
+        "death_rate": {enc.combatants[k].name: deaths[k] / fights for k in range(n_party)},
+    }
+
+
+# ---------- Command line ----------
+def _load_group(specs):
+    """['goblin.json:4', 'ogre.json'] -> [(character dict, count), ...]."""
+    group = []
+    for spec in specs:
+        path, _, count = spec.rpartition(":")
+        if not count.isdigit():
+            path, count = spec, "1"  # no count given (and keeps "C:\\..." paths intact)
+        group.append((load_file(path, validate=validate_character), int(count)))
+    return group
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate many party-vs-monsters encounters")
+    parser.add_argument("--party", nargs="+", required=True, help="character files (file.json[:count])")
+    parser.add_argument("--monsters", nargs="+", required=True, help="monster files (file.json[:count])")
+    parser.add_argument("--fights", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    stats = simulate_encounters(_load_group(args.party), _load_group(args.monsters), args.fights, args.seed)
+    print(f"Fights:            {stats['fights']}")
+    print(f"Party wins:        {stats['party_win_rate']:.1%}")
+    print(f"TPK risk:          {stats['tpk_rate']:.1%}")
+    print(f"Draws:             {stats['draw_rate']:.1%}")
+    print(f"Average rounds:    {stats['avg_rounds']:.2f}")
+    print(f"Average survivors: {stats['avg_party_survivors']:.2f}")
+    for name, rate in stats["death_rate"].items():
+        print(f"  {name} drops in {rate:.1%} of fights")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Watch one file for changes from a background thread.
+
+On Linux the watcher uses inotify (through ctypes, no extra packages) on the
+file's folder, so it also sees editors and our own atomic saves that replace
+the file by renaming a temp file over it. Everywhere else, or if inotify is not
+available, it falls back to polling the file's mtime and size.
+
+Our own saves are recognized by content: the writer passes the text it is
+about to write to `expect_own_write` first, and a change whose bytes hash the
+same is not reported, however long the write and its fsyncs take.
+
+The watcher only notices and loads; it never touches the UI. Each change is
+parsed on the watcher thread and the result is put on a queue that the Tk
+thread drains with `root.after` (see main2.py), since Tk widgets must only be
+used from the thread that created them.
+"""
+
+import ctypes
+import ctypes.util
+import hashlib
+import os
+import queue
+import select
+import struct
+import sys
+import threading
+from collections import deque
+
+# inotify flags (from <sys/inotify.h>)
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_CLOEXEC = 0o2000000
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, name length
+
+# Wait this long after the last event before loading, so a burst of writes
+# from an editor turns into one reload.
+SETTLE_SECONDS = 0.1
+
+OWN_WRITES_KEPT = 4  # recent own writes recognized (saves can queue up behind a slow one)
+
+
+def _inotify():
+    """libc with inotify functions, or None if not on Linux / not available."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        libc.inotify_init1, libc.inotify_add_watch  # noqa: B018 (check they exist)
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class FileWatcher:
+    """
+    Call `load(path)` on a background thread whenever `path` changes and put
+    what it returns on `self.changes` (exceptions from `load` are put there too,
+    so the consumer can report them).
+    """
+
+    def __init__(self, path, load, poll_interval=0.5):
+        self.path = os.path.abspath(path)
+        self.load = load
+        self.poll_interval = poll_interval
+        self.changes = queue.Queue()
+        self.backend = None
+        self._own_writes = deque(maxlen=OWN_WRITES_KEPT)  # content hashes of our own saves
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        libc = _inotify()
+        fd = -1
+        if libc is not None:
+            fd = libc.inotify_init1(IN_CLOEXEC)
+            if fd >= 0 and libc.inotify_add_watch(
+                fd, os.path.dirname(self.path).encode(), IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_MODIFY
+            ) < 0:
+                os.close(fd)
+                fd = -1
+        if fd >= 0:
+            self.backend = "inotify"
+            target = lambda: self._run_inotify(fd)  # noqa: E731
+        else:
+            self.backend = "polling"
+            target = self._run_polling
+        self._thread = threading.Thread(target=target, name="file-watch", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    def expect_own_write(self, content, encoding="utf-8"):
+        """Call with the text (or bytes) you are about to write, before writing, so that write is not reported back."""
+        if isinstance(content, str):
+            content = content.encode(encoding)
+        self._own_writes.append(hashlib.sha1(content).digest())
+
+    def _emit(self):
+        try:
+            with open(self.path, "rb") as f:
+                if hashlib.sha1(f.read()).digest() in self._own_writes:
+                    return
+            self.changes.put(self.load(self.path))
+        except FileNotFoundError:
+            pass  # deleted (or mid-rename); wait for the next change
+        except Exception as e:  # bad JSON etc.: let the UI thread report it
+            self.changes.put(e)
+
+    # ---------- Backends ----------
+    def _run_inotify(self, fd):
+        name = os.path.basename(self.path).encode()
+        try:
+            while not self._stop.is_set():
+                if not select.select([fd], [], [], 0.5)[0]:
+                    continue
+                if self._read_matches(fd, name):
+                    # Let the burst settle, swallowing follow-up events.
+                    while select.select([fd], [], [], SETTLE_SECONDS)[0]:
+                        self._read_matches(fd, name)
+                    self._emit()
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def _read_matches(fd, name):
+        """Read pending events; True if any of them is about our file."""
+        data = os.read(fd, 64 * 1024)
+        offset, hit = 0, False
+        while offset < len(data):
+            _wd, _mask, _cookie, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            if data[offset:offset + length].rstrip(b"\0") == name:
+                hit = True
+            offset += length
+        return hit
+
+    def _run_polling(self):
+        last = self._signature()
+        while not self._stop.wait(self.poll_interval):
+            sig = self._signature()
+            if sig != last:
+                last = sig
+                self._emit()
+
+    def _signature(self):
+        try:
+            st = os.stat(self.path)
+            return st.st_mtime_ns, st.st_size, st.st_ino
+        except FileNotFoundError:
+            return None
@@ -0,0 +1,61 @@
+"""
+Lazily built Gemini chat for the worldbuilder apps.
+
+Nothing slow happens at import. google-genai and python-dotenv are imported,
+the client is created and the chat session is opened on the first message.
+A missing API_KEY is reported then (MissingApiKey) instead of breaking the
+import of the app.
+"""
+
+import os
+import threading
+
+MODEL = "gemini-2.5-flash-lite"
+
+
+class MissingApiKey(RuntimeError):
+    """API_KEY is not set in the environment or a .env file."""
+
+
+class GeminiChat:
+    """One chat session (system instruction + function tools), created on first use."""
+
+    def __init__(self, system_instruction, function_declarations=(), model=MODEL):
+        self.system_instruction = system_instruction
+        self.function_declarations = list(function_declarations)
+        self.model = model
+        self.config = None
+        self._chat = None
+        self._lock = threading.Lock()  # the first message may come from a worker thread
+
+    @property
+    def started(self):
+        return self._chat is not None
+
+    @property
+    def chat(self):
+        if self._chat is None:
+            with self._lock:
+                if self._chat is None:
+                    self._chat = self._create()
+        return self._chat
+
+    def _create(self):
+        from dotenv import load_dotenv
+        from google import genai
+        from google.genai import types
+
+        load_dotenv()
+        api_key = os.getenv("API_KEY")
+        if not api_key:
+            raise MissingApiKey("API_KEY is not set; add it to the environment or a .env file.")
+        client = genai.Client(api_key=api_key)
+        tools = types.Tool(function_declarations=self.function_declarations)
+        self.config = types.GenerateContentConfig(tools=[tools], system_instruction=self.system_instruction)
+        return client.chats.create(model=self.model, config=self.config)
+
+    def send_message(self, message):
+        return self.chat.send_message(message=message)
+
+    def send_message_stream(self, message):
+        return self.chat.send_message_stream(message=message)
@@ -0,0 +1,204 @@
+"""
+Indexed inventory: item stacks with quantity and weight, O(1) add / lookup /
+removal and prefix search.
+
+In character.json the inventory stays a list. A plain string is one item
+(quantity 1, no weight), which is what older files contain. A stack with
+quantity or weight is stored as {"name": ..., "qty": ..., "weight": ...}
+(weight per item).
+
+`Inventory` keeps stacks in an insertion-ordered dict keyed by the
+case-folded name (O(1) add / lookup / removal). A sorted word index answers
+prefix searches with bisect, matching the start of the name or of any word in
+it ("rope" finds "Hempen rope"). Edits never shift that list: new words wait in
+an unsorted batch that the next search merges in, and removed names stay in
+the index as tombstones (skipped because they are no longer in the dict) until
+they make up half of it. `InventoryFilter` narrows the previous result as the
+user keeps typing, instead of searching again.
+"""
+
+from bisect import bisect_left
+
+
+def _key(name):
+    return name.strip().casefold()
+
+
+def _words(key):
+    """Index terms for a name key: the whole key plus each word in it."""
+    words = {key}
+    words.update(key.split())
+    return words
+
+
+class Item:
+    """One inventory stack."""
+
+    __slots__ = ("name", "qty", "weight", "seq")
+
+    def __init__(self, name, qty=1, weight=0.0, seq=0):
+        self.name = name
+        self.qty = qty
+        self.weight = weight  # per item
+        self.seq = seq  # insertion order, for stable listing
+
+    @classmethod
+    def from_json(cls, value):
+        if isinstance(value, str):
+            return cls(value)
+        return cls(value["name"], value.get("qty", 1), value.get("weight", 0))
+
+    def to_json(self):
+        # Plain strings for simple items keep older files (and main.py) unchanged.
+        if self.qty == 1 and not self.weight:
+            return self.name
+        return {"name": self.name, "qty": self.qty, "weight": self.weight}
+
+    @property
+    def total_weight(self):
+        return self.qty * self.weight
+
+    def label(self):
+        text = self.name if self.qty == 1 else f"{self.name} x{self.qty}"
+        if self.weight:
+            text += f"  ({self.total_weight:g} lb)"
+        return text
+
+    def __repr__(self):
+        return f"Item({self.name!r}, qty={self.qty}, weight={self.weight})"
+
+
+def item_label(value):
+    """Display text for a raw inventory entry (str or dict)."""
+    return Item.from_json(value).label()
+
+
+class Inventory:
+    """Item stacks by name, with a sorted word index for prefix search."""
+
+    def __init__(self, entries=()):
+        self.load(entries)
+
+    def load(self, entries):
+        """Replace the contents with raw inventory entries (str or dict)."""
+        self._items = {}  # key -> Item, in insertion order
+        self._index = []  # sorted (word, key) pairs; may hold removed keys
+        self._added = []  # (word, key) pairs not merged into _index yet
+        self._dead = 0  # pairs in _index whose key was removed
+        self._seq = 0
+        self.total_weight = 0.0
+        for value in entries:
+            item = Item.from_json(value)
+            self.add(item.name, item.qty, item.weight)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items.values())
+
+    def __contains__(self, name):
+        return _key(name) in self._items
+
+    def get(self, name):
+        return self._items.get(_key(name))
+
+    def add(self, name, qty=1, weight=None):
+        """Add `qty` of an item; an existing stack with the same name grows. Returns the stack."""
+        name = name.strip()
+        key = _key(name)
+        if not key:
+            raise ValueError("Item needs a name")
+        item = self._items.get(key)
+        if item is None:
+            item = Item(name, 0, weight or 0.0, self._seq)
+            self._seq += 1
+            self._items[key] = item
+            self._added.extend((word, key) for word in _words(key))
+        elif weight is not None:
+            self.total_weight -= item.total_weight
+            item.weight = weight
+            self.total_weight += item.total_weight
+        item.qty += qty
+        self.total_weight += qty * item.weight
+        return item
+
+    def remove(self, name, qty=None):
+        """Remove the whole stack (or just `qty` of it). Returns the stack, or None if absent."""
+        key = _key(name)
+        item = self._items.get(key)
+        if item is None:
+            return None
+        if qty is not None and qty < item.qty:
+            item.qty -= qty
+            self.total_weight -= qty * item.weight
+            return item
+        del self._items[key]
+        self.total_weight -= item.total_weight
+        self._dead += len(_words(key))  # tombstoned; see _merge()
+        return item
+
+    def search(self, prefix):
+        """Stacks whose name, or a word in it, starts with `prefix` (case-insensitive), in order."""
+        prefix = prefix.strip().casefold()
+        if not prefix:
+            return list(self._items.values())
+        self._merge()
+        found = set()
+        i = bisect_left(self._index, (prefix,))
+        index = self._index
+        while i < len(index) and index[i][0].startswith(prefix):
+            found.add(index[i][1])
+            i += 1
+        items = self._items
+        return sorted((items[k] for k in found if k in items), key=lambda it: it.seq)
+
+    def _merge(self):
+        """Fold pending additions into the sorted index; drop tombstones once they are half of it."""
+        if self._dead * 2 > len(self._index):
+            items = self._items
+            self._index = sorted({p for p in self._index + self._added if p[1] in items})
+            self._added, self._dead = [], 0
+        elif self._added:
+            self._added.sort()
+            self._index += self._added  # two sorted runs: Timsort merges them in linear time
+            self._index.sort()
+            self._added = []
+
+    def to_json(self):
+        return [item.to_json() for item in self._items.values()]
+
+
+def matches(item, prefix):
+    """Same rule as Inventory.search, for one item."""
+    key = _key(item.name)
+    return key.startswith(prefix) or any(word.startswith(prefix) for word in key.split())
+
+
+class InventoryFilter:
+    """
+    Incremental filter over an Inventory. When the new text extends the last
+    one ("ro" -> "rop"), only the previous matches are re-checked.
+    """
+
+    def __init__(self, inventory):
+        self.inventory = inventory
+        self._text = ""
+        self._result = None
+
+    def reset(self, inventory=None):
+        """Forget cached results (call after the inventory changes)."""
+        if inventory is not None:
+            self.inventory = inventory
+        self._result = None
+
+    def results(self, text):
+        prefix = text.strip().casefold()
+        if self._result is not None and prefix == self._text:
+            return self._result
+        if self._result is not None and self._text and prefix.startswith(self._text):
+            self._result = [it for it in self._result if matches(it, prefix)]
+        else:
+            self._result = self.inventory.search(prefix)
+        self._text = prefix
+        return self._result
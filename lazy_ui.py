@@ -0,0 +1,82 @@
+"""
+Helpers for a fast first paint in the Tk apps.
+
+- LazyNotebook: a ttk.Notebook whose pages are built the first time they are
+  shown, so startup only pays for the page on screen.
+- after_first_paint: run something once the window is up (e.g. load the theme).
+- load_theme: apply an optional ttkthemes theme to an existing window; the
+  package is only imported when this is called.
+- recolor: swap colors on plain tk widgets after a theme change.
+"""
+
+import tkinter as tk
+from tkinter import ttk
+
+
+class LazyNotebook:
+    """Tabs whose contents are built by `build(page)` on first show."""
+
+    def __init__(self, parent, **kw):
+        self.notebook = ttk.Notebook(parent, **kw)
+        self._pages = {}  # title -> (page frame, build function)
+        self.built = set()
+        self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
+
+    def pack(self, **kw):
+        self.notebook.pack(**kw)
+
+    def add(self, title, build, padding=8):
+        """Add an (empty) tab; `build(page)` fills it when it is first selected."""
+        page = ttk.Frame(self.notebook, padding=padding)
+        self.notebook.add(page, text=title)
+        self._pages[title] = (page, build)
+        return page
+
+    def build(self, title):
+        """Build a tab now if it has not been built yet."""
+        if title in self.built:
+            return
+        self.built.add(title)
+        page, build = self._pages[title]
+        build(page)
+
+    def select(self, title):
+        self.notebook.select(self._pages[title][0])
+        self.build(title)
+
+    def _on_tab_changed(self, event=None):
+        self.build(self.notebook.tab(self.notebook.select(), "text"))
+
+
+def after_first_paint(root, callback):
+    """Call `callback()` once, after the window is mapped and has drawn itself."""
+    fired = []
+
+    def on_map(event):
+        if event.widget is root and not fired:
+            fired.append(True)
+            root.after_idle(callback)  # idle: after the pending redraws
+
+    root.bind("<Map>", on_map, add="+")
+
+
+def load_theme(root, name):
+    """Apply ttkthemes theme `name` to `root`. Returns the style, or None if ttkthemes is missing."""
+    try:
+        from ttkthemes import ThemedStyle
+    except ImportError:
+        return None
+    return ThemedStyle(root, theme=name)
+
+
+def recolor(widget, colors):
+    """Recursively replace colors (old -> new in `colors`) on plain tk widgets."""
+    for option in ("background", "foreground", "insertbackground"):
+        try:
+            value = str(widget.cget(option))
+        except tk.TclError:  # ttk widgets take their colors from the style
+            continue
+        if value in colors:
+            widget.configure({option: colors[value]})
+    for child in widget.winfo_children():
+        recolor(child, colors)
@@ -1,10 +1,12 @@
-import random
 import tkinter as tk
-import json
+import dice
+import rules
+from serialization import load_file, save_file, validate_character
+from inventory import item_label
+from lazy_ui import after_first_paint, load_theme, recolor
 import platform
 
 from tkinter import ttk
-from ttkthemes import ThemedTk
 
 
 
@@ -66,44 +68,41 @@ character = {
 def skill_modifier(skill_name):
     skill = character["skills"][skill_name]
     ability = skill["ability"]
-    return mods[ability] + skill["prof"]
+    return mods[ability] + skill.get("prof", 0)  # prof is optional (serialization.CHARACTER_SCHEMA)
 
 def save_character(character, filename="character.json"):
-    with open(filename, "w") as f:
-        json.dump(character, f, indent=4)
+    # Atomic write so a crash mid-save can't truncate the file.
+    save_file(filename, character, validate=validate_character)
         
 
 def load_character(filename="character.json"):
-    with open(filename, "r") as f:
-        return json.load(f)
+    # Raises ValueError (with the offending field) if the file is malformed.
+    return load_file(filename, validate=validate_character)
 
 
 
-def roll_to_hit(weapon):
-    return roll_with_mod(20, 1, weapon['hit_mod'])
+def roll_to_hit(weapon, mode="normal"):
+    return rules.roll_to_hit(weapon, mode)
 
-def roll_damage(weapon):
-    return roll(weapon["damage_die"], weapon["damage_die_count"]) + weapon["damage_mod"]
+def roll_damage(weapon, crit=False):
+    return rules.roll_damage(weapon, crit)
 
 
 def mod_formula(stat):
     value = ((character["stats"][stat] - 10) // 2)
     return value
 
-mods = {
-    "STR": mod_formula('STR'),
-    "DEX": mod_formula("DEX"),
-    "CON": mod_formula("CON"),
-    "INT": mod_formula("INT"),
-    "WIS": mod_formula("WIS"),
-    "CHA": mod_formula("CHA"),
-}
+mods = {}
+
+def refresh_mods():
+    # Recompute in place after every load so the modifiers never go stale.
+    mods.clear()
+    mods.update({stat: mod_formula(stat) for stat in character["stats"]})
+
+refresh_mods()
 
 def roll(d_number, d_count=1):
-    value = 0
-    for i in range(d_count):
-        value += random.randint(1, d_number)
-    return value
+    return dice.roll(d_number, d_count)
 
 def roll_with_mod(d_number, d_count, ability):
     return (roll(d_number, d_count) + mods[ability])
@@ -118,40 +117,43 @@ def gui_app():
     global character
     try:
         character = load_character("character.json")
+        refresh_mods()
     except FileNotFoundError:
         pass  # stick with defaults if no file
+    except ValueError as e:
+        print(f"Could not load character.json: {e}")  # malformed file; keep defaults
 
-    root = ThemedTk(theme="black")
+    # Plain Tk first; the "black" theme is loaded after the first frame (see the end).
+    root = tk.Tk()
     root.title("D&D Helper - Modern UI")
     root.geometry("800x600")
 
-    # Use the ThemedTk's current theme colors for accent and background
+    # Use the current theme colors for accent and background
     themed_style = ttk.Style(root)
-    # Remove border for pill shape
-    themed_style.layout("Accent.TButton", [
-        ("Button.padding", {"children": [
-            ("Button.label", {"side": "left", "expand": 1})
-        ], "sticky": "nswe"})
-    ])
-    # Get themed background and foreground if available
-    try:
-        accent_bg = STYLE["accent"]
-        accent_fg = STYLE["text"]
-    except Exception:
+
+    def style_accent_button():
+        # Remove border for pill shape (styles are per theme, so this is redone after the theme loads)
+        themed_style.layout("Accent.TButton", [
+            ("Button.padding", {"children": [
+                ("Button.label", {"side": "left", "expand": 1})
+            ], "sticky": "nswe"})
+        ])
         accent_bg = STYLE["accent"]
         accent_fg = STYLE["text"]
-    themed_style.configure(
-        "Accent.TButton",
-        background=accent_bg,
-        foreground=accent_fg,
-        font=STYLE["font_normal"],
-        padding=(12, 6),  # pill shape
-        highlightthickness=0,
-        relief="flat",
-        borderwidth=0,
-        focuscolor=accent_bg
-    )
-    
+        themed_style.configure(
+            "Accent.TButton",
+            background=accent_bg,
+            foreground=accent_fg,
+            font=STYLE["font_normal"],
+            padding=(12, 6),  # pill shape
+            highlightthickness=0,
+            relief="flat",
+            borderwidth=0,
+            focuscolor=accent_bg
+        )
+
+    style_accent_button()
+
     # -- Outer frame with scrolling and scrollbar -- #
     # Use themed background for main backgrounds
     arc_bg = themed_style.lookup("TFrame", "background", default="#ECECEC")
@@ -197,6 +199,7 @@ def gui_app():
         global character
         try:
             character = load_character()
+            refresh_mods()
             # Refresh GUI
             name_entry.delete(0, tk.END)
             name_entry.insert(0, character["name"])
@@ -207,12 +210,14 @@ def gui_app():
             ac_entry.delete(0, tk.END)
             ac_entry.insert(0, character["ac"])
             notes_text.delete("1.0", tk.END)
-            notes_text.insert("1.0", character["notes"])
+            notes_text.insert("1.0", character.get("notes", ""))
             inventory_listbox.delete(0, tk.END)
-            for item in character["inventory"]:
-                inventory_listbox.insert(tk.END, item)
+            for item in character.get("inventory", []):
+                inventory_listbox.insert(tk.END, item_label(item))
         except FileNotFoundError:
             print("No saved character file found!")
+        except ValueError as e:
+            print(f"Could not load character.json: {e}")
 
     def update_notes():
         character["notes"] = notes_text.get("1.0", tk.END).strip()
@@ -244,7 +249,9 @@ def gui_app():
 
     tk.Label(
         info_frame,
-        text=f'Level {character["level"]} {character["race"]} {character["class"]}',
+        # race / class / level are optional in CHARACTER_SCHEMA
+        text=" ".join(p for p in (f"Level {character['level']}" if "level" in character else "",
+                                       character.get("race", ""), character.get("class", "")) if p),
         bg=arc_bg, fg=arc_fg, font=STYLE["font_normal"]
     ).grid(row=0, column=2, padx=10, pady=4)
 
@@ -271,7 +278,7 @@ def gui_app():
 
     skill_result_labels = {}
 
-    for i, skill_name in enumerate(character["skills"].keys()):
+    for i, skill_name in enumerate(character.get("skills", {})):
         mod = skill_modifier(skill_name)
 
         row = i // 3
@@ -329,7 +336,19 @@ def gui_app():
     weapons_frame = tk.LabelFrame(scrollable_frame, text="Weapons", padx=10, pady=5,  bg=arc_bg, fg=arc_fg, font=STYLE["font_title"])
     weapons_frame.pack(fill="x", pady=6, padx=6)
 
-    for row, (weapon_name, weapon) in enumerate(character["weapons"].items()):
+    last_crit = {}
+
+    def hit_clicked(name, weapon, lbl):
+        att = rules.attack_roll(weapon)
+        last_crit[name] = att["crit"]
+        note = " (nat 20, crit!)" if att["crit"] else " (nat 1, miss)" if att["fumble"] else ""
+        lbl.config(text=f"Hit: {att['total']}{note}", background=arc_bg)
+
+    def damage_clicked(name, weapon, lbl):
+        crit = last_crit.pop(name, False)
+        lbl.config(text=f"Damage: {roll_damage(weapon, crit)}" + (" (crit)" if crit else ""))
+
+    for row, (weapon_name, weapon) in enumerate(character.get("weapons", {}).items()):
         tk.Label(weapons_frame, text=weapon_name, bg=arc_bg, fg=arc_fg, font=STYLE["font_normal"]).grid(row=row, column=0, padx=6, pady=4, sticky="w")
 
         hit_result = tk.Label(weapons_frame, text="", bg=arc_bg, fg=arc_fg, font=STYLE["font_normal"])
@@ -337,10 +356,7 @@ def gui_app():
         ttk.Button(
             weapons_frame,
             text="Roll to Hit",
-            command=lambda w=weapon, lbl=hit_result: lbl.config(
-                text=f"Hit: {roll(20) + w['hit_mod']}",
-                background=arc_bg
-            ),
+            command=lambda n=weapon_name, w=weapon, lbl=hit_result: hit_clicked(n, w, lbl),
             style="Accent.TButton"
         ).grid(row=row, column=1, padx=6, pady=4)
 
@@ -349,9 +365,7 @@ def gui_app():
         ttk.Button(
             weapons_frame,
             text="Roll Damage",
-            command=lambda w=weapon, lbl=dmg_result: lbl.config(
-                text=f"Damage: {roll(w['damage_die'], w['damage_die_count']) + w['damage_mod']}",
-            ),
+            command=lambda n=weapon_name, w=weapon, lbl=dmg_result: damage_clicked(n, w, lbl),
             style="Accent.TButton"
         ).grid(row=row, column=3, padx=6, pady=4)
 
@@ -374,7 +388,7 @@ def gui_app():
     ac_entry.grid(row=1, column=1, padx=6, pady=4)
 
     def roll_initiative():
-        roll_val = random.randint(1, 20)
+        roll_val = roll(20)
         total = roll_val + mods["DEX"]
         initiative_result_label.config(text=total)
 
@@ -397,7 +411,7 @@ def gui_app():
     notes_frame.pack(side="left", fill="both", expand=True, padx=6, pady=6)
 
     notes_text = tk.Text(notes_frame, height=10, wrap="word", bg=arc_bg, fg=arc_fg, insertbackground=arc_fg, selectbackground=STYLE["accent2"], font=STYLE["font_normal"])
-    notes_text.insert("1.0", character["notes"])
+    notes_text.insert("1.0", character.get("notes", ""))
     notes_text.pack(fill="both", expand=True, padx=6, pady=6)
 
     inventory_frame = tk.LabelFrame(bottom_frame, text="Inventory", padx=10, pady=5, bg=arc_bg, fg=arc_fg, font=STYLE["font_title"])
@@ -405,8 +419,8 @@ def gui_app():
 
     inventory_listbox = tk.Listbox(inventory_frame, height=10, bg=arc_bg, fg=arc_fg, selectbackground=STYLE["accent2"], font=STYLE["font_normal"])
     inventory_listbox.pack(fill="both", expand=True, padx=6, pady=6)
-    for item in character["inventory"]:
-        inventory_listbox.insert(tk.END, item)
+    for item in character.get("inventory", []):
+        inventory_listbox.insert(tk.END, item_label(item))  # stacks from main2 show "name xN"
 
     new_item_entry = tk.Entry(inventory_frame, bg="#FFFFFF", fg=arc_fg, insertbackground=arc_fg, font=STYLE["font_normal"])
     new_item_entry.pack(fill="x", pady=6, padx=6)
@@ -414,7 +428,7 @@ def gui_app():
     def add_item():
         item = new_item_entry.get().strip()
         if item:
-            character["inventory"].append(item)
+            character.setdefault("inventory", []).append(item)
             inventory_listbox.insert(tk.END, item)
             new_item_entry.delete(0, tk.END)
 
@@ -454,6 +468,18 @@ def gui_app():
         style="Accent.TButton"
     ).pack(side="left", padx=10, pady=6)
 
+    def apply_theme():
+        # The plain tk widgets took their colors from the default theme; switch them over.
+        if load_theme(root, "black") is None:
+            return  # ttkthemes not installed: keep the default look
+        style_accent_button()
+        recolor(root, {
+            arc_bg: themed_style.lookup("TFrame", "background", default=arc_bg),
+            arc_fg: themed_style.lookup("TLabel", "foreground", default=arc_fg),
+        })
+
+    after_first_paint(root, apply_theme)
+
     root.mainloop()
     
 if __name__ == "__main__":
@@ -2,36 +2,49 @@
 Simple, readable D&D helper UI (Tkinter).
 
 Features:
-- Load / save character (JSON)
+- Load / save character (JSON) and a multi-character roster (SQLite)
+- Crash-safe autosave of HP, notes and inventory (atomic saves + change journal)
+- Hot reload: external edits to character.json show up without pressing Load
 - Ability checks & skills (shows modifiers)
-- Custom dice roller
-- Weapon To-Hit and Damage rolls
+- Custom dice roller (standard notation, e.g. 4d6kh3 + 2)
+- Weapon To-Hit and Damage rolls (advantage / disadvantage, crits) with hit odds
 - Initiative roll
-- Notes and inventory add/remove
-- Scrollable UI that works on Windows/macOS/Linux
+- Session roll history with running stats
+- Notes and an inventory with quantities, weights and a search filter
+  (only the visible rows are drawn, so huge loot lists stay fast)
+- Tabbed, scrollable UI that works on Windows/macOS/Linux; each tab is built
+  the first time it is shown and the theme loads after the first frame
 
 Keep it simple: small helper functions, clear variable names, and inline comments.
 """
 
-import random
-import json
 import copy
 import platform
+import queue
 import tkinter as tk
-from tkinter import ttk
-
-# Optional theme; if not installed we gracefully fall back to plain Tk.
-try:
-    from ttkthemes import ThemedTk
-    def make_root():
-        return ThemedTk(theme="black")
-except Exception:
-    def make_root():
-        return tk.Tk()
-
+from tkinter import messagebox, ttk
+
+from dice_expr import compile_expr
+from character_model import Character
+from roll_history import RollHistory
+from roster import Roster, ROSTER_FILE
+from autosave import Autosaver, atomic_write_text, recover
+from serialization import dumps, load_file, save_file, validate_character
+from file_watch import FileWatcher
+from view_model import RenderCache
+from inventory import Inventory, InventoryFilter
+from virtual_list import VirtualList
+from lazy_ui import LazyNotebook, after_first_paint, load_theme
+from rules import d20, attack_roll, roll_damage_detail
+from odds import ROLL_MODES, lookup_weapon_odds
 
 # ---------- Simple constants & defaults ----------
 CHAR_FILE = "character.json"
+JOURNAL_FILE = CHAR_FILE + ".journal"  # autosave deltas since the last full save
+AUTOSAVE_DELAY_MS = 1000  # journal is fsynced once edits pause this long
+COMPACT_SAVES = False  # True writes minified JSON (smaller/faster, harder to hand-edit)
+WATCH_POLL_MS = 250  # how often the UI picks up reloads parsed by the file watcher
+THEME = "black"  # optional ttkthemes theme, loaded after the first frame (plain Tk if missing)
 
 STYLE = {
     "font_title": ("Helvetica", 12, "bold"),
@@ -64,58 +77,19 @@ DEFAULT_CHARACTER = {
 
 # ---------- Utility functions (small and well-named) ----------
 def save_character_to_file(character, filename=CHAR_FILE):
-    """Write the character dict to disk as JSON."""
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(character, f, indent=4, ensure_ascii=False)
+    """Write the character (dict or Character) to disk as JSON."""
+    if isinstance(character, Character):
+        character = character.to_dict()
+    # Atomic: a crash mid-save leaves the previous file intact.
+    save_file(filename, character, compact=COMPACT_SAVES, validate=validate_character)
 
 
 def load_character_from_file(filename=CHAR_FILE):
-    """Return the character dict loaded from JSON (raises FileNotFoundError if missing)."""
-    with open(filename, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-
-def calc_mods(stats):
-    """Return ability modifiers (e.g. STR 15 -> +2)."""
-    return {ab: (val - 10) // 2 for ab, val in stats.items()}
-
-
-def roll(d_sides, count=1):
-    """Roll `count` dice of `d_sides` and return the sum."""
-    return sum(random.randint(1, d_sides) for _ in range(count))
-
-
-def roll_with_mod(d_sides, count, mod):
-    """Roll dice and add a flat modifier."""
-    return roll(d_sides, count) + mod
-
-
-def ability_check(character, ability):
-    """Do a 1d20 ability check using the character's modifier for `ability`."""
-    mods = calc_mods(character["stats"])
-    return roll_with_mod(20, 1, mods[ability])
-
-
-def skill_modifier(character, skill_name):
-    """Return the total skill modifier (ability mod + proficiency)."""
-    skill = character["skills"][skill_name]
-    mods = calc_mods(character["stats"])
-    return mods[skill["ability"]] + skill.get("prof", 0)
-
-
-def skill_check(character, skill_name):
-    """Perform a skill check (1d20 + skill modifier)."""
-    return roll(20) + skill_modifier(character, skill_name)
-
-
-def roll_to_hit(weapon):
-    """Return a single d20 roll + weapon hit modifier."""
-    return roll(20) + weapon.get("hit_mod", 0)
-
-
-def roll_damage(weapon):
-    """Roll weapon damage dice and add damage modifier."""
-    return roll(weapon["damage_die"], weapon["damage_die_count"]) + weapon.get("damage_mod", 0)
+    """
+    Return the validated character dict loaded from JSON.
+    Raises FileNotFoundError if missing, ValueError (SchemaError / JSONDecodeError) if malformed.
+    """
+    return load_file(filename, validate=validate_character)
 
 
 # ---------- GUI (grouped into small helper sections) ----------
@@ -131,14 +105,74 @@ def gui_app():
     except FileNotFoundError:
         # It's fine — we'll use the default character and let the user save later.
         pass
-
-    # Root window
-    root = make_root()
+    except ValueError as e:
+        # Malformed file (bad JSON or wrong structure): say why and start from defaults.
+        print(f"Could not load {CHAR_FILE}: {e}")
+
+    # Cached modifiers / skill totals over the same dict (see character_model.py).
+    model = Character(character)
+
+    # The inventory lives in an indexed Inventory while the app runs; the
+    # plain list in `character` is rebuilt from it only when needed.
+    inventory = Inventory(character.get("inventory", []))
+    inventory_filter = InventoryFilter(inventory)
+
+    def sync_inventory():
+        character["inventory"] = inventory.to_json()
+
+    def replace_character(loaded):
+        # Update the existing dict in place so closures keep working, and
+        # re-index at once: any compact() from here on rebuilds
+        # character["inventory"] from `inventory` (see sync_inventory).
+        model.replace(loaded)
+        inventory.load(character.get("inventory", []))
+
+    # Every roll this session (bounded) + running stats for the Session Stats panel.
+    history = RollHistory(capacity=1000)
+    session_stats_label = None
+
+    def log_roll(kind, expression, faces, total):
+        history.record(kind, expression, faces, total)
+        if session_stats_label:
+            session_stats_label.config(text="\n".join(history.summary_lines()))
+
+    def roll_d20_check(kind, label, mod, what):
+        """Roll 1d20 + mod, show it in `label` and log it."""
+        face = d20()
+        label.config(text=str(face + mod))
+        log_roll(kind, f"1d20{mod:+d} ({what})", (face,), face + mod)
+
+    # Root window (plain Tk; the theme is applied once the window is up)
+    root = tk.Tk()
+
+    # Autosave: edits go to a small journal next to CHAR_FILE and are folded
+    # into a full (atomic) save every so often. Replay anything left over from
+    # a crash before the UI reads the character.
+    watcher = FileWatcher(CHAR_FILE, load_character_from_file)
+
+    def save_working_copy(data):
+        # Runs on the autosave worker with a copy of the character.
+        # Same as save_character_to_file, but the watcher learns the content
+        # before it hits the disk, so our own save is never reported back.
+        validate_character(data)
+        text = dumps(data, compact=COMPACT_SAVES)
+        watcher.expect_own_write(text)
+        atomic_write_text(CHAR_FILE, text)
+
+    autosaver = Autosaver(root, character, save_working_copy, JOURNAL_FILE,
+                          delay_ms=AUTOSAVE_DELAY_MS, prepare=sync_inventory)
+    if recover(character, JOURNAL_FILE):
+        model.invalidate()
+        inventory.load(character.get("inventory", []))
+        autosaver.compact()
     root.title("D&D Helper")
     root.geometry("800x600")
 
-    style = ttk.Style()
-    style.configure("Accent.TButton", font=STYLE["font_normal"], padding=(8, 4))
+    def configure_styles():
+        # Styles belong to a theme, so this runs again after the theme loads.
+        ttk.Style().configure("Accent.TButton", font=STYLE["font_normal"], padding=(8, 4))
+
+    configure_styles()
 
     # Scrollable area setup (common Tk pattern: canvas + inner frame)
     outer = tk.Frame(root)
@@ -174,56 +208,185 @@ def gui_app():
         canvas.bind_all("<MouseWheel>", _on_mousewheel)
 
     # ---------- Helper to refresh UI widgets from `character` ----------
-    # We'll create widget references below and update them here.
+    # Widgets are created when their tab is first shown (see the builders
+    # below); until then they are None / empty and their refreshers do nothing.
     stats_buttons = {}
     stats_result_labels = {}
     skill_buttons = {}
     skill_result_labels = {}
-    inventory_listbox = None
+    weapon_odds_labels = {}
+    weapon_rows = {}  # weapon name -> every widget in its row
+    stats_frame = None
+    skills_frame = None
+    weapons_frame = None
+    info_label = None
+    inventory_list = None
+    inventory_filter_entry = None
+    inventory_weight_label = None
     notes_text = None
     hp_current_entry = None
     hp_max_entry = None
     ac_entry = None
     name_entry = None
     initiative_result_label = None
-
-    def refresh_ui():
-        """Update UI widgets so they reflect the current `character` data."""
-        mods = calc_mods(character["stats"])
-
-        # Basic fields
-        name_entry.delete(0, tk.END)
-        name_entry.insert(0, character["name"])
-        hp_current_entry.delete(0, tk.END)
-        hp_current_entry.insert(0, character["hp"]["current"])
-        hp_max_entry.delete(0, tk.END)
-        hp_max_entry.insert(0, character["hp"]["max"])
-        ac_entry.delete(0, tk.END)
-        ac_entry.insert(0, character["ac"])
-        notes_text.delete("1.0", tk.END)
-        notes_text.insert("1.0", character.get("notes", ""))
-
-        # Inventory
-        inventory_listbox.delete(0, tk.END)
-        for it in character.get("inventory", []):
-            inventory_listbox.insert(tk.END, it)
-
-        # Update stats & skill button labels to show current modifiers
+    roll_mode = None
+    target_ac_entry = None
+
+    # What each widget currently shows (see view_model.py); refreshers write
+    # only the differences, so unchanged fields, notes and rows are left alone.
+    view = RenderCache()
+
+    def write_entry(entry):
+        def write(value):
+            entry.delete(0, tk.END)
+            entry.insert(0, value)
+        return write
+
+    def replace_notes(start, end, inserted):
+        if end is None:  # first render
+            notes_text.delete("1.0", tk.END)
+        else:
+            notes_text.delete(f"1.0+{start}c", f"1.0+{end}c")
+        if inserted:
+            notes_text.insert(f"1.0+{start}c", inserted)
+
+    def write_mod_button(btn, result_label):
+        def write(text):
+            btn.config(text=text)
+            result_label.config(text="")  # clear last result (the modifier changed)
+        return write
+
+    # One refresher per top-level character key, so a reload can skip the
+    # sections whose data did not change.
+    def refresh_name():
+        view.field("name", str(character["name"]), write_entry(name_entry))
+
+    def refresh_hp():
+        if hp_current_entry is None:  # Combat tab not built yet
+            return
+        view.field("hp_current", str(character["hp"]["current"]), write_entry(hp_current_entry))
+        view.field("hp_max", str(character["hp"]["max"]), write_entry(hp_max_entry))
+
+    def refresh_ac():
+        if ac_entry is None:
+            return
+        view.field("ac", str(character["ac"]), write_entry(ac_entry))
+
+    def refresh_notes():
+        if notes_text is None:
+            return
+        view.text("notes", character.get("notes", ""), replace_notes)
+
+    def refresh_inventory():
+        # `inventory` was already re-indexed by replace_character().
+        show_inventory()
+
+    def show_inventory():
+        if inventory_list is None:
+            return
+        inventory_filter.reset()
+        inventory_list.set_rows(inventory_filter.results(inventory_filter_entry.get()))
+        inventory_weight_label.config(text=f"{len(inventory)} item(s), {inventory.total_weight:g} lb")
+
+    def clear_rows(kind, widgets, *maps):
+        """Destroy a section's rows (a reload added or removed keys); the builder draws them anew."""
+        for widget in widgets:
+            widget.destroy()
+        if kind is not None:  # their buttons' text is tracked in `view`
+            for key in maps[0]:
+                view.forget((kind, key))
+        for m in maps:
+            m.clear()
+
+    def refresh_info():
+        if info_label is not None:
+            view.field("info", info_text(), lambda text: info_label.config(text=text))
+
+    def refresh_stats():
+        # (stats_frame is None until the Checks tab is built)
+        if stats_frame is not None and stats_buttons.keys() != character["stats"].keys():
+            clear_rows("stat", [*stats_buttons.values(), *stats_result_labels.values()],
+                       stats_buttons, stats_result_labels)
+            build_stat_rows()
+        # Update stats button labels to show current modifiers
+        mods = model.mods
         for ab, btn in stats_buttons.items():
-            mod = mods[ab]
-            btn.config(text=f"{ab} ({mod:+d})")
-            stats_result_labels[ab].config(text="")  # clear last result
-
-        for sk, btn in skill_buttons.items():
-            # show total skill modifier (ability mod + prof)
-            sk_mod = skill_modifier(character, sk)
-            btn.config(text=f"{sk} ({sk_mod:+d})")
-            skill_result_labels[sk].config(text="")  # clear last result
+            view.field(("stat", ab), f"{ab} ({mods[ab]:+d})", write_mod_button(btn, stats_result_labels[ab]))
 
         # Clear initiative result
         if initiative_result_label:
             initiative_result_label.config(text="")
 
+    def refresh_skills():
+        if skills_frame is not None and skill_buttons.keys() != character.get("skills", {}).keys():
+            clear_rows("skill", [*skill_buttons.values(), *skill_result_labels.values()],
+                       skill_buttons, skill_result_labels)
+            build_skill_rows()
+        for sk, btn in skill_buttons.items():
+            # show total skill modifier (ability mod + prof); cached in `model`
+            view.field(("skill", sk), f"{sk} ({model.skill_modifier(sk):+d})", write_mod_button(btn, skill_result_labels[sk]))
+
+    def target_ac():
+        try:
+            return int(target_ac_entry.get())
+        except ValueError:
+            return None
+
+    def refresh_weapon_odds(event=None):
+        """Show hit / crit / average damage from the cached odds tables (no sampling)."""
+        if roll_mode is None:
+            return
+        ac, mode = target_ac(), roll_mode.get()
+        for name, lbl in weapon_odds_labels.items():
+            weapon = character.get("weapons", {}).get(name)
+            if weapon is None or ac is None:
+                lbl.config(text="")
+                continue
+            try:
+                o = lookup_weapon_odds(weapon, ac, mode)
+            except ValueError:
+                lbl.config(text="odds n/a")
+                continue
+            lbl.config(text=f"vs AC {ac}: hit {o['hit']:.0%}, crit {o['crit']:.0%}, avg {o['expected_damage']:.1f}")
+
+    def refresh_weapons():
+        if weapons_frame is None:  # Combat tab not built yet
+            return
+        if weapon_rows.keys() != character.get("weapons", {}).keys():
+            clear_rows(None, [w for row in weapon_rows.values() for w in row], weapon_rows, weapon_odds_labels)
+            last_crit.clear()
+            build_weapon_rows()
+        refresh_weapon_odds()
+
+    section_refreshers = {
+        "name": (refresh_name,),
+        "race": (refresh_info,),
+        "class": (refresh_info,),
+        "level": (refresh_info,),
+        "hp": (refresh_hp,),
+        "ac": (refresh_ac,),
+        "notes": (refresh_notes,),
+        "inventory": (refresh_inventory,),
+        "stats": (refresh_stats, refresh_skills),
+        "skills": (refresh_skills,),
+        "weapons": (refresh_weapons,),
+    }
+
+    def refresh_ui(changed=None):
+        """Update UI widgets from `character`; only the `changed` top-level keys if given."""
+        done = set()
+        for key, refreshers in section_refreshers.items():
+            if changed is not None and key not in changed:
+                continue
+            for fn in refreshers:
+                if fn not in done:  # e.g. skills are redrawn once even if stats changed too
+                    done.add(fn)
+                    fn()
+
+    # Typing into an entry changes what it shows; keep the view-model in step.
+    def track_entry(key, entry):
+        entry.bind("<KeyRelease>", lambda e: view.remember(key, entry.get()), add="+")
+
     # ---------- Top: Character info ----------
     info_frame = ttk.Frame(inner, padding=8)
     info_frame.pack(fill="x", padx=6, pady=4)
@@ -231,201 +394,446 @@ def gui_app():
     ttk.Label(info_frame, text="Character Name:", font=STYLE["font_normal"]).grid(row=0, column=0, sticky="e", padx=6)
     name_entry = tk.Entry(info_frame, width=24, font=STYLE["font_normal"])
     name_entry.grid(row=0, column=1, sticky="w", padx=6)
-    ttk.Label(info_frame, text=f'Level {character["level"]} {character["race"]} {character["class"]}', font=STYLE["font_normal"]).grid(row=0, column=2, padx=10)
-
-    # ---------- Ability checks ----------
-    stats_frame = ttk.LabelFrame(inner, text="Ability Checks", padding=8)
-    stats_frame.pack(fill="x", padx=6, pady=6)
-
-    # one button per ability, and a label for result beneath it
-    for col, ability in enumerate(character["stats"].keys()):
-        # result label (shows the numeric roll result)
-        res_lbl = ttk.Label(stats_frame, text="", font=STYLE["font_normal"])
-        res_lbl.grid(row=1, column=col, padx=6, pady=4)
-        stats_result_labels[ability] = res_lbl
-
-        # button runs an ability_check and shows the result in the label
-        btn = ttk.Button(
-            stats_frame,
-            text=ability,  # will be updated by refresh_ui()
-            command=lambda a=ability: stats_result_labels[a].config(text=str(ability_check(character, a))),
-            style="Accent.TButton"
-        )
-        btn.grid(row=0, column=col, padx=6, pady=4)
-        stats_buttons[ability] = btn
-
-    # ---------- Skills ----------
-    skills_frame = ttk.LabelFrame(inner, text="Skills", padding=8)
-    skills_frame.pack(fill="x", padx=6, pady=6)
-
-    for i, skill_name in enumerate(character["skills"].keys()):
-        row = (i // 3) * 2       # two rows per skill (button + result label)
-        col = (i % 3)
-        sk_res_lbl = ttk.Label(skills_frame, text="", font=STYLE["font_normal"])
-        sk_res_lbl.grid(row=row + 1, column=col, padx=6, pady=4, sticky="w")
-        skill_result_labels[skill_name] = sk_res_lbl
-
-        sk_btn = ttk.Button(
-            skills_frame,
-            text=skill_name,  # will be updated by refresh_ui()
-            command=lambda s=skill_name: skill_result_labels[s].config(text=str(skill_check(character, s))),
-            style="Accent.TButton"
-        )
-        sk_btn.grid(row=row, column=col, padx=6, pady=4, sticky="w")
-        skill_buttons[skill_name] = sk_btn
-
-    # ---------- Custom roller ----------
-    roller_frame = ttk.LabelFrame(inner, text="Custom Roller", padding=8)
-    roller_frame.pack(fill="x", padx=6, pady=6)
-
-    dice_count_entry = tk.Entry(roller_frame, width=5, font=STYLE["font_normal"])
-    dice_count_entry.insert(0, "1")
-    dice_count_entry.grid(row=0, column=0, padx=6)
-
-    ttk.Label(roller_frame, text="d", font=STYLE["font_normal"]).grid(row=0, column=1)
-    dice_sides_entry = tk.Entry(roller_frame, width=6, font=STYLE["font_normal"])
-    dice_sides_entry.insert(0, "20")
-    dice_sides_entry.grid(row=0, column=2, padx=6)
-
-    custom_result_lbl = ttk.Label(roller_frame, text="", font=STYLE["font_normal"])
-    custom_result_lbl.grid(row=1, column=0, columnspan=4, pady=6)
-
-    def roll_custom():
-        try:
-            cnt = int(dice_count_entry.get())
-            sides = int(dice_sides_entry.get())
-            total = roll(sides, cnt)
-            custom_result_lbl.config(text=f"Rolled {cnt}d{sides}: {total}")
-        except ValueError:
-            custom_result_lbl.config(text="Please enter valid whole numbers")
-
-    ttk.Button(roller_frame, text="Roll!", command=roll_custom, style="Accent.TButton").grid(row=0, column=3, padx=8)
-
-    # ---------- Weapons ----------
-    weapons_frame = ttk.LabelFrame(inner, text="Weapons", padding=8)
-    weapons_frame.pack(fill="x", padx=6, pady=6)
-
-    for r, (w_name, w_data) in enumerate(character["weapons"].items()):
-        ttk.Label(weapons_frame, text=w_name, font=STYLE["font_normal"]).grid(row=r, column=0, padx=6, pady=4, sticky="w")
-
-        hit_lbl = ttk.Label(weapons_frame, text="", font=STYLE["font_normal"])
-        hit_lbl.grid(row=r, column=2, padx=6, pady=4)
-        ttk.Button(
-            weapons_frame,
-            text="Roll to Hit",
-            command=lambda wd=w_data, lbl=hit_lbl: lbl.config(text=f"Hit: {roll_to_hit(wd)}"),
-            style="Accent.TButton"
-        ).grid(row=r, column=1, padx=6, pady=4)
-
-        dmg_lbl = ttk.Label(weapons_frame, text="", font=STYLE["font_normal"])
-        dmg_lbl.grid(row=r, column=4, padx=6, pady=4)
-        ttk.Button(
-            weapons_frame,
-            text="Roll Damage",
-            command=lambda wd=w_data, lbl=dmg_lbl: lbl.config(text=f"Damage: {roll_damage(wd)}"),
-            style="Accent.TButton"
-        ).grid(row=r, column=3, padx=6, pady=4)
-
-    # ---------- Combat stats (HP / AC / Initiative) ----------
-    combat_frame = ttk.LabelFrame(inner, text="Combat Stats", padding=8)
-    combat_frame.pack(fill="x", padx=6, pady=6)
-
-    ttk.Label(combat_frame, text="HP:", font=STYLE["font_normal"]).grid(row=0, column=0, sticky="e")
-    hp_current_entry = tk.Entry(combat_frame, width=6, font=STYLE["font_normal"])
-    hp_current_entry.grid(row=0, column=1, padx=6)
-    ttk.Label(combat_frame, text="/", font=STYLE["font_normal"]).grid(row=0, column=2)
-    hp_max_entry = tk.Entry(combat_frame, width=6, font=STYLE["font_normal"])
-    hp_max_entry.grid(row=0, column=3, padx=6)
-
-    ttk.Label(combat_frame, text="AC:", font=STYLE["font_normal"]).grid(row=1, column=0, sticky="e")
-    ac_entry = tk.Entry(combat_frame, width=6, font=STYLE["font_normal"])
-    ac_entry.grid(row=1, column=1, padx=6)
-
-    def roll_initiative():
-        mods = calc_mods(character["stats"])
-        initiative_result_label.config(text=str(roll(20) + mods["DEX"]))
-
-    ttk.Label(combat_frame, text="Initiative:", font=STYLE["font_normal"]).grid(row=2, column=0, sticky="e")
-    ttk.Button(combat_frame, text="+DEX", command=roll_initiative, style="Accent.TButton").grid(row=2, column=1, padx=6)
-    initiative_result_label = ttk.Label(combat_frame, text="", font=STYLE["font_normal"])
-    initiative_result_label.grid(row=2, column=2, padx=6)
+    track_entry("name", name_entry)
+
+    def info_text():
+        # race / class / level are optional in CHARACTER_SCHEMA (NPCs, monsters)
+        level = character.get("level")
+        parts = [f"Level {level}" if level is not None else "", character.get("race", ""), character.get("class", "")]
+        return " ".join(p for p in parts if p)
+
+    info_label = ttk.Label(info_frame, text="", font=STYLE["font_normal"])  # filled by refresh_info()
+    info_label.grid(row=0, column=2, padx=10)
+
+    # ---------- Sections: one tab each, built the first time it is shown ----------
+    tabs = LazyNotebook(inner)
+
+    # ---------- Ability checks & skills ----------
+    def build_checks(page):
+        nonlocal stats_frame, skills_frame
+        stats_frame = ttk.LabelFrame(page, text="Ability Checks", padding=8)
+        stats_frame.pack(fill="x", padx=6, pady=6)
+        skills_frame = ttk.LabelFrame(page, text="Skills", padding=8)
+        skills_frame.pack(fill="x", padx=6, pady=6)
+        refresh_stats()
+        refresh_skills()
+
+    def build_stat_rows():
+        # one button per ability, and a label for result beneath it
+        for col, ability in enumerate(character["stats"].keys()):
+            # result label (shows the numeric roll result)
+            res_lbl = ttk.Label(stats_frame, text="", font=STYLE["font_normal"])
+            res_lbl.grid(row=1, column=col, padx=6, pady=4)
+            stats_result_labels[ability] = res_lbl
+
+            # button runs an ability_check and shows the result in the label
+            btn = ttk.Button(
+                stats_frame,
+                text=ability,  # will be updated by refresh_ui()
+                command=lambda a=ability: roll_d20_check("Ability check", stats_result_labels[a], model.mod(a), a),
+                style="Accent.TButton"
+            )
+            btn.grid(row=0, column=col, padx=6, pady=4)
+            stats_buttons[ability] = btn
+
+    def build_skill_rows():
+        for i, skill_name in enumerate(character.get("skills", {})):
+            row = (i // 3) * 2       # two rows per skill (button + result label)
+            col = (i % 3)
+            sk_res_lbl = ttk.Label(skills_frame, text="", font=STYLE["font_normal"])
+            sk_res_lbl.grid(row=row + 1, column=col, padx=6, pady=4, sticky="w")
+            skill_result_labels[skill_name] = sk_res_lbl
+
+            sk_btn = ttk.Button(
+                skills_frame,
+                text=skill_name,  # will be updated by refresh_ui()
+                command=lambda s=skill_name: roll_d20_check("Skill check", skill_result_labels[s], model.skill_modifier(s), s),
+                style="Accent.TButton"
+            )
+            sk_btn.grid(row=row, column=col, padx=6, pady=4, sticky="w")
+            skill_buttons[skill_name] = sk_btn
+
+    # ---------- Combat: HP / AC / Initiative and weapons ----------
+    def build_combat(page):
+        nonlocal hp_current_entry, hp_max_entry, ac_entry, initiative_result_label, roll_mode, target_ac_entry
+        nonlocal weapons_frame
+        combat_frame = ttk.LabelFrame(page, text="Combat Stats", padding=8)
+        combat_frame.pack(fill="x", padx=6, pady=6)
+
+        ttk.Label(combat_frame, text="HP:", font=STYLE["font_normal"]).grid(row=0, column=0, sticky="e")
+        hp_current_entry = tk.Entry(combat_frame, width=6, font=STYLE["font_normal"])
+        hp_current_entry.grid(row=0, column=1, padx=6)
+        ttk.Label(combat_frame, text="/", font=STYLE["font_normal"]).grid(row=0, column=2)
+        hp_max_entry = tk.Entry(combat_frame, width=6, font=STYLE["font_normal"])
+        hp_max_entry.grid(row=0, column=3, padx=6)
+
+        def autosave_hp(event=None):
+            for key, entry in (("current", hp_current_entry), ("max", hp_max_entry)):
+                try:
+                    autosaver.set(("hp", key), int(entry.get()))
+                except ValueError:
+                    pass  # half-typed number; wait for a valid one
+
+        hp_current_entry.bind("<KeyRelease>", autosave_hp)
+        hp_max_entry.bind("<KeyRelease>", autosave_hp)
+
+        ttk.Label(combat_frame, text="AC:", font=STYLE["font_normal"]).grid(row=1, column=0, sticky="e")
+        ac_entry = tk.Entry(combat_frame, width=6, font=STYLE["font_normal"])
+        ac_entry.grid(row=1, column=1, padx=6)
+
+        track_entry("hp_current", hp_current_entry)
+        track_entry("hp_max", hp_max_entry)
+        track_entry("ac", ac_entry)
+
+        def roll_initiative():
+            roll_d20_check("Initiative", initiative_result_label, model.initiative, "DEX")
+
+        ttk.Label(combat_frame, text="Initiative:", font=STYLE["font_normal"]).grid(row=2, column=0, sticky="e")
+        ttk.Button(combat_frame, text="+DEX", command=roll_initiative, style="Accent.TButton").grid(row=2, column=1, padx=6)
+        initiative_result_label = ttk.Label(combat_frame, text="", font=STYLE["font_normal"])
+        initiative_result_label.grid(row=2, column=2, padx=6)
+
+        weapons_frame = ttk.LabelFrame(page, text="Weapons", padding=8)
+        weapons_frame.pack(fill="x", padx=6, pady=6)
+
+        # Roll mode + target AC shared by every weapon row.
+        ttk.Label(weapons_frame, text="Roll:", font=STYLE["font_normal"]).grid(row=0, column=0, padx=6, pady=4, sticky="w")
+        roll_mode = ttk.Combobox(weapons_frame, values=ROLL_MODES, width=12, state="readonly")
+        roll_mode.set("normal")
+        roll_mode.grid(row=0, column=1, padx=6, pady=4)
+        ttk.Label(weapons_frame, text="Target AC:", font=STYLE["font_normal"]).grid(row=0, column=2, padx=6, pady=4, sticky="e")
+        target_ac_entry = tk.Entry(weapons_frame, width=5, font=STYLE["font_normal"])
+        target_ac_entry.insert(0, "15")
+        target_ac_entry.grid(row=0, column=3, padx=6, pady=4, sticky="w")
+
+        roll_mode.bind("<<ComboboxSelected>>", refresh_weapon_odds)
+        target_ac_entry.bind("<KeyRelease>", refresh_weapon_odds)
+
+        refresh_hp()
+        refresh_ac()
+        refresh_weapons()
+
+    last_crit = {}  # weapon name -> True if its last to-hit roll was a crit
+
+    def roll_weapon_hit(name, lbl):
+        att = attack_roll(character["weapons"][name], roll_mode.get(), target_ac())
+        last_crit[name] = att["crit"]
+        note = " (nat 20, crit!)" if att["crit"] else " (nat 1, miss)" if att["fumble"] else ""
+        if att["hit"] is not None and not note:
+            note = " (hit)" if att["hit"] else " (miss)"
+        lbl.config(text=f"Hit: {att['total']}{note}")
+        log_roll("To hit", f"1d20{character['weapons'][name].get('hit_mod', 0):+d} ({name})", (att["face"],), att["total"])
+
+    def roll_weapon_damage(name, lbl):
+        crit = last_crit.pop(name, False)
+        dmg, faces = roll_damage_detail(character["weapons"][name], crit=crit)
+        lbl.config(text=f"Damage: {dmg}" + (" (crit)" if crit else ""))
+        log_roll("Damage", name + (" (crit)" if crit else ""), faces, dmg)
+
+    def build_weapon_rows():
+        # Row 0 of weapons_frame holds the roll mode / target AC controls.
+        for r, w_name in enumerate(character.get("weapons", {}), start=1):
+            name_lbl = ttk.Label(weapons_frame, text=w_name, font=STYLE["font_normal"])
+            name_lbl.grid(row=r, column=0, padx=6, pady=4, sticky="w")
+
+            hit_lbl = ttk.Label(weapons_frame, text="", font=STYLE["font_normal"])
+            hit_lbl.grid(row=r, column=2, padx=6, pady=4)
+            hit_btn = ttk.Button(
+                weapons_frame,
+                text="Roll to Hit",
+                command=lambda n=w_name, lbl=hit_lbl: roll_weapon_hit(n, lbl),
+                style="Accent.TButton"
+            )
+            hit_btn.grid(row=r, column=1, padx=6, pady=4)
+
+            dmg_lbl = ttk.Label(weapons_frame, text="", font=STYLE["font_normal"])
+            dmg_lbl.grid(row=r, column=4, padx=6, pady=4)
+            dmg_btn = ttk.Button(
+                weapons_frame,
+                text="Roll Damage",
+                command=lambda n=w_name, lbl=dmg_lbl: roll_weapon_damage(n, lbl),
+                style="Accent.TButton"
+            )
+            dmg_btn.grid(row=r, column=3, padx=6, pady=4)
+
+            odds_lbl = ttk.Label(weapons_frame, text="", font=STYLE["font_normal"])
+            odds_lbl.grid(row=r, column=5, padx=6, pady=4, sticky="w")
+            weapon_odds_labels[w_name] = odds_lbl
+            weapon_rows[w_name] = (name_lbl, hit_lbl, hit_btn, dmg_lbl, dmg_btn, odds_lbl)
+
+    # ---------- Dice: custom roller and session stats ----------
+    def build_dice(page):
+        nonlocal session_stats_label
+        roller_frame = ttk.LabelFrame(page, text="Custom Roller", padding=8)
+        roller_frame.pack(fill="x", padx=6, pady=6)
+
+        ttk.Label(roller_frame, text="Dice:", font=STYLE["font_normal"]).grid(row=0, column=0)
+        dice_expr_entry = tk.Entry(roller_frame, width=24, font=STYLE["font_normal"])
+        dice_expr_entry.insert(0, "1d20")
+        dice_expr_entry.grid(row=0, column=1, columnspan=2, padx=6)
+
+        custom_result_lbl = ttk.Label(roller_frame, text="", font=STYLE["font_normal"])
+        custom_result_lbl.grid(row=1, column=0, columnspan=4, pady=6)
+
+        def roll_custom(event=None):
+            text = dice_expr_entry.get()
+            try:
+                expr = compile_expr(text)
+            except ValueError:
+                custom_result_lbl.config(text="Please enter a dice expression like 4d6kh3 + 2")
+                return
+            try:
+                total, parts = expr.check_limits().roll_detail()  # huge rolls would freeze the UI
+            except ValueError as e:
+                custom_result_lbl.config(text=str(e))
+                return
+            faces = "  ".join(f"{name} {kept}" for name, kept, _ in parts)
+            custom_result_lbl.config(text=f"Rolled {text.strip()}: {total}   {faces}")
+            log_roll("Custom", text.strip(), [f for _, kept, _ in parts for f in kept], total)
+
+        dice_expr_entry.bind("<Return>", roll_custom)
+
+        ttk.Button(roller_frame, text="Roll!", command=roll_custom, style="Accent.TButton").grid(row=0, column=3, padx=8)
+
+        # Session stats (read from the running aggregates only)
+        session_frame = ttk.LabelFrame(page, text="Session Stats", padding=8)
+        session_frame.pack(fill="x", padx=6, pady=6)
+        summary = "\n".join(history.summary_lines()) if history.total_rolls else "No rolls yet."
+        session_stats_label = ttk.Label(session_frame, text=summary, font=STYLE["font_normal"], justify="left")
+        session_stats_label.pack(side="left", anchor="w", padx=6)
+
+        def reset_session_stats():
+            history.clear()
+            session_stats_label.config(text="No rolls yet.")
+
+        ttk.Button(session_frame, text="Reset", command=reset_session_stats, style="Accent.TButton").pack(side="right", padx=6)
 
     # ---------- Notes and Inventory ----------
-    bottom_frame = ttk.Frame(inner)
-    bottom_frame.pack(fill="both", expand=True, padx=6, pady=6)
-
-    notes_frame = ttk.LabelFrame(bottom_frame, text="Notes", padding=8)
-    notes_frame.pack(side="left", fill="both", expand=True, padx=6, pady=6)
-    notes_text = tk.Text(notes_frame, height=10, wrap="word", font=STYLE["font_normal"])
-    notes_text.pack(fill="both", expand=True)
-
-    inventory_frame = ttk.LabelFrame(bottom_frame, text="Inventory", padding=8)
-    inventory_frame.pack(side="right", fill="both", expand=True, padx=6, pady=6)
-
-    inventory_listbox = tk.Listbox(inventory_frame, height=10, font=STYLE["font_normal"])
-    inventory_listbox.pack(fill="both", expand=True, padx=6, pady=6)
-
-    new_item_entry = tk.Entry(inventory_frame, font=STYLE["font_normal"])
-    new_item_entry.pack(fill="x", padx=6)
+    def build_notes(page):
+        nonlocal notes_text, inventory_list, inventory_filter_entry, inventory_weight_label
+        bottom_frame = ttk.Frame(page)
+        bottom_frame.pack(fill="both", expand=True, padx=6, pady=6)
+
+        notes_frame = ttk.LabelFrame(bottom_frame, text="Notes", padding=8)
+        notes_frame.pack(side="left", fill="both", expand=True, padx=6, pady=6)
+        notes_text = tk.Text(notes_frame, height=10, wrap="word", font=STYLE["font_normal"])
+        notes_text.pack(fill="both", expand=True)
+        def notes_edited(event=None):
+            view.remember("notes", notes_text.get("1.0", "end-1c"))  # exactly what is on screen
+            autosaver.edit_text(("notes",), notes_text.get("1.0", tk.END).strip())
+
+        notes_text.bind("<KeyRelease>", notes_edited)
+
+        inventory_frame = ttk.LabelFrame(bottom_frame, text="Inventory", padding=8)
+        inventory_frame.pack(side="right", fill="both", expand=True, padx=6, pady=6)
+
+        # Filter box: narrows the list as you type (prefix of the name or any word in it)
+        filter_row = ttk.Frame(inventory_frame)
+        filter_row.pack(fill="x", padx=6)
+        ttk.Label(filter_row, text="Filter:", font=STYLE["font_normal"]).pack(side="left")
+        inventory_filter_entry = tk.Entry(filter_row, font=STYLE["font_normal"])
+        inventory_filter_entry.pack(side="left", fill="x", expand=True, padx=6)
+        inventory_filter_entry.bind(
+            "<KeyRelease>",
+            lambda e: inventory_list.set_rows(inventory_filter.results(inventory_filter_entry.get())),
+        )
 
-    def add_item():
-        it = new_item_entry.get().strip()
-        if it:
-            character.setdefault("inventory", []).append(it)
-            inventory_listbox.insert(tk.END, it)
+        inventory_list = VirtualList(inventory_frame, height=10, label=lambda item: item.label(), font=STYLE["font_normal"])
+        inventory_list.pack(fill="both", expand=True, padx=6, pady=6)
+        inventory_weight_label = ttk.Label(inventory_frame, text="", font=STYLE["font_normal"])
+        inventory_weight_label.pack(anchor="w", padx=6)
+
+        # New item: name, quantity and weight per item (lb)
+        add_row = ttk.Frame(inventory_frame)
+        add_row.pack(fill="x", padx=6)
+        new_item_entry = tk.Entry(add_row, font=STYLE["font_normal"])
+        new_item_entry.pack(side="left", fill="x", expand=True)
+        ttk.Label(add_row, text="Qty", font=STYLE["font_normal"]).pack(side="left", padx=(6, 2))
+        new_qty_entry = tk.Entry(add_row, width=4, font=STYLE["font_normal"])
+        new_qty_entry.insert(0, "1")
+        new_qty_entry.pack(side="left")
+        ttk.Label(add_row, text="Wt", font=STYLE["font_normal"]).pack(side="left", padx=(6, 2))
+        new_weight_entry = tk.Entry(add_row, width=5, font=STYLE["font_normal"])
+        new_weight_entry.pack(side="left")
+
+        def add_item():
+            name = new_item_entry.get().strip()
+            if not name:
+                return
+            try:
+                qty = max(1, int(new_qty_entry.get() or 1))
+                weight = float(new_weight_entry.get()) if new_weight_entry.get().strip() else None
+            except ValueError:
+                print("Quantity must be a whole number and weight a number.")
+                return
+            inventory.add(name, qty, weight)
+            autosaver.log({"op": "inv_add", "path": ["inventory"], "name": name, "qty": qty, "weight": weight})
+            show_inventory()
             new_item_entry.delete(0, tk.END)
 
-    def remove_selected_item():
-        sel = inventory_listbox.curselection()
-        if sel:
-            idx = sel[0]
-            inventory_listbox.delete(idx)
-            del character["inventory"][idx]
+        def remove_selected_item():
+            item = inventory_list.selected()
+            if item is not None:
+                inventory.remove(item.name)  # O(1) by name, no list shifting
+                autosaver.log({"op": "inv_remove", "path": ["inventory"], "name": item.name})
+                show_inventory()
+
+        btn_row = ttk.Frame(inventory_frame)
+        btn_row.pack(fill="x", pady=6)
+        ttk.Button(btn_row, text="Add", command=add_item, style="Accent.TButton").pack(side="left", padx=6)
+        ttk.Button(btn_row, text="Remove Selected", command=remove_selected_item, style="Accent.TButton").pack(side="right", padx=6)
 
-    btn_row = ttk.Frame(inventory_frame)
-    btn_row.pack(fill="x", pady=6)
-    ttk.Button(btn_row, text="Add", command=add_item, style="Accent.TButton").pack(side="left", padx=6)
-    ttk.Button(btn_row, text="Remove Selected", command=remove_selected_item, style="Accent.TButton").pack(side="right", padx=6)
+        refresh_notes()
+        show_inventory()
 
     # ---------- Save / Load controls ----------
     def update_combat_and_notes_from_ui():
-        # Safely read numeric fields and update character dict
-        try:
-            character["hp"]["current"] = int(hp_current_entry.get())
-        except Exception:
-            pass
-        try:
-            character["hp"]["max"] = int(hp_max_entry.get())
-        except Exception:
-            pass
-        try:
-            character["ac"] = int(ac_entry.get())
-        except Exception:
-            pass
-        character["notes"] = notes_text.get("1.0", tk.END).strip()
+        # Safely read numeric fields and update character dict. Tabs that were
+        # never opened hold no edits, so `character` is already current for them.
+        if hp_current_entry is not None:
+            try:
+                character["hp"]["current"] = int(hp_current_entry.get())
+            except Exception:
+                pass
+            try:
+                character["hp"]["max"] = int(hp_max_entry.get())
+            except Exception:
+                pass
+            try:
+                character["ac"] = int(ac_entry.get())
+            except Exception:
+                pass
+        if notes_text is not None:
+            character["notes"] = notes_text.get("1.0", tk.END).strip()
         character["name"] = name_entry.get().strip()
+        sync_inventory()
 
     def save_character_action():
         update_combat_and_notes_from_ui()
-        save_character_to_file(character)
+        autosaver.compact()  # full atomic save + fresh journal
 
     def load_character_action():
         try:
             loaded = load_character_from_file()
-            # update the existing dictionary in-place so closures keep working
-            character.clear()
-            character.update(loaded)
+            replace_character(loaded)
+            autosaver.discard()  # unsaved edits are discarded by a reload
             refresh_ui()
         except FileNotFoundError:
             print("No saved character file found.")
+        except ValueError as e:
+            print(f"Could not load {CHAR_FILE}: {e}")
+
+    # ---------- Roster (many characters in one SQLite file) ----------
+    def build_roster(page):
+        roster = Roster(ROSTER_FILE)
+        roster_frame = ttk.LabelFrame(page, text="Roster", padding=8)
+        roster_frame.pack(fill="x", padx=6, pady=6)
+        roster_choice = ttk.Combobox(roster_frame, values=roster.names(), width=20)
+        roster_choice.pack(side="left", padx=6)
+        party_label = ttk.Label(roster_frame, text="", font=STYLE["font_normal"], justify="left")
+
+        def refresh_roster():
+            # Summary columns only; no character is deserialized for the listing.
+            party = roster.list_party()
+            roster_choice.config(values=[c["name"] for c in party])
+            party_label.config(text="\n".join(
+                f"{c['name']} ({c['class'] or '-'} {c['level'] or '-'}): HP {c['hp_current']}/{c['hp_max']}"
+                for c in party
+            ) or "Roster is empty.")
+
+        def save_to_roster():
+            update_combat_and_notes_from_ui()
+            try:
+                roster.save(character)
+            except ValueError as e:
+                print(e)
+                return
+            roster_choice.set(character["name"])
+            refresh_roster()
+
+        def load_from_roster():
+            name = roster_choice.get().strip()
+            try:
+                replace_character(roster.load(name))
+            except KeyError:
+                print(f"No character named {name!r} in the roster.")
+                return
+            autosaver.compact()  # it becomes the working character in CHAR_FILE
+            refresh_ui()
+
+        def party_long_rest():
+            roster.long_rest()
+            refresh_roster()
+
+        ttk.Button(roster_frame, text="Save to Roster", command=save_to_roster, style="Accent.TButton").pack(side="left", padx=6)
+        ttk.Button(roster_frame, text="Load from Roster", command=load_from_roster, style="Accent.TButton").pack(side="left", padx=6)
+        ttk.Button(roster_frame, text="Party Long Rest", command=party_long_rest, style="Accent.TButton").pack(side="left", padx=6)
+        party_label.pack(side="left", padx=12)
+        refresh_roster()
+
+    tabs.add("Checks", build_checks)
+    tabs.add("Combat", build_combat)
+    tabs.add("Dice", build_dice)
+    tabs.add("Notes & Inventory", build_notes)
+    tabs.add("Roster", build_roster)
+    tabs.pack(fill="both", expand=True, padx=6, pady=6)
 
     control_frame = ttk.Frame(inner, padding=8)
     control_frame.pack(fill="x", padx=6, pady=6)
     ttk.Button(control_frame, text="Save Character", command=save_character_action, style="Accent.TButton").pack(side="left", padx=6)
     ttk.Button(control_frame, text="Load Character", command=load_character_action, style="Accent.TButton").pack(side="left", padx=6)
 
-    # Final UI sync
+    # Final UI sync (the first tab builds itself and fills its own widgets)
     refresh_ui()
+    tabs.build("Checks")
+
+    # ---------- Hot reload of external edits to CHAR_FILE ----------
+    def apply_external_change(loaded):
+        sync_inventory()
+        changed = {k for k in character.keys() | loaded.keys() if character.get(k) != loaded.get(k)}
+        if not changed:
+            return
+        autosaver.wait()  # let a snapshot in flight finish first
+        if autosaver.unsaved and not messagebox.askyesno(
+                "Character file changed",
+                f"{CHAR_FILE} was changed by another program.\n\n"
+                "Load it and discard your unsaved edits?\n"
+                "(No keeps your edits and saves them over the file.)"):
+            autosaver.compact()
+            return
+        replace_character(loaded)
+        autosaver.discard()  # the file on disk is now the source of truth
+        refresh_ui(changed)
+
+    def poll_file_changes():
+        # The watcher thread parses the file; only this (Tk) thread touches widgets.
+        while True:
+            try:
+                item = watcher.changes.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, Exception):
+                print(f"Ignoring external change to {CHAR_FILE}: {item}")
+            else:
+                apply_external_change(item)
+        root.after(WATCH_POLL_MS, poll_file_changes)
+
+    watcher.start()
+    root.after(WATCH_POLL_MS, poll_file_changes)
+
+    def on_close():
+        watcher.stop()
+        autosaver.close()  # saves anything still unsaved, then stops the worker
+        root.destroy()
+
+    root.protocol("WM_DELETE_WINDOW", on_close)
+
+    # The theme (and anything else not needed for the first frame) loads once the window is up.
+    def on_first_paint():
+        if load_theme(root, THEME):
+            configure_styles()
+
+    after_first_paint(root, on_first_paint)
 
     # Start the GUI loop
     root.mainloop()
@@ -0,0 +1,130 @@
+"""
+Background worker for slow (model) calls from a Tk app.
+
+Requests go into a queue and run one at a time on a worker thread, so the
+chat object is never used from two threads at once and the Tk main thread
+never blocks on the network. A job reports progress with `emit(kind,
+payload)`; those events are handed back to the main thread by a `root.after`
+poll, where the request's `on_event(kind, payload)` runs (safe to touch
+widgets there).
+
+Every request ends with exactly one "done", "error" (payload: the exception)
+or "cancelled" event. Cancelling sets the job's `cancelled` event, which a
+streaming job checks between chunks; any events it still emits are dropped.
+"""
+
+import queue
+import threading
+
+POLL_MS = 30
+
+
+class Request:
+    """One queued job and its callback."""
+
+    def __init__(self, job, on_event):
+        self.job = job
+        self.on_event = on_event
+        self.cancelled = threading.Event()
+        self.epoch = 0  # ModelWorker._epoch when submitted
+
+    def cancel(self):
+        self.cancelled.set()
+
+
+class ModelWorker:
+    """Runs jobs `job(emit, cancelled)` in order on one background thread."""
+
+    def __init__(self, root, poll_ms=POLL_MS):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.requests = queue.Queue()
+        self.events = queue.Queue()
+        self.pending = 0  # submitted and not finished yet (main thread only)
+        self.current = None
+        # cancel() bumps the epoch; a request dequeued with an older one was
+        # cancelled while the worker held it but had not set `current` yet.
+        self._lock = threading.Lock()
+        self._epoch = 0
+        self._thread = threading.Thread(target=self._run, name="model-worker", daemon=True)
+        self._thread.start()
+        self._poll_id = root.after(poll_ms, self._poll)
+
+    @property
+    def busy(self):
+        return self.pending > 0
+
+    def submit(self, job, on_event):
+        """Queue `job`; returns the Request (which can be cancelled on its own)."""
+        request = Request(job, on_event)
+        with self._lock:
+            request.epoch = self._epoch
+        self.pending += 1
+        self.requests.put(request)
+        return request
+
+    def cancel(self):
+        """Cancel the running request and everything still queued."""
+        with self._lock:
+            self._epoch += 1
+            current = self.current
+        if current is not None:
+            current.cancel()
+        while True:
+            try:
+                request = self.requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:  # stop() sentinel: keep it
+                self.requests.put(None)
+                break
+            request.cancel()
+            self.events.put((request, "cancelled", None))
+
+    def stop(self):
+        """Cancel everything and let the thread exit (it is a daemon, so we don't wait)."""
+        self.cancel()
+        self.requests.put(None)
+        self.root.after_cancel(self._poll_id)
+
+    # ---------- Worker thread ----------
+    def _run(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+            with self._lock:
+                if request.epoch != self._epoch:
+                    request.cancel()
+                self.current = request
+
+            def emit(kind, payload=None, request=request):
+                self.events.put((request, kind, payload))
+
+            try:
+                if not request.cancelled.is_set():
+                    request.job(emit, request.cancelled)
+            except Exception as e:  # reported to the UI instead of killing the thread
+                emit("error", e)
+            else:
+                emit("cancelled" if request.cancelled.is_set() else "done")
+            finally:
+                with self._lock:
+                    self.current = None
+
+    # ---------- Main thread ----------
+    def _poll(self):
+        while True:
+            try:
+                request, kind, payload = self.events.get_nowait()
+            except queue.Empty:
+                break
+            final = kind in ("done", "error", "cancelled")
+            if request.cancelled.is_set():
+                if not final:
+                    continue  # late output from a cancelled job
+                kind, payload = "cancelled", None
+            if final:
+                self.pending -= 1
+            request.on_event(kind, payload)
+        self._poll_id = self.root.after(self.poll_ms, self._poll)
@@ -0,0 +1,242 @@
+"""
+Exact dice probabilities (no sampling).
+
+Builds the probability mass function (PMF) of NdS by convolution and answers
+"what are my odds" questions directly from it:
+- `dice_pmf(sides, count)`: cached PMF of `count`d`sides`
+- `d20_pmf(mode)`: a d20 rolled normally, with advantage or with disadvantage
+- `attack_odds(hit_mod, ac, mode)`: chance to hit / crit (nat 20 hits, nat 1 misses)
+- `weapon_odds(weapon, ac, mode)`: hit, crit and expected damage for a weapon dict
+- `check_odds(modifier, dc, mode)`: chance to meet a DC on a d20 check
+- `weapon_table(weapon)`: cached hit / crit / damage table for AC 5-30 in every mode
+
+Advantage, disadvantage and crit-doubling are exact transforms of the PMF.
+"""
+
+from functools import lru_cache
+
+# Optional NumPy for fast convolution of big dice pools; pure Python otherwise.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+ROLL_MODES = ("normal", "advantage", "disadvantage")
+
+# Armor classes covered by the precomputed weapon tables.
+TABLE_ACS = range(5, 31)
+
+
+class Dist:
+    """Exact distribution of an integer result: probs[i] is P(result == lo + i)."""
+
+    __slots__ = ("lo", "probs", "_cdf", "_mean")
+
+    def __init__(self, lo, probs):
+        self.lo = lo
+        self.probs = tuple(probs)
+        self._cdf = None
+        self._mean = None
+
+    @property
+    def hi(self):
+        return self.lo + len(self.probs) - 1
+
+    def cdf(self):
+        """Tuple of P(result <= lo + i), computed once."""
+        if self._cdf is None:
+            running, out = 0.0, []
+            for p in self.probs:
+                running += p
+                out.append(running)
+            self._cdf = tuple(out)
+        return self._cdf
+
+    def prob(self, value):
+        """P(result == value)."""
+        i = value - self.lo
+        return self.probs[i] if 0 <= i < len(self.probs) else 0.0
+
+    def at_most(self, value):
+        """P(result <= value)."""
+        i = value - self.lo
+        if i < 0:
+            return 0.0
+        if i >= len(self.probs):
+            return 1.0
+        return self.cdf()[i]
+
+    def at_least(self, value):
+        """P(result >= value)."""
+        return 1.0 - self.at_most(value - 1)
+
+    def mean(self):
+        if self._mean is None:
+            self._mean = sum((self.lo + i) * p for i, p in enumerate(self.probs))
+        return self._mean
+
+    def variance(self):
+        m = self.mean()
+        return sum(((self.lo + i) - m) ** 2 * p for i, p in enumerate(self.probs))
+
+    def percentile(self, q):
+        """Smallest result r with P(result <= r) >= q (q in 0..1)."""
+        if not 0.0 <= q <= 1.0:
+            raise ValueError("Percentile must be between 0 and 1")
+        for i, c in enumerate(self.cdf()):
+            if c >= q - 1e-12:
+                return self.lo + i
+        return self.hi
+
+    def shift(self, mod):
+        """Distribution of result + mod (shares the probability table)."""
+        out = Dist.__new__(Dist)
+        out.lo = self.lo + mod
+        out.probs = self.probs
+        out._cdf = self._cdf
+        out._mean = None if self._mean is None else self._mean + mod
+        return out
+
+    def convolve(self, other):
+        """Distribution of the sum of two independent results."""
+        return Dist(self.lo + other.lo, _convolve(self.probs, other.probs))
+
+    def best_of_two(self):
+        """Roll twice, keep the higher: P(max <= k) = F(k)^2."""
+        cdf = self.cdf()
+        return Dist(self.lo, [c * c - (cdf[i - 1] ** 2 if i else 0.0) for i, c in enumerate(cdf)])
+
+    def worst_of_two(self):
+        """Roll twice, keep the lower: P(min >= k) = S(k)^2."""
+        cdf = self.cdf()
+        surv = [1.0 - (cdf[i - 1] if i else 0.0) for i in range(len(cdf))]
+        return Dist(self.lo, [s * s - (surv[i + 1] ** 2 if i + 1 < len(surv) else 0.0)
+                              for i, s in enumerate(surv)])
+
+    def __repr__(self):
+        return f"Dist({self.lo}..{self.hi}, mean={self.mean():.3f})"
+
+
+def _convolve(a, b):
+    if np is not None and len(a) * len(b) > 256:
+        return np.convolve(a, b).tolist()
+    out = [0.0] * (len(a) + len(b) - 1)
+    for i, pa in enumerate(a):
+        for j, pb in enumerate(b):
+            out[i + j] += pa * pb
+    return out
+
+
+@lru_cache(maxsize=None)
+def dice_pmf(sides, count=1):
+    """Exact PMF of `count`d`sides` (memoized per (sides, count))."""
+    if sides < 1:
+        raise ValueError(f"A die needs at least 1 side (got d{sides})")
+    if count < 0:
+        raise ValueError("Dice count must not be negative")
+    if count == 0:
+        return Dist(0, [1.0])
+    if count == 1:
+        return Dist(1, [1.0 / sides] * sides)
+    # Split in halves so big pools need only O(log count) cached convolutions.
+    half = count // 2
+    return dice_pmf(sides, half).convolve(dice_pmf(sides, count - half))
+
+
+@lru_cache(maxsize=None)
+def d20_pmf(mode="normal"):
+    """PMF of the d20 face for a normal, advantage or disadvantage roll."""
+    if mode == "normal":
+        return dice_pmf(20, 1)
+    if mode == "advantage":
+        return dice_pmf(20, 1).best_of_two()
+    if mode == "disadvantage":
+        return dice_pmf(20, 1).worst_of_two()
+    raise ValueError(f"Unknown roll mode {mode!r}; expected one of {ROLL_MODES}")
+
+
+def check_odds(modifier, dc, mode="normal"):
+    """Chance that d20 + modifier meets or beats `dc` (no auto-success on a 20)."""
+    return d20_pmf(mode).at_least(dc - modifier)
+
+
+@lru_cache(maxsize=4096)
+def attack_odds(hit_mod, ac, mode="normal", crit_range=20):
+    """
+    Return (p_hit, p_crit) for d20 + hit_mod against `ac`.
+
+    A natural 1 always misses, a natural 20 always hits, and any natural roll of
+    `crit_range` or more is a critical hit. p_hit includes crits.
+    """
+    face = d20_pmf(mode)
+    p_hit = p_crit = 0.0
+    for f in range(1, 21):
+        p = face.prob(f)
+        if f >= crit_range:
+            p_crit += p
+            p_hit += p
+        elif f != 1 and f + hit_mod >= ac:
+            p_hit += p
+    return p_hit, p_crit
+
+
+def damage_pmf(weapon, crit=False):
+    """
+    PMF of one damage roll for a weapon dict; a crit doubles the dice, not the mod.
+
+    Weapons may store a dice expression under "damage" (e.g. "2d6+3") instead of
+    damage_die / damage_die_count / damage_mod.
+    """
+    if "damage" in weapon:
+        from dice_expr import compile_expr  # local import: dice_expr builds on this module
+        return compile_expr(weapon["damage"]).pmf(crit)
+    count = weapon["damage_die_count"] * (2 if crit else 1)
+    return dice_pmf(weapon["damage_die"], count).shift(weapon.get("damage_mod", 0))
+
+
+def weapon_odds(weapon, ac, mode="normal", crit_range=20):
+    """Return {"hit", "crit", "expected_damage"} for one attack against `ac`."""
+    p_hit, p_crit = attack_odds(weapon.get("hit_mod", 0), ac, mode, crit_range)
+    normal = damage_pmf(weapon).mean()
+    critical = damage_pmf(weapon, crit=True).mean()
+    return {
+        "hit": p_hit,
+        "crit": p_crit,
+        "expected_damage": (p_hit - p_crit) * normal + p_crit * critical,
+    }
+
+
+def _weapon_key(weapon):
+    """The fields the odds depend on; tables are cached per distinct key."""
+    if "damage" in weapon:
+        return (weapon.get("hit_mod", 0), weapon["damage"])
+    return (weapon.get("hit_mod", 0), weapon["damage_die"], weapon["damage_die_count"],
+            weapon.get("damage_mod", 0))
+
+
+@lru_cache(maxsize=256)
+def _table_for_key(key):
+    weapon = {"hit_mod": key[0]}
+    if len(key) == 2:
+        weapon["damage"] = key[1]
+    else:
+        weapon["damage_die"], weapon["damage_die_count"], weapon["damage_mod"] = key[1:]
+    return {mode: {ac: weapon_odds(weapon, ac, mode) for ac in TABLE_ACS} for mode in ROLL_MODES}
+
+
+def weapon_table(weapon):
+    """
+    {mode: {ac: weapon_odds(...)}} for AC 5-30 under every roll mode.
+
+    Tables are keyed on hit_mod and the damage fields, so editing anything else
+    reuses the cached table and changing those fields builds a fresh one.
+    """
+    return _table_for_key(_weapon_key(weapon))
+
+
+def lookup_weapon_odds(weapon, ac, mode="normal"):
+    """weapon_odds() served from the cached table (computed directly outside AC 5-30)."""
+    if ac in TABLE_ACS:
+        return weapon_table(weapon)[mode][ac]
+    return weapon_odds(weapon, ac, mode)
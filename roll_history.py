@@ -0,0 +1,125 @@
+"""
+In-memory roll history with streaming statistics.
+
+`RollHistory` keeps the last `capacity` rolls in a ring buffer (older ones fall
+off, so memory stays flat however long the session runs) and, next to it,
+running aggregates per roll kind that are updated in O(1) as each roll is
+recorded:
+- count, min, max, mean and variance of totals (Welford's method)
+- a histogram of die faces
+
+Statistics are read from the aggregates only; the raw history is never scanned.
+"""
+
+import math
+import time
+from collections import deque
+
+# Kinds whose faces are single d20s, so a face of 20 / 1 is a natural 20 / 1.
+D20_KINDS = {"Ability check", "Skill check", "Initiative", "To hit"}
+
+
+class RollRecord:
+    """One roll: what kind it was, what was rolled, the faces and the total."""
+
+    __slots__ = ("kind", "expression", "faces", "total", "timestamp")
+
+    def __init__(self, kind, expression, faces, total, timestamp):
+        self.kind = kind
+        self.expression = expression
+        self.faces = faces
+        self.total = total
+        self.timestamp = timestamp
+
+    def __repr__(self):
+        return f"RollRecord({self.kind!r}, {self.expression!r}, {self.faces}, {self.total})"
+
+
+class KindStats:
+    """Running aggregates for one roll kind."""
+
+    __slots__ = ("count", "mean", "_m2", "min", "max", "faces")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = None
+        self.max = None
+        self.faces = {}  # face value -> how many times it came up
+
+    def add(self, total, faces):
+        # Welford's online update: numerically stable, no rescans.
+        self.count += 1
+        delta = total - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (total - self.mean)
+        self.min = total if self.min is None else min(self.min, total)
+        self.max = total if self.max is None else max(self.max, total)
+        for face in faces:
+            self.faces[face] = self.faces.get(face, 0) + 1
+
+    @property
+    def variance(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stdev(self):
+        return math.sqrt(self.variance)
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "stdev": self.stdev,
+            "min": self.min,
+            "max": self.max,
+            "faces": dict(sorted(self.faces.items())),
+        }
+
+
+class RollHistory:
+    """Bounded ring buffer of rolls plus O(1) streaming stats per kind."""
+
+    def __init__(self, capacity=1000):
+        self.records = deque(maxlen=capacity)
+        self.kinds = {}  # kind -> KindStats
+        self.total_rolls = 0
+
+    def record(self, kind, expression, faces, total):
+        """Add a roll (faces: iterable of the individual die results)."""
+        faces = tuple(faces)
+        rec = RollRecord(kind, expression, faces, total, time.time())
+        self.records.append(rec)
+        stats = self.kinds.get(kind)
+        if stats is None:
+            stats = self.kinds[kind] = KindStats()
+        stats.add(total, faces)
+        self.total_rolls += 1
+        return rec
+
+    def recent(self, n=10):
+        """The last `n` records, newest first."""
+        return [self.records[-i] for i in range(1, min(n, len(self.records)) + 1)]
+
+    def stats(self, kind):
+        """Aggregates for one kind as a dict (None if nothing was rolled yet)."""
+        stats = self.kinds.get(kind)
+        return stats.as_dict() if stats else None
+
+    def summary_lines(self):
+        """Human-readable lines for a stats panel, one per roll kind."""
+        lines = [f"Rolls this session: {self.total_rolls}"]
+        for kind, s in self.kinds.items():
+            line = (f"{kind}: {s.count} rolls, avg {s.mean:.2f} (sd {s.stdev:.2f}), "
+                    f"range {s.min}-{s.max}")
+            if kind in D20_KINDS:
+                nat20, nat1 = s.faces.get(20, 0), s.faces.get(1, 0)
+                line += f", nat 20s {nat20}, nat 1s {nat1}"
+            lines.append(line)
+        return lines
+
+    def clear(self):
+        self.records.clear()
+        self.kinds.clear()
+        self.total_rolls = 0
@@ -0,0 +1,230 @@
+"""
+SQLite-backed roster of characters.
+
+All characters live in one table: the full character (same JSON shape as
+character.json) in a `data` column, plus a few summary columns copied out of it
+(name, class, level, HP). A covering index over the summary columns lets the
+party list be served from the index alone, and loading one character by name or
+id only deserializes that one row.
+
+Party-wide operations (long rest, damage/heal everyone, custom edits) run in a
+single transaction, so they either all apply or none do.
+
+Usage:
+    python roster.py list
+    python roster.py import character.json other.json
+    python roster.py export George george.json
+    python roster.py long-rest
+"""
+
+import argparse
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from serialization import dumps, loads, load_file, save_file, validate_character
+
+ROSTER_FILE = "roster.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS characters (
+    id         INTEGER PRIMARY KEY,
+    name       TEXT NOT NULL UNIQUE,
+    class      TEXT,
+    level      INTEGER,
+    hp_current INTEGER,
+    hp_max     INTEGER,
+    data       TEXT NOT NULL,
+    updated    REAL NOT NULL
+);
+-- Covers list_party(): the listing never touches the table rows (or `data`).
+CREATE INDEX IF NOT EXISTS idx_characters_party
+    ON characters (name, class, level, hp_current, hp_max, id);
+"""
+
+
+def _summary(character):
+    """The summary columns for one character dict."""
+    hp = character.get("hp", {})
+    return (
+        character.get("name", ""),
+        character.get("class"),
+        character.get("level"),
+        hp.get("current"),
+        hp.get("max"),
+    )
+
+
+class Roster:
+    """A roster database. Characters are plain dicts in the character.json shape."""
+
+    def __init__(self, path=ROSTER_FILE):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+        self._depth = 0  # nesting level of transaction()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @contextmanager
+    def transaction(self, immediate=False):
+        """
+        Group several writes into one commit (rolled back if anything fails). Nests.
+        immediate=True takes the write lock up front (BEGIN IMMEDIATE), so reads
+        inside the transaction can't be overtaken by another writer.
+        """
+        self._depth += 1
+        if immediate and self._depth == 1 and not self.conn.in_transaction:
+            self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self
+        except BaseException:
+            if self._depth == 1:
+                self.conn.rollback()
+            raise
+        else:
+            if self._depth == 1:
+                self.conn.commit()
+        finally:
+            self._depth -= 1
+
+    # ---------- Single characters ----------
+    def save(self, character):
+        """Insert or update a character (matched by name); returns its id."""
+        validate_character(character)
+        name = character["name"].strip()
+        if not name:
+            raise ValueError("Character needs a name to be saved in the roster")
+        character = dict(character, name=name)  # stored (and looked up) without the padding
+        with self.transaction():
+            cur = self.conn.execute(
+                "INSERT INTO characters (name, class, level, hp_current, hp_max, data, updated)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(name) DO UPDATE SET class=excluded.class, level=excluded.level,"
+                " hp_current=excluded.hp_current, hp_max=excluded.hp_max,"
+                " data=excluded.data, updated=excluded.updated"
+                " RETURNING id",
+                (*_summary(character), dumps(character, compact=True), time.time()),
+            )
+            return cur.fetchone()[0]
+
+    def load(self, key):
+        """Character dict by id (int) or name (str); raises KeyError if missing."""
+        column = "id" if isinstance(key, int) else "name"
+        row = self.conn.execute(f"SELECT data FROM characters WHERE {column} = ?", (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return loads(row[0])
+
+    def delete(self, key):
+        column = "id" if isinstance(key, int) else "name"
+        with self.transaction():
+            cur = self.conn.execute(f"DELETE FROM characters WHERE {column} = ?", (key,))
+        if cur.rowcount == 0:
+            raise KeyError(key)
+
+    def __contains__(self, name):
+        return self.conn.execute("SELECT 1 FROM characters WHERE name = ?", (name,)).fetchone() is not None
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM characters").fetchone()[0]
+
+    # ---------- Party listing ----------
+    def list_party(self):
+        """[{id, name, class, level, hp_current, hp_max}, ...] sorted by name (index-only)."""
+        rows = self.conn.execute(
+            "SELECT id, name, class, level, hp_current, hp_max FROM characters ORDER BY name"
+        )
+        keys = ("id", "name", "class", "level", "hp_current", "hp_max")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def names(self):
+        return [row[0] for row in self.conn.execute("SELECT name FROM characters ORDER BY name")]
+
+    # ---------- Party-wide operations (one transaction each) ----------
+    def update_party(self, fn, names=None):
+        """
+        Call `fn(character)` on every character (or just `names`) and save the
+        edited dicts, all in one transaction. Returns how many were updated.
+        """
+        now = time.time()
+        with self.transaction(immediate=True):  # read-modify-write: no writer can slip in between
+            if names is None:
+                rows = self.conn.execute("SELECT id, data FROM characters").fetchall()
+            else:
+                marks = ",".join("?" * len(names))
+                rows = self.conn.execute(f"SELECT id, data FROM characters WHERE name IN ({marks})",
+                                         list(names)).fetchall()
+            for char_id, data in rows:
+                character = loads(data)
+                fn(character)
+                self.conn.execute(
+                    "UPDATE characters SET name=?, class=?, level=?, hp_current=?, hp_max=?,"
+                    " data=?, updated=? WHERE id=?",
+                    (*_summary(character), dumps(character, compact=True), now, char_id),
+                )
+        return len(rows)
+
+    def long_rest(self, names=None):
+        """Restore everyone (or `names`) to full HP."""
+        def rest(character):
+            character["hp"]["current"] = character["hp"]["max"]
+        return self.update_party(rest, names)
+
+    def change_hp(self, amount, names=None):
+        """Heal (positive) or damage (negative) everyone, clamped to 0..max HP."""
+        def change(character):
+            hp = character["hp"]
+            hp["current"] = max(0, min(hp["max"], hp["current"] + amount))
+        return self.update_party(change, names)
+
+    # ---------- JSON import / export (character.json shape) ----------
+    def import_json(self, filename):
+        return self.save(load_file(filename, validate=validate_character))
+
+    def export_json(self, key, filename):
+        save_file(filename, self.load(key))
+
+
+# ---------- Command line ----------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the character roster")
+    parser.add_argument("--db", default=ROSTER_FILE, help="roster database file")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="show the party")
+    p = sub.add_parser("import", help="add or update characters from JSON files")
+    p.add_argument("files", nargs="+")
+    p = sub.add_parser("export", help="write one character to a JSON file")
+    p.add_argument("name")
+    p.add_argument("file")
+    p = sub.add_parser("delete", help="remove a character")
+    p.add_argument("name")
+    sub.add_parser("long-rest", help="restore everyone to full HP")
+    args = parser.parse_args(argv)
+
+    with Roster(args.db) as roster:
+        if args.command == "list":
+            for c in roster.list_party():
+                print(f"{c['id']:>4}  {c['name']:<20} {c['class'] or '-':<12} "
+                      f"lvl {c['level'] or '-':<3} HP {c['hp_current']}/{c['hp_max']}")
+        elif args.command == "import":
+            with roster.transaction():
+                for filename in args.files:
+                    print(f"Imported {filename} as id {roster.import_json(filename)}")
+        elif args.command == "export":
+            roster.export_json(args.name, args.file)
+        elif args.command == "delete":
+            roster.delete(args.name)
+        elif args.command == "long-rest":
+            print(f"Rested {roster.long_rest()} character(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Character rules shared by the D&D helper apps (no UI code).
+
+Everything here works on the plain character dict stored in character.json,
+so headless tools can use it without importing tkinter.
+"""
+
+from dice import roll, roll_with_mod
+from dice_expr import compile_expr
+from odds import ROLL_MODES, check_odds
+
+
+def calc_mods(stats):
+    """Return ability modifiers (e.g. STR 15 -> +2)."""
+    return {ab: (val - 10) // 2 for ab, val in stats.items()}
+
+
+def ability_check(character, ability):
+    """Do a 1d20 ability check using the character's modifier for `ability`."""
+    mods = calc_mods(character["stats"])
+    return roll_with_mod(20, 1, mods[ability])
+
+
+def skill_modifier(character, skill_name):
+    """Return the total skill modifier (ability mod + proficiency)."""
+    skill = character["skills"][skill_name]
+    mods = calc_mods(character["stats"])
+    return mods[skill["ability"]] + skill.get("prof", 0)
+
+
+def skill_check(character, skill_name):
+    """Perform a skill check (1d20 + skill modifier)."""
+    return roll(20) + skill_modifier(character, skill_name)
+
+
+def ability_check_odds(character, ability, dc, mode="normal"):
+    """Exact chance that an ability check meets `dc` (no sampling)."""
+    return check_odds(calc_mods(character["stats"])[ability], dc, mode)
+
+
+def skill_check_odds(character, skill_name, dc, mode="normal"):
+    """Exact chance that a skill check meets `dc` (no sampling)."""
+    return check_odds(skill_modifier(character, skill_name), dc, mode)
+
+
+def d20(mode="normal"):
+    """Roll a d20 normally, with advantage (best of two) or disadvantage (worst of two)."""
+    first = roll(20)
+    if mode == "normal":
+        return first
+    if mode == "advantage":
+        return max(first, roll(20))
+    if mode == "disadvantage":
+        return min(first, roll(20))
+    raise ValueError(f"Unknown roll mode {mode!r}; expected one of {ROLL_MODES}")
+
+
+def attack_roll(weapon, mode="normal", ac=None, crit_range=20):
+    """
+    Roll to hit and report the details: {"face", "total", "crit", "fumble", "hit"}.
+
+    A natural 1 is a fumble and always misses; a natural `crit_range`+ is a crit
+    and always hits. "hit" is only filled in when a target `ac` is given.
+    """
+    face = d20(mode)
+    total = face + weapon.get("hit_mod", 0)
+    crit = face >= crit_range
+    fumble = face == 1
+    hit = None
+    if ac is not None:
+        hit = crit or (not fumble and total >= ac)
+    return {"face": face, "total": total, "crit": crit, "fumble": fumble, "hit": hit}
+
+
+def roll_to_hit(weapon, mode="normal"):
+    """Return a d20 roll (normal / advantage / disadvantage) + weapon hit modifier."""
+    return attack_roll(weapon, mode)["total"]
+
+
+def roll_damage(weapon, crit=False):
+    """Roll weapon damage (a "damage" expression, or dice + damage modifier); crits double the dice."""
+    if "damage" in weapon:
+        expr = compile_expr(weapon["damage"])
+        total = expr.roll()
+        if crit:
+            total += expr.roll() - expr.constant
+        return total
+    count = weapon["damage_die_count"] * (2 if crit else 1)
+    return roll(weapon["damage_die"], count) + weapon.get("damage_mod", 0)
+
+
+def roll_damage_detail(weapon, crit=False):
+    """Like roll_damage, but return (total, faces) so callers can log each die."""
+    if "damage" in weapon:
+        expr = compile_expr(weapon["damage"])
+    else:
+        expr = compile_expr(f"{weapon['damage_die_count']}d{weapon['damage_die']}{weapon.get('damage_mod', 0):+d}")
+    total, parts = expr.roll_detail()
+    faces = [f for _, kept, _ in parts for f in kept]
+    if crit:
+        extra, parts = expr.roll_detail()
+        total += extra - expr.constant
+        faces += [f for _, kept, _ in parts for f in kept]
+    return total, faces
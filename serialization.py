@@ -0,0 +1,229 @@
+"""
+Shared JSON loading / saving with structure checks.
+
+- Uses orjson when it is installed (much faster parse and dump) and falls back
+  to the stdlib `json` module otherwise; both produce the same data.
+- `save_file(..., compact=True)` writes minified JSON (smaller, faster) and
+  must be asked for explicitly. The default stays pretty-printed with a
+  4-space indent, the format the apps have always written, so saving never
+  reformats a hand-edited file. orjson only indents by 2, so pretty output
+  always comes from the stdlib.
+- Character and world-catalog documents are checked against small schemas that
+  are compiled into plain checker functions once, at import time. A malformed
+  file fails on load with a message like
+  "hp.current: expected int, got str" instead of deep inside
+  the UI.
+
+Schemas only check what the apps rely on; unknown keys are allowed and kept.
+"""
+
+import json
+
+from autosave import atomic_write_text
+
+# Optional fast backend; if not installed we fall back to the stdlib.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = "orjson" if orjson else "json"
+
+
+# ---------- Encode / decode ----------
+def loads(data):
+    """Parse JSON from str or bytes (raises json.JSONDecodeError on bad input)."""
+    if orjson:
+        return orjson.loads(data)  # orjson.JSONDecodeError subclasses json.JSONDecodeError
+    return json.loads(data)
+
+
+def dumps(obj, *, compact=False):
+    """Serialize to a str; pretty (4-space indent) unless `compact`."""
+    if not compact:
+        return json.dumps(obj, indent=4, ensure_ascii=False)  # the on-disk format of character.json etc.
+    if orjson:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def load_file(filename, validate=None):
+    """Read and parse a JSON file; `validate(doc)` (e.g. validate_character) runs before returning."""
+    with open(filename, "rb") as f:
+        doc = loads(f.read())
+    if validate is not None:
+        validate(doc)
+    return doc
+
+
+def save_file(filename, obj, *, compact=False, validate=None):
+    """Validate (optional) and write `obj` atomically."""
+    if validate is not None:
+        validate(obj)
+    atomic_write_text(filename, dumps(obj, compact=compact))
+
+
+# ---------- Schemas ----------
+class SchemaError(ValueError):
+    """A document does not have the expected structure."""
+
+
+class OptionalKey:
+    """Marks a dict key as optional in a schema."""
+
+    __slots__ = ("key",)
+
+    def __init__(self, key):
+        self.key = key
+
+
+class AnyOf:
+    """A value matching at least one of several schemas."""
+
+    __slots__ = ("schemas",)
+
+    def __init__(self, *schemas):
+        self.schemas = schemas
+
+
+class MapOf:
+    """A dict with arbitrary string keys whose values all match `schema`."""
+
+    __slots__ = ("schema",)
+
+    def __init__(self, schema):
+        self.schema = schema
+
+
+def _type_name(value):
+    return type(value).__name__
+
+
+def compile_schema(schema):
+    """
+    Turn a schema into a checker `check(value, path)` that raises SchemaError.
+
+    Schema forms:
+    - a type (int, str, ...): isinstance check (bool is not accepted as int)
+    - a tuple of types: any of them
+    - [schema]: a list whose items all match
+    - {key: schema, OptionalKey(key): schema}: a dict with those keys (extra keys allowed)
+    - MapOf(schema): a dict of str -> schema
+    - AnyOf(schema, ...): any one of the schemas
+    """
+    if isinstance(schema, type) or (isinstance(schema, tuple) and all(isinstance(t, type) for t in schema)):
+        types = schema if isinstance(schema, tuple) else (schema,)
+        reject_bool = bool not in types
+
+        def check_type(value, path):
+            if not isinstance(value, types) or (reject_bool and isinstance(value, bool)):
+                expected = " or ".join(t.__name__ for t in types)
+                raise SchemaError(f"{path or 'document'}: expected {expected}, got {_type_name(value)}")
+        return check_type
+
+    if isinstance(schema, list):
+        (item_schema,) = schema
+        check_item = compile_schema(item_schema)
+
+        def check_list(value, path):
+            if not isinstance(value, list):
+                raise SchemaError(f"{path or 'document'}: expected list, got {_type_name(value)}")
+            for i, item in enumerate(value):
+                check_item(item, f"{path}[{i}]")
+        return check_list
+
+    if isinstance(schema, AnyOf):
+        checks = [compile_schema(sub) for sub in schema.schemas]
+
+        def check_any(value, path):
+            errors = []
+            for check in checks:
+                try:
+                    return check(value, path)
+                except SchemaError as e:
+                    errors.append(str(e))
+            raise SchemaError(" / ".join(errors))
+        return check_any
+
+    if isinstance(schema, MapOf):
+        check_value = compile_schema(schema.schema)
+
+        def check_map(value, path):
+            if not isinstance(value, dict):
+                raise SchemaError(f"{path or 'document'}: expected object, got {_type_name(value)}")
+            for key, item in value.items():
+                check_value(item, f"{path}.{key}" if path else str(key))
+        return check_map
+
+    if isinstance(schema, dict):
+        fields = []  # (key, required, checker)
+        for key, sub in schema.items():
+            if isinstance(key, OptionalKey):
+                fields.append((key.key, False, compile_schema(sub)))
+            else:
+                fields.append((key, True, compile_schema(sub)))
+
+        def check_dict(value, path):
+            if not isinstance(value, dict):
+                raise SchemaError(f"{path or 'document'}: expected object, got {_type_name(value)}")
+            for key, required, check in fields:
+                sub_path = f"{path}.{key}" if path else key
+                if key in value:
+                    check(value[key], sub_path)
+                elif required:
+                    raise SchemaError(f"{sub_path}: missing")
+        return check_dict
+
+    raise TypeError(f"Unsupported schema element: {schema!r}")
+
+
+WEAPON_SCHEMA = {
+    OptionalKey("hit_mod"): int,
+    OptionalKey("damage"): str,
+    OptionalKey("damage_die"): int,
+    OptionalKey("damage_die_count"): int,
+    OptionalKey("damage_mod"): int,
+}
+
+# Inventory entries: a plain item name, or a stack with quantity / weight per item.
+ITEM_SCHEMA = AnyOf(str, {"name": str, OptionalKey("qty"): int, OptionalKey("weight"): (int, float)})
+
+CHARACTER_SCHEMA = {
+    "name": str,
+    OptionalKey("race"): str,
+    OptionalKey("class"): str,
+    OptionalKey("level"): int,
+    OptionalKey("proficiency"): int,
+    "stats": MapOf(int),
+    OptionalKey("weapons"): MapOf(WEAPON_SCHEMA),
+    OptionalKey("inventory"): [ITEM_SCHEMA],
+    OptionalKey("gold"): (int, float),
+    OptionalKey("notes"): str,
+    "hp": {"current": int, "max": int},
+    "ac": int,
+    OptionalKey("skills"): MapOf({"ability": str, OptionalKey("prof"): int}),
+}
+
+CATALOG_SCHEMA = MapOf({"entry": str, OptionalKey("category"): str})
+
+# Compiled once, when the module is first imported.
+_check_character = compile_schema(CHARACTER_SCHEMA)
+_check_catalog = compile_schema(CATALOG_SCHEMA)
+
+
+def validate_character(doc):
+    """Raise SchemaError if `doc` is not a usable character dict."""
+    _check_character(doc, "")
+    for name, weapon in doc.get("weapons", {}).items():
+        if "damage" not in weapon and not {"damage_die", "damage_die_count"} <= weapon.keys():
+            raise SchemaError(f"weapons.{name}: needs 'damage' or 'damage_die' + 'damage_die_count'")
+    for name, skill in doc.get("skills", {}).items():
+        if skill["ability"] not in doc["stats"]:
+            raise SchemaError(f"skills.{name}.ability: unknown ability {skill['ability']!r}")
+    return doc
+
+
+def validate_catalog(doc):
+    """Raise SchemaError if `doc` is not a world catalog ({name: {entry, category}})."""
+    _check_catalog(doc, "")
+    return doc
@@ -1,21 +1,17 @@
 import tkinter as tk
 from tkinter import scrolledtext, filedialog
-from google import genai
-from google.genai import types
-import json
 import os
-from dotenv import load_dotenv
+from contextlib import closing
+from catalog_store import close_catalogs, get_catalog
+from gemini_session import GeminiChat
+from model_worker import ModelWorker
+from transcript import Transcript
 
 
-load_dotenv()
-
 # --- File Setup ---
 selected_file = "world_catalog.json"
 file_label = None
 
-# --- Gemini Client Setup ---
-client = genai.Client(api_key=os.getenv("API_KEY"))  # Replace with your real key
-
 # --- Function Declarations ---
 single_content_function = {
     "name": "generate_structured_content",
@@ -80,14 +76,14 @@ def choose_file():
     if not selected_file:
         selected_file = "world_catalog.json"  # fallback default
         
-    start_prompt = f"SYSTEM MESSAGE: If there is an existing world catalog, here is the information: {get_world_context()}\n\n You should ask the user a question to kick off (or kick back off) the brainstorming process. If there is no world name, start with that perhaps. "
-    init_response = chat.send_message(start_prompt)
-    display_message("AI", init_response.text, "purple")
+    def start_prompt(file_path):
+        return f"SYSTEM MESSAGE: If there is an existing world catalog, here is the information: {get_world_context(file_path)}\n\n You should ask the user a question to kick off (or kick back off) the brainstorming process. If there is no world name, start with that perhaps. "
+    submit(chat_job(start_prompt, selected_file))
 
-# --- Robust Save Catalog Entry ---
+# --- Save Catalog Entry ---
 def save_catalog_entry(function_call, file_path=None):
     """
-    Saves one or more catalog entries from function_call.args['entries'] into a JSON file.
+    Saves one or more catalog entries from function_call.args['entries'] (see catalog_store.py).
     Each entry must include: name, entry, and category.
     Returns a list of saved entry names and the absolute file path.
     """
@@ -98,44 +94,8 @@ def save_catalog_entry(function_call, file_path=None):
     if not isinstance(parsed, dict):
         raise ValueError("function_call.args must be a dictionary")
 
-    entries = parsed.get("entries")
-    if not isinstance(entries, list) or not entries:
-        raise ValueError("function_call.args['entries'] must be a non-empty list")
-
-    # Ensure directory exists
-    os.makedirs(os.path.dirname(os.path.abspath(file_path)) or ".", exist_ok=True)
-
-    # Load existing catalog (if present)
-    catalog = {}
-    if os.path.exists(file_path):
-        with open(file_path, "r", encoding="utf-8") as f:
-            catalog = json.load(f)
-
-    saved_names = []
-    for e in entries:
-        name = e.get("name")
-        text = e.get("entry")
-        category = e.get("category", "Uncategorized")
-
-        if not name or not text:
-            raise ValueError(f"Each entry must include 'name' and 'entry'. Problematic entry: {e}")
-
-        # If entry already exists, append the new text
-        if name in catalog:
-            existing_text = catalog[name].get("entry", "")
-            catalog[name]["entry"] = existing_text + "\n" + text
-            # Optional: update category only if it differs or leave it as-is
-            if catalog[name].get("category") != category:
-                catalog[name]["category"] = category
-        else:
-            catalog[name] = {"entry": text, "category": category}
-
-        saved_names.append(name)
-
-    # Save updated catalog
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(catalog, f, indent=4, ensure_ascii=False)
-
+    # New names are created, existing ones get the text appended (one transaction)
+    saved_names = get_catalog(file_path).save_entries(parsed.get("entries"))
     return saved_names, os.path.abspath(file_path)
 
 def get_world_context(file_path=None):
@@ -143,16 +103,15 @@ def get_world_context(file_path=None):
     file_path = file_path or selected_file
     if not file_path:
         return "No file selected."
-    
+
     if not os.path.exists(str(file_path)):
         return "No world entries yet."
-    with open(file_path, "r", encoding="utf-8") as f:
-        try:
-            catalog = json.load(f)
-        except json.JSONDecodeError:
-            catalog = {}
+    try:
+        summaries = get_catalog(file_path).summaries()
+    except ValueError:  # bad JSON or not a catalog
+        summaries = []
     # Simplify for context: just names and categories
-    summary_lines = [f"{name} ({data['category']})" for name, data in catalog.items()]
+    summary_lines = [f"{name} ({category})" for name, category in summaries]
     summary = "\n".join(summary_lines) if summary_lines else "No world entries yet."
     return f"Here is the world catalog so far:\n{summary}"
 
@@ -167,9 +126,9 @@ system_instruction = (
 )
 
 # --- Chat Setup ---
-tools = types.Tool(function_declarations=[content_function])
-config = types.GenerateContentConfig(tools=[tools], system_instruction=system_instruction)
-chat = client.chats.create(model="gemini-2.5-flash-lite", config=config)
+# Created on the first message (on the worker thread), so the window opens
+# without waiting for google-genai; API_KEY comes from the environment / .env.
+chat = GeminiChat(system_instruction, [content_function])
 
 # --- UI Setup ---
 root = tk.Tk()
@@ -184,9 +143,18 @@ file_label.pack(side="left", padx=(0, 10))
 choose_button = tk.Button(top_frame, text="Choose Catalog File", command=lambda: choose_file())
 choose_button.pack(side="left")
 
+cancel_button = tk.Button(top_frame, text="Cancel", state="disabled", command=lambda: cancel_requests())
+cancel_button.pack(side="right")
+
+status_label = tk.Label(top_frame, text="", font=("Consolas", 10, "italic"))
+status_label.pack(side="right", padx=(0, 10))
+
 chat_display = scrolledtext.ScrolledText(root, wrap=tk.WORD, width=80, height=30, font=("Consolas", 11))
 chat_display.pack(padx=10, pady=10)
-chat_display.insert(tk.END, "Worldbuilding Assistant Initialized.\n\n")
+
+# Shared style tags + a cap on live messages (older ones page in from disk on scroll-up).
+transcript = Transcript(chat_display, font=("Consolas", 11), max_messages=500)
+transcript.add("SYSTEM", "Worldbuilding Assistant Initialized.", msg_type="system")
 
 entry_field = tk.Entry(root, width=80, font=("Consolas", 11))
 entry_field.pack(padx=10, pady=(0, 10))
@@ -198,25 +166,103 @@ def display_message(sender, message, msg_type=None, color=None):
     msg_type: "user", "ai", "system" (defaults to black if unknown)
     color: optional override for msg_type
     """
-    type_colors = {
-        "user": "blue",
-        "ai": "purple",
-        "system": "green"
-    }
+    transcript.add(sender, message, msg_type=msg_type, color=color)
+
+# --- Model Calls (background worker) ---
+# Model calls run one at a time on a worker thread; their output comes back to
+# the Tk thread through worker events, so the window never waits on the network.
+worker = ModelWorker(root)
+
+
+def stream_reply(message, emit, cancelled):
+    """Stream one model reply as "text" events. Returns (function calls, whether any text came)."""
+    calls = []
+    texted = False
+    with closing(chat.send_message_stream(message)) as stream:
+        for chunk in stream:
+            if cancelled.is_set():
+                break
+            if not chunk.candidates or not chunk.candidates[0].content:
+                continue
+            for part in chunk.candidates[0].content.parts or ():
+                # Handle function calls
+                if getattr(part, "function_call", None):
+                    calls.append(part.function_call)
+                # Handle text replies
+                elif getattr(part, "text", None):
+                    emit("text", part.text)
+                    texted = True
+    emit("reply_end")
+    return calls, texted
+
+
+def chat_job(make_prompt, file_path):
+    """
+    Worker job: send `make_prompt(file_path)`, stream the reply and save any catalog
+    entries to `file_path`. The prompt is built when the job runs, so a queued
+    request sees the catalog as it is then (including entries earlier replies saved).
+    """
+    def job(emit, cancelled):
+        calls, texted = stream_reply(make_prompt(file_path), emit, cancelled)
+        if cancelled.is_set():
+            return
+        for call in calls:
+            saved_names, path = save_catalog_entry(call, file_path)
+            emit("saved", saved_names)
+        if calls and not texted:
+            # If a function was called but no text was sent, prompt the model to continue
+            stream_reply("The entries have been saved. Continue the conversation naturally.", emit, cancelled)
+    return job
+
+
+held_messages = []  # user messages sent while a reply was streaming
+
+
+def end_reply():
+    """Finish the streamed reply (if any), then show the user messages held back while it streamed."""
+    transcript.end()
+    while held_messages:
+        display_message("You", held_messages.pop(0), msg_type="user", color="blue")
+
+
+def on_model_event(kind, payload):
+    """Show worker events in the chat (runs on the Tk thread)."""
+    if kind == "text":
+        if not transcript.streaming:
+            transcript.begin("AI", msg_type="ai", color="purple")
+            payload = payload.lstrip()
+        transcript.write(payload)
+        return
+    end_reply()  # "reply_end", or the request stopped mid-stream
+    if kind == "saved":
+        display_message("SYSTEM", f"📘 Saved to catalog: {', '.join(payload)}", msg_type="system", color="green")
+    elif kind == "error":
+        display_message("SYSTEM", f"⚠️ Model request failed: {payload}", msg_type="system", color="red")
+    if kind in ("done", "error", "cancelled"):
+        update_status()
 
-    final_color = color or type_colors.get(msg_type, "black")
 
-    # Create a unique tag for this message
-    tag_name = f"{msg_type}_{chat_display.index('end')}"  # index ensures uniqueness
+def submit(job):
+    worker.submit(job, on_model_event)
+    update_status()
 
-    chat_display.insert(tk.END, f"{sender}: ", (f"{tag_name}_sender",))
-    chat_display.insert(tk.END, f"{message}\n\n", (f"{tag_name}_color",))
 
-    # Configure the sender and color tags
-    chat_display.tag_configure(f"{tag_name}_sender", font=("Consolas", 11, "bold"))
-    chat_display.tag_configure(f"{tag_name}_color", foreground=final_color, font=("Consolas", 11))
+def update_status():
+    if worker.busy:
+        queued = worker.pending - 1
+        status_label.config(text="Thinking..." + (f" ({queued} queued)" if queued else ""))
+        cancel_button.config(state="normal")
+    else:
+        status_label.config(text="")
+        cancel_button.config(state="disabled")
+
+
+def cancel_requests():
+    if worker.busy:
+        worker.cancel()
+        end_reply()
+        display_message("SYSTEM", "Request cancelled.", msg_type="system")
 
-    chat_display.see(tk.END)
 
 # --- Main Logic ---
 def handle_user_input(event=None):
@@ -224,47 +270,35 @@ def handle_user_input(event=None):
     if not user_text:
         return
     entry_field.delete(0, tk.END)
-    display_message("You", user_text, msg_type="user", color="blue")
 
-    world_context = get_world_context()
-    prompt = (
-        f"SYSTEM MESSAGE: Here is a summary of the world catalog so far:\n{world_context}\n\n"
-        f"Here is the user's latest prompt: {user_text}"
-    )
-
-    response = chat.send_message(message=prompt)
-
-    text_output = []
-    function_called = False
-
-    for part in response.candidates[0].content.parts:
-        # Handle function calls
-        if hasattr(part, "function_call") and part.function_call:
-            saved_names, path = save_catalog_entry(part.function_call)
-            display_message("SYSTEM", f"📘 Saved to catalog: {', '.join(saved_names)}", msg_type="system", color="green")
-            function_called = True
-
-        # Handle text replies
-        elif hasattr(part, "text") and part.text:
-            text_output.append(part.text.strip())
-
-    # Display any text parts together
-    if text_output:
-        display_message("AI", "\n".join(text_output), msg_type="ai", color="purple")
-    elif function_called:
-        # If a function was called but no text was sent, prompt the model to continue
-        follow_up = chat.send_message(
-            message="The entries have been saved. Continue the conversation naturally."
+    def prompt(file_path):
+        return (
+            f"SYSTEM MESSAGE: Here is a summary of the world catalog so far:\n{get_world_context(file_path)}\n\n"
+            f"Here is the user's latest prompt: {user_text}"
         )
-        if follow_up and follow_up.candidates:
-            for part in follow_up.candidates[0].content.parts:
-                if hasattr(part, "text") and part.text:
-                    display_message("AI", part.text.strip(), msg_type="ai", color="purple")
-    
+    # Shown on submit, so it stays in the chat even if the request is cancelled before
+    # it runs (the worker only emits replies). A reply still streaming is not split:
+    # the message waits for its end (see end_reply).
+    if transcript.streaming:
+        held_messages.append(user_text)
+    else:
+        display_message("You", user_text, msg_type="user", color="blue")
+    submit(chat_job(prompt, selected_file))
+
 
 entry_field.bind("<Return>", handle_user_input)
 
 
+def on_close():
+    worker.stop()
+    end_reply()  # log any held messages too
+    transcript.close()
+    close_catalogs()
+    root.destroy()
+
+
+root.protocol("WM_DELETE_WINDOW", on_close)
+
 
 root.mainloop()
 
@@ -1,13 +1,11 @@
-import gradio as gr
-from google import genai
-from google.genai import types
+import atexit
 import os
-from dotenv import load_dotenv
-import json
+from catalog_store import close_catalogs, get_catalog
+from gemini_session import GeminiChat, MissingApiKey
 
-load_dotenv()
-
-client = genai.Client(api_key=os.getenv("API_KEY"))  # Replace with your real key
+# gradio and google-genai are heavy imports: gradio is imported in build_app(),
+# genai on the first chat message (see gemini_session.py). API_KEY comes from
+# the environment / .env.
 
 
 system_instruction = (
@@ -65,7 +63,7 @@ content_function = {
 
 def save_catalog_entry(function_call, file_path='world_catalog.json'):
     """
-    Saves one or more catalog entries from function_call.args['entries'] into a JSON file.
+    Saves one or more catalog entries from function_call.args['entries'] (see catalog_store.py).
     Each entry must include: name, entry, and category.
     Returns a list of saved entry names and the absolute file path.
     """
@@ -76,44 +74,8 @@ def save_catalog_entry(function_call, file_path='world_catalog.json'):
     if not isinstance(parsed, dict):
         raise ValueError("function_call.args must be a dictionary")
 
-    entries = parsed.get("entries")
-    if not isinstance(entries, list) or not entries:
-        raise ValueError("function_call.args['entries'] must be a non-empty list")
-
-    # Ensure directory exists
-    os.makedirs(os.path.dirname(os.path.abspath(file_path)) or ".", exist_ok=True)
-
-    # Load existing catalog (if present)
-    catalog = {}
-    if os.path.exists(file_path):
-        with open(file_path, "r", encoding="utf-8") as f:
-            catalog = json.load(f)
-
-    saved_names = []
-    for e in entries:
-        name = e.get("name")
-        text = e.get("entry")
-        category = e.get("category", "Uncategorized")
-
-        if not name or not text:
-            raise ValueError(f"Each entry must include 'name' and 'entry'. Problematic entry: {e}")
-
-        # If entry already exists, append the new text
-        if name in catalog:
-            existing_text = catalog[name].get("entry", "")
-            catalog[name]["entry"] = existing_text + "\n" + text
-            # Optional: update category only if it differs or leave it as-is
-            if catalog[name].get("category") != category:
-                catalog[name]["category"] = category
-        else:
-            catalog[name] = {"entry": text, "category": category}
-
-        saved_names.append(name)
-
-    # Save updated catalog
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(catalog, f, indent=4, ensure_ascii=False)
-
+    # New names are created, existing ones get the text appended (one transaction)
+    saved_names = get_catalog(file_path).save_entries(parsed.get("entries"))
     return saved_names, os.path.abspath(file_path)
 
 def get_world_context(file_path=None):
@@ -124,21 +86,16 @@ def get_world_context(file_path=None):
     
     if not os.path.exists(str(file_path)):
         return "No world entries yet."
-    with open(file_path, "r", encoding="utf-8") as f:
-        try:
-            catalog = json.load(f)
-        except json.JSONDecodeError:
-            catalog = {}
+    try:
+        summaries = get_catalog(file_path).summaries()
+    except ValueError:  # bad JSON or not a catalog
+        summaries = []
     # Simplify for context: just names and categories
-    summary_lines = [f"{name} ({data['category']})" for name, data in catalog.items()]
+    summary_lines = [f"{name} ({category})" for name, category in summaries]
     summary = "\n".join(summary_lines) if summary_lines else "No world entries yet."
     return summary
 
-tools = types.Tool(function_declarations=[content_function])
-config = types.GenerateContentConfig(tools=[tools], system_instruction=system_instruction)
-chat = client.chats.create(model="gemini-2.5-flash-lite", config=config)
-
-contents = []
+chat = GeminiChat(system_instruction, [content_function])
 
 selected_file = None
 
@@ -167,13 +124,11 @@ def respond(message, history=None):
     # Get world context
     world_context = get_world_context()
     prompt = f"SYSTEM MESSAGE: Here is a summary of the world catalog so far:\n{world_context}\n\n Here is the user's latest prompt: {message}"
-    contents.append(types.Content(role="user", parts=[types.Part(text=prompt)]))
-     
-    print(contents)
 
-    response = chat.send_message(config=config, message=prompt)
-
-    #response = client.models.generate_content(model="gemini-2.5-flash-lite", contents=contents, config=config)
+    try:
+        response = chat.send_message(message=prompt)
+    except MissingApiKey as e:
+        return str(e)
 
     for part in response.candidates[0].content.parts:
         if hasattr(part, "function_call") and part.function_call:
@@ -192,7 +147,7 @@ def respond(message, history=None):
             #send chat message with function confirmation adn get follow-up
             message = f"SYSTEM: You have just saved the following entries to the catalog: {', '.join(saved_names)}. Please share a message that confirms the saving of these entries and prompts the user to discuss the world in greater depth or suggest a new topic to explore."
 
-            second_response = chat.send_message(config=config, message=message)
+            second_response = chat.send_message(message=message)
             output = second_response.text
                 
         else: 
@@ -203,88 +158,102 @@ def respond(message, history=None):
     return output
 
 
+listed_names = []  # names in the catalog list, by row (it may be filtered or ranked)
+
 def refresh_catalog(search_entry="", filter_choice="All"):
+    global listed_names
     print(selected_file)
     if not selected_file or not os.path.exists(selected_file):
+        listed_names = []
         return []
-    with open(selected_file, "r", encoding="utf-8") as f:
-        catalog = json.load(f)
-        rows = []
-        for name, data in catalog.items():
-            cat = data.get("category", "Uncategorized")
-            if (
-                (filter_choice == "All" or cat == filter_choice)
-                and (search_entry.lower() in name.lower())
-            ):
-                rows.append([name])    
+    store = get_catalog(selected_file)
+    category = None if filter_choice == "All" else filter_choice
+    if (search_entry or "").strip():
+        # Full-text search over names and entry text, best matches first
+        rows = [[name, snippet] for name, _, snippet in store.search(search_entry, category)]
+    else:
+        names = store.list_by_category(category) if category else store.names()
+        rows = [[name, ""] for name in names]
+    listed_names = [row[0] for row in rows]
     return rows
 
-def load_entry(evt: gr.SelectData):
+def load_entry(evt):
+    """Fill the editor from the selected catalog row (`evt` is a gradio SelectData)."""
     global selected_file
     if not selected_file:
         return "No file selected.", "", ""
-    with open(selected_file, "r", encoding="utf-8") as f:
-        catalog = json.load(f)
     row_index = evt.index[0]  # first index in (row, col)
-    names = list(catalog.keys())
-    if row_index < len(names):
-        name = names[row_index]
-        entry_data = catalog[name]
-        return name, entry_data.get("entry", ""), entry_data.get("category", "")
-    return "", "", ""
+    if row_index >= len(listed_names):
+        return "", "", ""
+    name = listed_names[row_index]
+    try:
+        entry_data = get_catalog(selected_file).get(name)
+    except KeyError:
+        return "", "", ""
+    return name, entry_data["entry"], entry_data["category"]
 
 def save_entry(name, text, category):
     global selected_file
     print(selected_file)
     if not selected_file:
         return "No file selected."
-    with open(selected_file, "r", encoding="utf-8") as f:
-        catalog = json.load(f)
-    catalog[name] = {"entry": text, "category": category}
-    with open(selected_file, "w", encoding="utf-8") as f:
-        json.dump(catalog, f, indent=4)
+    get_catalog(selected_file).upsert(name, text, category or None)
     return f"Saved changes to '{name}'."
 
 
-with gr.Blocks(title="Worldbuilding Assistant") as demo:
-    gr.Markdown("# 🌍 Worldbuilding Assistant")
+def build_app():
+    """Build the Gradio UI (importing gradio only now)."""
+    import gradio as gr
+
+    def on_select(evt: gr.SelectData):  # gradio passes the event by this annotation
+        return load_entry(evt)
+
+    with gr.Blocks(title="Worldbuilding Assistant") as demo:
+        gr.Markdown("# 🌍 Worldbuilding Assistant")
+
+        with gr.Tab("Chat"):
+            file_selector = gr.File(label="Select or upload a JSON catalog", file_types=[".json"])
+            file_output = gr.Textbox(label="Current File", interactive=False)
+
+            chat_interface = gr.ChatInterface(fn=respond, type="messages", title="World Chat")
+
+            file_selector.change(fn=select_file, inputs=file_selector, outputs=file_output)
+
 
-    with gr.Tab("Chat"):
-        file_selector = gr.File(label="Select or upload a JSON catalog", file_types=[".json"])
-        file_output = gr.Textbox(label="Current File", interactive=False)
+        choices_with_all = choices + ["All"]
 
-        chat_interface = gr.ChatInterface(fn=respond, type="messages", title="World Chat")
+        with gr.Tab("Catalog Viewer"):
+            search_bar = gr.Textbox(label="Search Catalog", interactive=True)
+            category_filter = gr.Dropdown(label="Category", value="All", choices = choices_with_all)
+            catalog_list = gr.Dataframe(headers=["Name", "Match"], datatype=["str", "markdown"],
+                                        interactive=False, label="Catalog")
+            selected_entry = gr.Textbox(label="Selected Entry", interactive=True)
+            category_text = gr.Textbox(label="Category", interactive=True)
+            catalog_text = gr.Textbox(label="Entry Content", lines=10, interactive=True)
 
-        file_selector.change(fn=select_file, inputs=file_selector, outputs=file_output)
 
+            catalog_list.select(fn=on_select, outputs=[selected_entry, catalog_text, category_text])        
 
-    choices_with_all = choices + ["All"]
+            refresh_button = gr.Button(value="Refresh Catalog")
+            refresh_button.click(fn=refresh_catalog, outputs=catalog_list)
+            search_bar.change(
+                fn=refresh_catalog,
+                inputs=[search_bar, category_filter],
+                outputs=catalog_list
+            )
+            category_filter.change(
+                fn=refresh_catalog,
+                inputs=[search_bar, category_filter],
+                outputs=catalog_list
+            )
 
-    with gr.Tab("Catalog Viewer"):
-        search_bar = gr.Textbox(label="Search Catalog", interactive=True)
-        category_filter = gr.Dropdown(label="Category", value="All", choices = choices_with_all)
-        catalog_list = gr.Dataframe(headers=["Name"], interactive=False, label="Catalog")
-        selected_entry = gr.Textbox(label="Selected Entry", interactive=True)
-        category_text = gr.Textbox(label="Category", interactive=True)
-        catalog_text = gr.Textbox(label="Entry Content", lines=10, interactive=True)
-        
+            save_button = gr.Button(value="Save Changes")
+            save_status = gr.Textbox(label="Save Status", interactive=False)
+            save_button.click(fn=save_entry, inputs=[selected_entry, catalog_text, category_text], outputs=save_status)
 
-        catalog_list.select(fn=load_entry, outputs=[selected_entry, catalog_text, category_text])        
+    return demo
 
-        refresh_button = gr.Button(value="Refresh Catalog")
-        refresh_button.click(fn=refresh_catalog, outputs=catalog_list)
-        search_bar.change(
-            fn=refresh_catalog,
-            inputs=[search_bar, category_filter],
-            outputs=catalog_list
-        )
-        category_filter.change(
-            fn=refresh_catalog,
-            inputs=[search_bar, category_filter],
-            outputs=catalog_list
-        )
 
-        save_button = gr.Button(value="Save Changes")
-        save_status = gr.Textbox(label="Save Status", interactive=False)
-        save_button.click(fn=save_entry, inputs=[selected_entry, catalog_text, category_text], outputs=save_status)
-demo.launch(share=False)
\ No newline at end of file
+if __name__ == "__main__":
+    atexit.register(close_catalogs)
+    build_app().launch(share=False)
@@ -0,0 +1,175 @@
+"""
+Bounded chat transcript for a Tk Text widget.
+
+- Styles come from a fixed pool of tags configured once ("sender" plus one
+  body tag per message type or color), so the widget's tag table does not
+  grow with the number of messages.
+- At most `max_messages` messages stay in the widget. Every message is also
+  appended to a JSON-lines log on disk; when the widget is over the cap the
+  oldest messages are simply deleted from it.
+- Scrolling to the top loads the previous page back from the log (by byte
+  offset, so nothing else is read), keeping the view where it was.
+- A reply can also be streamed in: begin(), write() per chunk, end().
+
+Insert cost therefore stays flat however long the session runs.
+"""
+
+import json
+import os
+import tempfile
+from array import array
+from collections import deque
+
+import tkinter as tk
+
+TYPE_COLORS = {"user": "blue", "ai": "purple", "system": "green"}
+
+
+class Transcript:
+    """Append-only, capped view of a conversation in `text` (a Text / ScrolledText)."""
+
+    def __init__(self, text, font=("Consolas", 11), max_messages=500, page_size=100, log_path=None):
+        self.text = text
+        self.font = font
+        self.max_messages = max_messages
+        self.page_size = page_size
+
+        if log_path is None:
+            fd, log_path = tempfile.mkstemp(prefix="transcript-", suffix=".jsonl")
+            os.close(fd)
+            self._temp_log = True
+        else:
+            self._temp_log = False
+        self.log_path = log_path
+        self._log = open(log_path, "w+b")
+        self._offsets = array("q")  # byte offset of every message in the log
+
+        # (message number, line count) for each message in the widget, oldest first
+        self._live = deque()
+        self._loading = False
+        self._stream = None  # message being streamed in, if any
+
+        # The fixed tag pool.
+        text.tag_configure("sender", font=(*font[:2], "bold"))
+        self._body_tags = set()
+        for color in TYPE_COLORS.values():
+            self._body_tag(color)
+        self._body_tag("black")
+
+        # Watch the scroll position to page older messages back in.
+        self._yscroll = text.cget("yscrollcommand")
+        text.configure(yscrollcommand=self._on_yscroll)
+
+    def _body_tag(self, color):
+        tag = f"body_{color}"
+        if tag not in self._body_tags:
+            self.text.tag_configure(tag, foreground=color, font=self.font)
+            self._body_tags.add(tag)
+        return tag
+
+    # ---------- Adding messages ----------
+    def add(self, sender, message, msg_type=None, color=None):
+        """Show a message at the bottom (and log it). Ends a streamed message first."""
+        self.end()
+        color = color or TYPE_COLORS.get(msg_type, "black")
+        record = {"sender": sender, "message": message, "color": color}
+        lines = self._insert(tk.END, record)
+        self._live.append((self._append_log(record), lines))
+        self._trim()
+        self.text.see(tk.END)
+
+    def _append_log(self, record):
+        """Write a message to the log; returns its message number."""
+        self._log.seek(0, os.SEEK_END)
+        self._offsets.append(self._log.tell())
+        self._log.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+        self._log.flush()
+        return len(self._offsets) - 1
+
+    # ---------- Streamed messages ----------
+    @property
+    def streaming(self):
+        return self._stream is not None
+
+    def begin(self, sender, msg_type=None, color=None):
+        """Start a message at the bottom whose body arrives in pieces."""
+        self.end()
+        color = color or TYPE_COLORS.get(msg_type, "black")
+        self._stream = {"sender": sender, "color": color, "parts": []}
+        self.text.insert(tk.END, f"{sender}: ", ("sender",))
+        self.text.see(tk.END)
+
+    def write(self, chunk):
+        """Append a piece of the streamed message."""
+        self._stream["parts"].append(chunk)
+        self.text.insert(tk.END, chunk, (self._body_tag(self._stream["color"]),))
+        self.text.see(tk.END)
+
+    def end(self):
+        """Finish the streamed message (if any): log it and apply the cap."""
+        stream, self._stream = self._stream, None
+        if stream is None:
+            return
+        self.text.insert(tk.END, "\n\n", (self._body_tag(stream["color"]),))
+        record = {"sender": stream["sender"], "message": "".join(stream["parts"]), "color": stream["color"]}
+        self._live.append((self._append_log(record), record["message"].count("\n") + 2))
+        self._trim()
+        self.text.see(tk.END)
+
+    def _insert(self, index, record):
+        """Insert one message at `index`; returns how many lines it takes."""
+        body = f"{record['message']}\n\n"
+        if index == tk.END:
+            self.text.insert(tk.END, f"{record['sender']}: ", ("sender",), body, (self._body_tag(record["color"]),))
+        else:
+            # insert the body first so both parts land in order at the same index
+            self.text.insert(index, body, (self._body_tag(record["color"]),))
+            self.text.insert(index, f"{record['sender']}: ", ("sender",))
+        return body.count("\n")
+
+    def _trim(self):
+        """Drop the oldest messages from the widget until it is back under the cap."""
+        drop_lines = 0
+        while len(self._live) > self.max_messages:
+            drop_lines += self._live.popleft()[1]
+        if drop_lines:
+            self.text.delete("1.0", f"{drop_lines + 1}.0")
+
+    # ---------- Paging older messages back in ----------
+    @property
+    def paged_out(self):
+        """How many older messages are only in the log right now."""
+        return self._live[0][0] if self._live else 0
+
+    def _on_yscroll(self, first, last):
+        if self._yscroll:
+            self.text.tk.call(self._yscroll, first, last)  # keep the scrollbar working
+        if float(first) <= 0.0 and self.paged_out and not self._loading:
+            self._loading = True
+            self.text.after_idle(self.load_older)
+
+    def _read(self, number):
+        self._log.seek(self._offsets[number])
+        return json.loads(self._log.readline())
+
+    def load_older(self):
+        """Insert the previous page of messages at the top, keeping the view in place."""
+        self._loading = False
+        end = self.paged_out
+        start = max(0, end - self.page_size)
+        added = 0
+        for number in range(end - 1, start - 1, -1):
+            lines = self._insert("1.0", self._read(number))
+            self._live.appendleft((number, lines))
+            added += lines
+        if added:
+            self.text.yview(f"{added + 1}.0")  # same message stays at the top of the view
+
+    def close(self):
+        self.end()
+        self._log.close()
+        if self._temp_log:
+            try:
+                os.remove(self.log_path)
+            except OSError:
+                pass
@@ -0,0 +1,102 @@
+"""
+View-model for the Tk character sheet: remember what was rendered, redraw only
+what changed.
+
+`RenderCache` keeps the last value written to each widget. On refresh the
+sheet asks it to render the current data, and it turns the difference into the
+smallest set of widget operations:
+- scalar fields (entries, button labels) are rewritten only if their value changed
+- text (notes) is patched with one delete + insert around the changed span
+- lists (inventory rows) get per-row inserts / deletes from a sequence diff
+
+No tkinter here: the cache only calls the write / insert / delete functions it
+is given, so it can be benchmarked and reused without a display.
+"""
+
+from difflib import SequenceMatcher
+
+from autosave import common_affixes, text_splice
+
+_MISSING = object()
+
+
+def diff_rows(old, new):
+    """
+    Operations turning list `old` into `new`: ("delete", i) / ("insert", i, value).
+
+    Applied in the returned order, every index is valid at the moment it is
+    used. The common head and tail are skipped before running the sequence
+    diff, so a single append / insert / removal costs a few C-level slice
+    compares and produces one operation.
+    """
+    start, end_old, end_new = common_affixes(old, new)
+    if start == end_old:  # pure insertion
+        return [("insert", start + k, new[start + k]) for k in range(end_new - start)]
+    if start == end_new:  # pure removal
+        return [("delete", i) for i in range(end_old - 1, start - 1, -1)]
+    ops = []
+    middle = SequenceMatcher(None, old[start:end_old], new[start:end_new], autojunk=False)
+    # Work back to front so earlier indices are unaffected by later edits.
+    for tag, i1, i2, j1, j2 in reversed(middle.get_opcodes()):
+        if tag == "equal":
+            continue
+        for i in range(i2 - 1, i1 - 1, -1):
+            ops.append(("delete", start + i))
+        for offset, j in enumerate(range(j1, j2)):
+            ops.append(("insert", start + i1 + offset, new[start + j]))
+    return ops
+
+
+class RenderCache:
+    """Last rendered value per widget key, and minimal updates against it."""
+
+    def __init__(self):
+        self.last = {}
+        self.ops = 0  # widget operations issued (handy for tests / benchmarks)
+
+    def field(self, key, value, write):
+        """Call `write(value)` only if `value` differs from what was last rendered. True if written."""
+        if self.last.get(key, _MISSING) == value:
+            return False
+        self.last[key] = value
+        write(value)
+        self.ops += 1
+        return True
+
+    def text(self, key, value, replace):
+        """Patch a text widget: `replace(start, end, inserted)` for the changed span only."""
+        old = self.last.get(key)
+        if old == value:
+            return False
+        self.last[key] = value
+        if old is None:
+            replace(0, None, value)  # first render: fill it all
+        else:
+            replace(*text_splice(old, value))
+        self.ops += 1
+        return True
+
+    def rows(self, key, values, insert, delete):
+        """Bring a list widget from the last rendered rows to `values` with per-row ops."""
+        old = self.last.get(key, [])
+        if old == values:
+            return False
+        for op in diff_rows(old, values):
+            if op[0] == "delete":
+                delete(op[1])
+            else:
+                insert(op[1], op[2])
+            self.ops += 1
+        self.last[key] = list(values)
+        return True
+
+    def remember(self, key, value):
+        """Record a value the user typed into a widget (it is already on screen)."""
+        self.last[key] = list(value) if isinstance(value, list) else value
+
+    def forget(self, key=None):
+        """Force a full redraw of one key (or everything) on the next render."""
+        if key is None:
+            self.last.clear()
+        else:
+            self.last.pop(key, None)
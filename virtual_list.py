@@ -0,0 +1,97 @@
+"""
+Virtualized list for Tk: a Listbox that only ever holds the visible rows.
+
+`VirtualList` keeps the full row list in Python and shows a window of
+`height` rows starting at `first`. Scrolling (scrollbar, mouse wheel, arrow
+keys) moves the window and patches the Listbox through a RenderCache, so
+scrolling by one row is one delete and one insert, however many rows there are.
+"""
+
+import tkinter as tk
+from tkinter import ttk
+
+from view_model import RenderCache
+
+
+class VirtualList:
+    """Scrollable list of `rows` rendered with `label(row)`; only visible rows are widgets."""
+
+    def __init__(self, parent, height=10, label=str, font=None):
+        self.height = height
+        self.label = label
+        self.rows = []
+        self.first = 0
+        self._view = RenderCache()
+
+        self.frame = ttk.Frame(parent)
+        self.listbox = tk.Listbox(self.frame, height=height, font=font, exportselection=False)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self._on_scrollbar)
+        self.listbox.pack(side="left", fill="x", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.listbox.bind("<MouseWheel>", self._on_wheel)
+        self.listbox.bind("<Button-4>", lambda e: self.scroll(-3))  # Linux wheel up
+        self.listbox.bind("<Button-5>", lambda e: self.scroll(3))  # Linux wheel down
+        self.listbox.bind("<Up>", lambda e: self._on_arrow(-1))
+        self.listbox.bind("<Down>", lambda e: self._on_arrow(1))
+
+    def pack(self, **kw):
+        self.frame.pack(**kw)
+
+    # ---------- Data ----------
+    def set_rows(self, rows):
+        """Show a new row list (keeps the scroll position where possible)."""
+        self.rows = rows
+        self.first = max(0, min(self.first, len(rows) - self.height))
+        self.render()
+
+    def selected(self):
+        """The selected row object, or None."""
+        sel = self.listbox.curselection()
+        if not sel:
+            return None
+        i = self.first + sel[0]
+        return self.rows[i] if i < len(self.rows) else None
+
+    # ---------- Rendering ----------
+    def render(self):
+        visible = [self.label(row) for row in self.rows[self.first:self.first + self.height]]
+        self._view.rows("visible", visible, self.listbox.insert, self.listbox.delete)
+        total = len(self.rows)
+        if total <= self.height:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.first / total, (self.first + self.height) / total)
+
+    def scroll_to(self, first):
+        first = max(0, min(first, len(self.rows) - self.height))
+        if first != self.first:
+            self.first = first
+            self.listbox.selection_clear(0, tk.END)
+            self.render()
+
+    def scroll(self, rows):
+        self.scroll_to(self.first + rows)
+
+    # ---------- Event handlers ----------
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(round(float(amount) * len(self.rows)))
+        elif action == "scroll":
+            step = self.height if unit == "pages" else 1
+            self.scroll(int(amount) * step)
+
+    def _on_wheel(self, event):
+        # Windows reports multiples of 120, macOS small deltas
+        delta = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        self.scroll(-3 * delta)
+        return "break"
+
+    def _on_arrow(self, step):
+        sel = self.listbox.curselection()
+        pos = sel[0] if sel else 0
+        if (step < 0 and pos == 0) or (step > 0 and pos == self.height - 1):
+            self.scroll(step)  # at the edge: move the window, keep the selection on the edge row
+            self.listbox.selection_set(pos)
+            return "break"
+        return None